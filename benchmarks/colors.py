@@ -0,0 +1,88 @@
+"""Dominant color throughput, fast_colorthief on full images vs the color engine.
+
+Network is left out, both sides get the image bytes up front. The old path
+decoded the full image on the event loop with fast_colorthief, the new one
+decodes a small rendition in draft mode on the color executor in batches.
+
+    python benchmarks/colors.py [images]
+
+fast-colorthief is no longer a dependency, install it to get the baseline.
+"""
+
+import asyncio
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from PIL import Image
+
+from utils.colorthief import _executor, colors_for_images
+
+try:
+    import fast_colorthief
+except ImportError:
+    fast_colorthief = None
+
+BATCH = 8
+
+
+def synthetic_cover(seed: int, side: int):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:side, 0:side]
+    pixels = np.stack(
+        [x * 255 // side, y * 255 // side, np.full_like(x, seed * 37 % 255)], axis=-1
+    )
+    pixels = np.clip(pixels + rng.normal(0, 12, pixels.shape), 0, 255)
+    output = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def legacy_color(data: bytes):
+    r, g, b = fast_colorthief.get_dominant_color(io.BytesIO(data), quality=100)
+    return (r << 16) | (g << 8) | b
+
+
+async def engine(images):
+    for start in range(0, len(images), BATCH):
+        await _executor.run(colors_for_images, images[start : start + BATCH])
+
+
+def report(name: str, count: int, elapsed: float, images):
+    size = sum(map(len, images)) / len(images) / 1024
+    print(
+        f"{name:>28}: {count / elapsed:8.0f} images/s, {elapsed / count * 1000:6.2f} ms each, {size:6.1f} KB per image"
+    )
+
+
+async def main(count: int):
+    full = [synthetic_cover(seed, 1080) for seed in range(16)]
+    small = [synthetic_cover(seed, 64) for seed in range(16)]
+    full_batch = [full[i % len(full)] for i in range(count)]
+    small_batch = [small[i % len(small)] for i in range(count)]
+
+    if fast_colorthief is not None:
+        started = time.perf_counter()
+        for data in full_batch:
+            legacy_color(data)
+        report(
+            "fast_colorthief, full image", count, time.perf_counter() - started, full
+        )
+    else:
+        print("fast_colorthief not installed, skipping the baseline")
+
+    for name, images, batch in (
+        ("engine, full image", full, full_batch),
+        ("engine, 64px rendition", small, small_batch),
+    ):
+        started = time.perf_counter()
+        await engine(batch)
+        report(name, count, time.perf_counter() - started, images)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 400))
@@ -0,0 +1,115 @@
+"""Image grid rendering, on the event loop as PNG vs the worker pool.
+
+Renders 2, 4 and 12 synthetic 1080x1350 photo-like JPEGs both ways and
+reports output size, wall time and the longest event loop stall.
+
+    python benchmarks/image_grid.py
+"""
+
+import asyncio
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from PIL import Image
+
+from utils.imagegrid import build_grid, grid_shape
+
+
+def synthetic_photo(seed: int, size=(1080, 1350)):
+    rng = np.random.default_rng(seed)
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack(
+        [
+            (x * (seed % 5 + 1) / width * 255) % 255,
+            (y * (seed % 3 + 1) / height * 255) % 255,
+            ((x + y) / (width + height) * 255),
+        ],
+        axis=-1,
+    )
+    noise = rng.normal(0, 18, base.shape)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def legacy_grid(blobs):
+    # build_image_grid before it moved off the loop, minus the download
+    images = [Image.open(io.BytesIO(blob)) for blob in blobs]
+    cols, rows = grid_shape(len(images))
+    cell_width = max(img.width for img in images)
+    cell_height = max(img.height for img in images)
+
+    grid = Image.new("RGBA", (cols * cell_width, rows * cell_height), (0, 0, 0, 0))
+    for i, img in enumerate(images):
+        scale = min(cell_width / img.width, cell_height / img.height)
+        size = (int(img.width * scale), int(img.height * scale))
+        resized = img.resize(size, Image.Resampling.LANCZOS)
+        centered = Image.new("RGBA", (cell_width, cell_height), (0, 0, 0, 0))
+        centered.paste(
+            resized, ((cell_width - size[0]) // 2, (cell_height - size[1]) // 2)
+        )
+        grid.paste(centered, ((i % cols) * cell_width, (i // cols) * cell_height))
+
+    if grid.width > 1920:
+        ratio = 1920 / grid.width
+        grid = grid.resize((1920, round(grid.height * ratio)), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    grid.save(output, format="PNG")
+    output.seek(0)
+    return output, "png"
+
+
+async def legacy_build(blobs):
+    return legacy_grid(blobs)
+
+
+async def timed(build, blobs):
+    stall = 0.0
+
+    async def watch():
+        nonlocal stall
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(0.005)
+            stall = max(stall, loop.time() - started - 0.005)
+
+    watcher = asyncio.create_task(watch())
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    output, ext = await build(blobs)
+    elapsed = time.perf_counter() - started
+    # Let the watcher wake up once more to see a stall that just ended
+    await asyncio.sleep(0.01)
+    watcher.cancel()
+    return len(output.getvalue()), ext, elapsed, stall
+
+
+async def main():
+    blobs = [synthetic_photo(seed) for seed in range(12)]
+    # Start the worker processes outside the measurement
+    await build_grid(blobs[:1])
+
+    print("images  before (PNG, on loop)            after (worker)")
+    for count in (2, 4, 12):
+        before = await timed(legacy_build, blobs[:count])
+        after = await timed(build_grid, blobs[:count])
+        print(
+            f"{count:>6}  "
+            + "  ".join(
+                f"{size / 1024 ** 2:5.2f} MB {ext:<4} {elapsed:5.2f} s, stall {stall * 1000:5.0f} ms"
+                for size, ext, elapsed, stall in (before, after)
+            )
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""Interaction time to first response under background load, FIFO vs lanes.
+
+A stream of passive/background upstream calls saturates a 16-slot gate
+while interactive calls arrive alongside. Reports the p50/p99 time from an
+interaction's arrival until its upstream call returns.
+
+    python benchmarks/lanes.py
+"""
+
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.lanes import LANE_BACKGROUND, LANE_INTERACTIVE, LANE_PASSIVE, LaneGate
+
+SLOTS = 16
+CALL_SECONDS = 0.05
+PASSIVE_CALLS, PASSIVE_EVERY = 1500, 0.002
+INTERACTIVE_CALLS, INTERACTIVE_EVERY = 150, 0.015
+
+
+class FifoGate:
+    # The baseline, one shared semaphore for everything
+    def __init__(self) -> None:
+        self.semaphore = asyncio.Semaphore(SLOTS)
+
+    async def acquire(self, lane: int):
+        await self.semaphore.acquire()
+
+    def release(self):
+        self.semaphore.release()
+
+
+async def call(gate, lane: int, timings=None):
+    arrived = time.perf_counter()
+    await gate.acquire(lane)
+    try:
+        await asyncio.sleep(CALL_SECONDS)
+    finally:
+        gate.release()
+    if timings is not None:
+        timings.append(time.perf_counter() - arrived)
+
+
+async def arrivals(count: int, every: float, start):
+    tasks = []
+    for i in range(count):
+        tasks.append(start(i))
+        await asyncio.sleep(every)
+    await asyncio.gather(*tasks)
+
+
+async def run(gate):
+    random.seed(0)
+    timings = []
+
+    def passive(i):
+        lane = LANE_BACKGROUND if random.random() < 0.3 else LANE_PASSIVE
+        return asyncio.create_task(call(gate, lane))
+
+    def interactive(i):
+        return asyncio.create_task(call(gate, LANE_INTERACTIVE, timings))
+
+    await asyncio.gather(
+        arrivals(PASSIVE_CALLS, PASSIVE_EVERY, passive),
+        arrivals(INTERACTIVE_CALLS, INTERACTIVE_EVERY, interactive),
+    )
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+async def main():
+    for name, gate in (
+        ("FIFO semaphore", FifoGate()),
+        ("lanes", LaneGate("bench", SLOTS, reserved=4)),
+    ):
+        p50, p99 = await run(gate)
+        print(
+            f"{name:>14}: interactive p50 {p50 * 1000:5.0f} ms, p99 {p99 * 1000:5.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
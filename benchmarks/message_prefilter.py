@@ -0,0 +1,168 @@
+"""MESSAGE_CREATE parsing with and without the raw prefilter.
+
+Feeds N guild message payloads (5% with a watched link) through the
+gateway parser, reports CPU time per message, retained memory and how many
+messages were dispatched, then checks a skipped message still produces
+message_edit and message_delete.
+
+    python benchmarks/message_prefilter.py [messages]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import discord
+
+from utils.prefilter import MessageFilter
+
+GUILD = {
+    "id": "1",
+    "name": "bench",
+    "channels": [
+        {
+            "id": "10",
+            "type": 0,
+            "name": "general",
+            "position": 0,
+            "permission_overwrites": [],
+        }
+    ],
+    "roles": [
+        {
+            "id": "1",
+            "name": "@everyone",
+            "permissions": "0",
+            "position": 0,
+            "color": 0,
+            "hoist": False,
+            "managed": False,
+            "mentionable": False,
+        }
+    ],
+    "members": [],
+    "emojis": [],
+    "stickers": [],
+    "member_count": 2,
+    "features": [],
+    "unavailable": False,
+}
+
+
+def payload(i: int, link: bool):
+    content = f"hello there this is message {i} " + (
+        "https://www.tiktok.com/@user/video/7000000000000000000"
+        if link
+        else "just chatting"
+    )
+    return {
+        "id": str(10**17 + i),
+        "channel_id": "10",
+        "guild_id": "1",
+        "author": {
+            "id": str(500 + i % 50),
+            "username": "user",
+            "avatar": None,
+            "discriminator": "0",
+            "global_name": "User",
+        },
+        "member": {
+            "roles": [],
+            "nick": None,
+            "joined_at": "2024-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+        },
+        "content": content,
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+        "flags": 0,
+    }
+
+
+def connection(events: list):
+    client = discord.Client(intents=discord.Intents.all())
+    state = client._connection
+    state._messages = deque(maxlen=1000)
+    state._add_guild(discord.Guild(data=GUILD, state=state))
+    # Only the event name, keeping the messages would count against retention
+    state.dispatch = lambda event, *args: events.append(event)
+    return state
+
+
+def run(payloads, filtered: bool):
+    events = []
+    state = connection(events)
+    if filtered:
+        message_filter = MessageFilter()
+        message_filter.watch_content("tiktok.com")
+        message_filter.install(SimpleNamespace(_connection=state, command_prefix="!"))
+
+    parse = state.parsers["MESSAGE_CREATE"]
+    gc.collect()
+    tracemalloc.start()
+    started = time.process_time()
+    for data in payloads:
+        parse(dict(data))
+    elapsed = time.process_time() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return state, events, elapsed, retained
+
+
+def main(count: int):
+    random.seed(1)
+    payloads = [payload(i, random.random() < 0.05) for i in range(count)]
+
+    for name, filtered in (("original", False), ("prefiltered", True)):
+        state, events, elapsed, retained = run(payloads, filtered)
+        print(
+            f"{name:>11}: {elapsed * 1e6 / count:6.1f} us/msg, {retained / 1024 ** 2:5.1f} MB retained, "
+            f"{len(events):,} dispatched"
+        )
+
+    # The last skipped message, edited and then deleted
+    events = []
+    state.dispatch = lambda event, *args: events.append((event, *args))
+    skipped = next(
+        data for data in reversed(payloads) if "tiktok" not in data["content"]
+    )
+    state.parsers["MESSAGE_UPDATE"](
+        {
+            "id": skipped["id"],
+            "channel_id": "10",
+            "guild_id": "1",
+            "content": "edited",
+            "edited_timestamp": "2024-01-01T00:01:00+00:00",
+        }
+    )
+    state.parsers["MESSAGE_DELETE"](
+        {"id": skipped["id"], "channel_id": "10", "guild_id": "1"}
+    )
+    for event, *args in events:
+        if event == "message_edit":
+            before, after = args
+            print(
+                f"message_edit: {before.content!r} -> {after.content!r} in #{after.channel}"
+            )
+        elif event == "message_delete":
+            print(f"message_delete: {args[0].content!r} by {args[0].author}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,54 @@
+"""Bytes downloaded per Reddit link, before and after the single trimmed fetch.
+
+Before, a link was resolved and its full `.json` (with the whole comment
+tree) was downloaded twice. Now it's one `limit=1&depth=1&raw_json=1` fetch.
+
+    python benchmarks/reddit_payload.py https://www.reddit.com/r/.../comments/abc123/...
+"""
+
+import asyncio
+import re
+import sys
+
+import aiohttp
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; Keto benchmark)"}
+POST_PATTERN = re.compile(r"/comments/([A-Za-z0-9]+)(?:/[^/?#]*/([A-Za-z0-9]+))?")
+
+
+async def size_of(session: aiohttp.ClientSession, url: str):
+    async with session.get(url) as response:
+        return len(await response.read()), str(response.url)
+
+
+async def measure(session: aiohttp.ClientSession, link: str):
+    # Before: redirect + full JSON for the NSFW check, then both again for the embed
+    async with session.get(link) as response:
+        resolved = str(response.url).split("?")[0].rstrip("/")
+    full, _ = await size_of(session, resolved + ".json")
+    before = 2 * full
+
+    post_id, comment_id = POST_PATTERN.search(resolved).groups()
+    url = f"https://www.reddit.com/comments/{post_id}"
+    if comment_id:
+        url += f"/_/{comment_id}"
+    after, _ = await size_of(session, url + ".json?limit=1&depth=1&raw_json=1")
+    return before, after
+
+
+async def main(links):
+    total_before = total_after = 0
+    async with aiohttp.ClientSession(headers=HEADERS) as session:
+        for link in links:
+            before, after = await measure(session, link)
+            total_before += before
+            total_after += after
+            print(f"{before / 1024:9.1f} KB -> {after / 1024:7.1f} KB  {link}")
+    if links:
+        print(
+            f"average {total_before / len(links) / 1024:.1f} KB -> {total_after / len(links) / 1024:.1f} KB per link"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
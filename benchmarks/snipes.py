@@ -0,0 +1,190 @@
+"""Snipe logging under heavy edit/delete churn, message lists vs ring buffers.
+
+Logs N edits and deletes over 100 channels with skewed traffic. Each
+Message is dropped right after logging, as the cache would drop it. The
+script reports per-event cost, retained memory and the cost of expiring
+everything.
+
+    python benchmarks/snipes.py [events]
+"""
+
+import asyncio
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import discord
+
+from utils.snipes import Snipe, SnipeStore
+from utils.timers import TimerWheel
+
+CHANNELS = 100
+
+
+def connection():
+    client = discord.Client(intents=discord.Intents.none())
+    state = client._connection
+    guild = discord.Guild(
+        data={
+            "id": "1",
+            "name": "bench",
+            "channels": [
+                {
+                    "id": str(10 + i),
+                    "type": 0,
+                    "name": f"channel-{i}",
+                    "position": i,
+                    "permission_overwrites": [],
+                }
+                for i in range(CHANNELS)
+            ],
+            "roles": [],
+            "members": [],
+            "emojis": [],
+            "stickers": [],
+            "member_count": 2,
+            "features": [],
+            "unavailable": False,
+        },
+        state=state,
+    )
+    state._add_guild(guild)
+    return state, guild
+
+
+def message(state, guild, i: int):
+    channel_id = 10 + min(CHANNELS - 1, int(random.expovariate(0.1)))
+    data = {
+        "id": str(10**17 + i),
+        "channel_id": str(channel_id),
+        "guild_id": "1",
+        "author": {
+            "id": str(500 + i % 50),
+            "username": "user",
+            "avatar": "a" * 32,
+            "discriminator": "0",
+            "global_name": "User",
+        },
+        "member": {
+            "roles": [],
+            "nick": None,
+            "joined_at": "2024-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+        },
+        "content": "some message content that was edited or deleted " * 2,
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": (
+            [
+                {
+                    "id": "9",
+                    "filename": "image.png",
+                    "url": "https://cdn.discordapp.com/attachments/1/2/image.png",
+                    "proxy_url": "https://media.discordapp.net/attachments/1/2/image.png",
+                    "size": 1,
+                }
+            ]
+            if i % 10 == 0
+            else []
+        ),
+        "embeds": (
+            [{"type": "rich", "title": "title", "description": "d" * 200}]
+            if i % 7 == 0
+            else []
+        ),
+        "pinned": False,
+        "type": 0,
+        "flags": 0,
+    }
+    return discord.Message(
+        state=state, channel=guild.get_channel(channel_id), data=data
+    )
+
+
+class MessageLists:
+    # Utilities.last_logged_messages before the ring buffers
+    def __init__(self) -> None:
+        self.last_logged_messages = {}
+        self.timers = TimerWheel()
+
+    def log(self, kind: str, message, after):
+        self.last_logged_messages.setdefault(message.channel.id, []).append(
+            (kind, message, after, message.embeds or None)
+        )
+        self.timers.call_later(120, self.remove, message.channel.id, message)
+
+    def remove(self, channel_id, message):
+        if channel_id in self.last_logged_messages:
+            self.last_logged_messages[channel_id] = [
+                m
+                for m in self.last_logged_messages[channel_id]
+                if m[1].id != message.id
+            ]
+            if not self.last_logged_messages[channel_id]:
+                del self.last_logged_messages[channel_id]
+
+    def expire_all(self):
+        for channel_id, logged in list(self.last_logged_messages.items()):
+            for entry in list(logged):
+                self.remove(channel_id, entry[1])
+        self.timers.driver.cancel()
+
+
+class RingBuffers:
+    def __init__(self) -> None:
+        self.store = SnipeStore()
+
+    def log(self, kind: str, message, after):
+        self.store.log(message.channel.id, Snipe(kind, message, after))
+
+    def expire_all(self):
+        # Reading a channel drops its expired snipes, pretend they all are
+        for channel_id in list(self.store.channels):
+            for snipe in self.store.channels[channel_id].slots:
+                if snipe is not None:
+                    snipe.logged_at = 0
+            self.store.pop(channel_id)
+
+
+async def run(name: str, store, events: int):
+    state, guild = connection()
+    random.seed(2)
+    cost = 0.0
+    gc.collect()
+    tracemalloc.start()
+    for i in range(events):
+        logged = message(state, guild, i)
+        started = time.perf_counter()
+        store.log("delete" if i % 2 else "edit", logged, logged)
+        cost += time.perf_counter() - started
+        del logged
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    store.expire_all()
+    expiry = time.perf_counter() - started
+    print(
+        f"{name:>13}: {cost * 1e6 / events:5.2f} us/event (traced), {retained / 1024 ** 2:5.1f} MB retained, "
+        f"expiring everything {expiry * 1000:6.0f} ms"
+    )
+
+
+async def main(events: int):
+    await run("message lists", MessageLists(), events)
+    await run("ring buffers", RingBuffers(), events)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000))
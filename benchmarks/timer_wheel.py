@@ -0,0 +1,92 @@
+"""Pending deferred actions, one sleeping task each vs the timer wheel.
+
+Parks N delayed message edits both ways and reports tasks, memory and
+scheduling time, then checks how late a mixed batch of timers fires.
+
+    python benchmarks/timer_wheel.py [pending]
+"""
+
+import asyncio
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.timers import TimerWheel
+
+
+class FakeMessage:
+    # Roughly what a parked handler keeps alive: the message and its content
+    def __init__(self, message_id: int) -> None:
+        self.id = message_id
+        self.content = "https://www.tiktok.com/@user/video/7000000000000000000" * 2
+
+    async def edit(self, **kwargs):
+        pass
+
+
+async def sleep_then_edit(message: FakeMessage, delay: float):
+    await asyncio.sleep(delay)
+    await message.edit(suppress=True)
+
+
+async def measure(name: str, schedule, pending: int):
+    tasks_before = len(asyncio.all_tasks())
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    schedule(pending)
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tasks = len(asyncio.all_tasks()) - tasks_before
+    print(
+        f"{name:>12}: {tasks:6,} tasks, {memory / 1024 ** 2:5.1f} MB, {elapsed * 1000:4.0f} ms to schedule"
+    )
+
+
+async def main(pending: int):
+    sleepers = []
+
+    def with_tasks(count: int):
+        for i in range(count):
+            sleepers.append(asyncio.create_task(sleep_then_edit(FakeMessage(i), 20)))
+
+    wheel = TimerWheel()
+
+    def with_wheel(count: int):
+        for i in range(count):
+            wheel.call_later(20, FakeMessage(i).edit)
+
+    await measure("sleep tasks", with_tasks, pending)
+    for task in sleepers:
+        task.cancel()
+    await asyncio.gather(*sleepers, return_exceptions=True)
+    await measure("timer wheel", with_wheel, pending)
+    wheel.driver.cancel()
+
+    # Firing accuracy over a mix of delays, measured from the loop clock
+    wheel = TimerWheel()
+    loop = asyncio.get_running_loop()
+    lateness = []
+
+    def fired(due: float):
+        lateness.append(loop.time() - due)
+
+    for _ in range(3000):
+        delay = random.uniform(0, 3)
+        wheel.call_later(delay, fired, loop.time() + delay)
+    await asyncio.sleep(3.2)
+    wheel.driver.cancel()
+    print(
+        f"fired {len(lateness):,} of 3,000, late by {min(lateness) * 1000:.0f}-{max(lateness) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000))
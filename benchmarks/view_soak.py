@@ -0,0 +1,89 @@
+"""Memory soak for message components, per-message Views vs stateless items.
+
+Sends N TikTok-style fixes through a real ViewStore the way
+Messageable.send does, and reports what stays alive afterwards.
+
+    python benchmarks/view_soak.py [messages]
+"""
+
+import asyncio
+import gc
+import logging
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import discord
+
+from cogs.socials import SummarizeTikTokButton
+from utils.views import StaticView
+
+
+class LegacySummarizeButton(discord.ui.Button):
+    # The shape of the button before it became a DynamicItem
+    def __init__(self, link: str):
+        super().__init__(
+            style=discord.ButtonStyle.secondary, emoji="✨", label="Summarize"
+        )
+        self.link = link
+        self.summary = None
+        self.logger = logging.getLogger("Keto")
+
+
+def legacy_view(link: str):
+    view = discord.ui.View(timeout=604800)
+    view.add_item(discord.ui.Button(label="1.2k", disabled=True, emoji="🤍"))
+    view.add_item(discord.ui.Button(label="34", disabled=True, emoji="💬"))
+    view.add_item(LegacySummarizeButton(link))
+    return view
+
+
+def static_view(link: str):
+    view = StaticView()
+    view.add_item(discord.ui.Button(label="1.2k", disabled=True, emoji="🤍"))
+    view.add_item(discord.ui.Button(label="34", disabled=True, emoji="💬"))
+    view.add_item(SummarizeTikTokButton(link))
+    return view
+
+
+async def soak(build, messages: int):
+    client = discord.Client(intents=discord.Intents.none())
+    store = client._connection._view_store
+    tasks_before = len(asyncio.all_tasks())
+
+    gc.collect()
+    tracemalloc.start()
+    for message_id in range(messages):
+        view = build(
+            f"https://www.tiktok.com/@user/video/{7000000000000000000 + message_id}"
+        )
+        view.to_components()
+        # What Messageable.send does with the view of a sent message
+        if not view.is_finished():
+            store.add_view(view, 10**17 + message_id)
+        del view
+    await asyncio.sleep(0)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "retained": retained,
+        "views": len(store._synced_message_views),
+        "tasks": len(asyncio.all_tasks()) - tasks_before,
+    }
+
+
+async def main(messages: int):
+    for name, build in (("per-message View", legacy_view), ("stateless", static_view)):
+        stats = await soak(build, messages)
+        print(
+            f"{name:>16}: {stats['retained'] / messages:8.0f} B retained per message, "
+            f"{stats['views']:,} stored views, {stats['tasks']:,} pending tasks"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -95,6 +95,7 @@ class UserConfig(commands.Cog):
         name="preferences",
         description="Show or modify user configuration.",
         fallback="show",
+        extras={"defer_ephemeral": True},
     )
     @app_commands.allowed_installs(guilds=True, users=False)
     @app_commands.allowed_contexts(guilds=True, dms=False, private_channels=False)
@@ -126,6 +127,7 @@ class UserConfig(commands.Cog):
     @config_group.command(
         name="tracking",
         description="Enable or disable tracking warnings per site.",
+        extras={"defer_ephemeral": True},
     )
     @app_commands.describe(site="Site to modify.")
     @app_commands.autocomplete(site=social_autofix_autocompletion)
@@ -154,6 +156,7 @@ class UserConfig(commands.Cog):
     @config_group.command(
         name="transcriptions",
         description="Enable or disable voice message transcriptions.",
+        extras={"defer_ephemeral": True},
     )
     @app_commands.describe(
         enabled="Enable or disable transcriptions for voice messages (per-user)."
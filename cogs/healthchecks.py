@@ -1,8 +1,9 @@
 import os
 
-import aiohttp
 from discord.ext import commands, tasks
 
+from utils.lanes import LANE_BACKGROUND, http_session
+
 
 class Healthchecks(commands.Cog, name="healthchecks"):
     def __init__(self, bot):
@@ -15,7 +16,7 @@ class Healthchecks(commands.Cog, name="healthchecks"):
 
     async def update_healthchecks(self):
         if os.getenv("HEALTHCHECKS_URL"):
-            async with aiohttp.ClientSession() as session:
+            async with http_session(lane=LANE_BACKGROUND) as session:
                 async with session.get(os.environ.get("HEALTHCHECKS_URL")) as response:
                     if not response.status == 200:
                         print("Healthchecks.io ping failed.", response.status)
@@ -2,114 +2,227 @@ import asyncio
 import json
 import os
 import re
-from contextlib import suppress
+from functools import partial
 from urllib.parse import quote_plus
 
-import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
-from discord.ui import Button, Select, View
+from discord.ui import Button, Select
 
 from utils.cache import cached_decorator
-from utils.colorthief import get_color
+from utils.colorthief import color_now, recolor
+from utils.fair import enrichment
 from utils.jsons import SocialsJSON
-
-
-class TrailerPaginator(View):
-    def __init__(self, trailers):
-        super().__init__(timeout=604800)
-        self.trailers = trailers
-        self.current_page = 0
-        self.update_buttons()
-
-    def update_buttons(self):
-        self.clear_items()
-        if len(self.trailers) > 1:
-            self.add_item(
-                Button(
-                    style=discord.ButtonStyle.secondary,
-                    label="Previous",
-                    custom_id="prev",
-                )
-            )
-            self.add_item(
-                Button(
-                    style=discord.ButtonStyle.secondary, label="Next", custom_id="next"
-                )
+from utils.lanes import http_session
+from utils.load import governor
+from utils.prefilter import message_filter
+from utils.rest import rest
+from utils.timers import timers
+from utils.views import StaticView
+
+
+async def fetch_trailers(interaction: discord.Interaction, imdb_id: str, is_tv: bool):
+    media = interaction.client.get_cog("media")
+    if is_tv:
+        *_, trailers = await media.detailed_cinemeta_tv(imdb_id)
+    else:
+        *_, trailers = await media.detailed_cinemeta_movie(imdb_id)
+    return trailers
+
+
+def trailer_page(trailers, page: int):
+    content = trailers[page]
+    if len(trailers) > 1:
+        content = f"({page + 1}/{len(trailers)}) {content}"
+    return content
+
+
+def trailer_paginator(imdb_id: str, is_tv: bool, page: int, count: int):
+    view = StaticView()
+    if count > 1:
+        view.add_item(TrailerPageButton(imdb_id, is_tv, page, "prev"))
+        view.add_item(TrailerPageButton(imdb_id, is_tv, page, "next"))
+    return view
+
+
+class TrailerPageButton(
+    discord.ui.DynamicItem[Button],
+    template=r"trailers:(?P<kind>movie|tv):(?P<imdb_id>tt\d+):(?P<page>\d+):(?P<direction>prev|next)",
+):
+    def __init__(self, imdb_id: str, is_tv: bool, page: int, direction: str):
+        super().__init__(
+            Button(
+                style=discord.ButtonStyle.secondary,
+                label="Previous" if direction == "prev" else "Next",
+                custom_id=f"trailers:{'tv' if is_tv else 'movie'}:{imdb_id}:{page}:{direction}",
             )
+        )
+        self.imdb_id = imdb_id
+        self.is_tv = is_tv
+        self.page = page
+        self.direction = direction
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(
+            match["imdb_id"],
+            match["kind"] == "tv",
+            int(match["page"]),
+            match["direction"],
+        )
 
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.data["custom_id"] == "prev":
-            self.current_page = (self.current_page - 1) % len(self.trailers)
-        elif interaction.data["custom_id"] == "next":
-            self.current_page = (self.current_page + 1) % len(self.trailers)
-
-        content = self.trailers[self.current_page]
-        if len(self.trailers) > 1:
-            content = f"({self.current_page + 1}/{len(self.trailers)}) {content}"
+    async def callback(self, interaction: discord.Interaction):
+        trailers = await fetch_trailers(interaction, self.imdb_id, self.is_tv)
+        if not trailers:
+            await interaction.response.edit_message(
+                content="No trailers found.", view=None
+            )
+            return
 
+        step = -1 if self.direction == "prev" else 1
+        page = (self.page + step) % len(trailers)
         await interaction.response.edit_message(
-            content=content,
-            view=self,
+            content=trailer_page(trailers, page),
+            view=trailer_paginator(self.imdb_id, self.is_tv, page, len(trailers)),
         )
-        return True
 
 
-class TrailerView(View):
-    def __init__(self, trailers):
-        super().__init__(timeout=604800)
-        self.trailers = trailers
-        if trailers:
-            self.add_trailer_button()
-
-    def add_trailer_button(self):
-        label = "Trailer" if len(self.trailers) == 1 else "Trailers"
-        button = Button(
-            style=discord.ButtonStyle.secondary,
-            label=label,
-            emoji="<:Music_YouTube:958786388457840700>",
+class TrailerButton(
+    discord.ui.DynamicItem[Button],
+    template=r"trailers:(?P<kind>movie|tv):(?P<imdb_id>tt\d+)",
+):
+    def __init__(self, imdb_id: str, is_tv: bool = False, count: int = 1):
+        super().__init__(
+            Button(
+                style=discord.ButtonStyle.secondary,
+                label="Trailer" if count == 1 else "Trailers",
+                emoji="<:Music_YouTube:958786388457840700>",
+                custom_id=f"trailers:{'tv' if is_tv else 'movie'}:{imdb_id}",
+            )
         )
-        button.callback = self.button_callback
-        self.add_item(button)
-
-    async def button_callback(self, interaction: discord.Interaction):
-        paginator = TrailerPaginator(self.trailers)
-        content = self.trailers[0]
-        if len(self.trailers) > 1:
-            content = f"(1/{len(self.trailers)}) {content}"
+        self.imdb_id = imdb_id
+        self.is_tv = is_tv
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["imdb_id"], match["kind"] == "tv")
+
+    async def callback(self, interaction: discord.Interaction):
+        trailers = await fetch_trailers(interaction, self.imdb_id, self.is_tv)
+        if not trailers:
+            await interaction.response.send_message(
+                "No trailers found.", ephemeral=True
+            )
+            return
+
         await interaction.response.send_message(
-            content,
-            view=paginator,
+            trailer_page(trailers, 0),
+            view=trailer_paginator(self.imdb_id, self.is_tv, 0, len(trailers)),
             ephemeral=True,
         )
 
 
-class DiscoverView(View):
-    def __init__(self, imdb_id, cog):
-        super().__init__(timeout=604800)
+class DiscoverSelect(
+    discord.ui.DynamicItem[Select],
+    template=r"discover_select:(?P<imdb_id>tt\d+)",
+):
+    def __init__(self, imdb_id: str, options):
+        super().__init__(
+            Select(
+                placeholder="Suggested Movies",
+                options=options,
+                custom_id=f"discover_select:{imdb_id}",
+            )
+        )
         self.imdb_id = imdb_id
-        self.cog = cog
-        self.add_discover_button()
-
-    def add_discover_button(self):
-        button = Button(
-            style=discord.ButtonStyle.secondary,
-            label="Discover More",
-            emoji="🍿",
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["imdb_id"], item.options)
+
+    async def callback(self, interaction: discord.Interaction):
+        media = interaction.client.get_cog("media")
+        tmdb_id = self.item.values[0]
+        query = next(
+            option.label for option in self.item.options if option.value == tmdb_id
         )
-        button.callback = self.button_callback
-        self.add_item(button)
+        await interaction.response.defer()
 
-    async def button_callback(self, interaction: discord.Interaction):
+        embed = discord.Embed(
+            color=discord.Color.light_gray(),
+            description=f"<a:discordloading:1199066225381228546> Fetching details for {query}...",
+        )
+        await interaction.edit_original_response(embed=embed, view=None)
+
+        search = await media.search_cinemeta_movie(query)
+        (
+            moviedb_id,
+            title,
+            year,
+            description,
+            poster,
+            genres,
+            runtime,
+            trailers,
+        ) = await media.detailed_cinemeta_movie(search)
+        embed = discord.Embed(
+            title=f"{title} ({year})",
+            description=description,
+            color=color_now(poster),
+        )
+        embed.set_thumbnail(url=poster)
+        if genres and runtime:
+            embed.set_footer(text=f"Runtime: {runtime} | Genres: {', '.join(genres)}")
+        elif genres:
+            embed.set_footer(text=f"Genres: {', '.join(genres)}")
+        elif runtime:
+            embed.set_footer(text=f"Runtime: {runtime}")
+
+        view = StaticView()
+        if trailers:
+            view.add_item(TrailerButton(search, count=len(trailers)))
+        view.add_item(DiscoverSelect(self.imdb_id, self.item.options))
+
+        stremio_button = StremioButton(search)
+        view.add_item(stremio_button)
+
+        omni_button = OmniButton(search)
+        view.add_item(omni_button)
+
+        reply = await interaction.edit_original_response(embed=embed, view=view)
+        recolor(reply, poster)
+
+
+class DiscoverButton(
+    discord.ui.DynamicItem[Button],
+    template=r"discover:(?P<imdb_id>tt\d+)",
+):
+    def __init__(self, imdb_id: str):
+        super().__init__(
+            Button(
+                style=discord.ButtonStyle.secondary,
+                label="Discover More",
+                emoji="🍿",
+                custom_id=f"discover:{imdb_id}",
+            )
+        )
+        self.imdb_id = imdb_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["imdb_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        media = interaction.client.get_cog("media")
         await interaction.response.defer()
         embed = discord.Embed(
             color=discord.Color.light_gray(),
             description="<a:discordloading:1199066225381228546> Fetching suggested movies...",
         )
         msg = await interaction.followup.send(embed=embed, ephemeral=True)
-        suggested_movies = await self.cog.get_suggested_movies(self.imdb_id)
+        suggested_movies = await media.get_suggested_movies(self.imdb_id)
 
         options = [
             discord.SelectOption(
@@ -120,72 +233,8 @@ class DiscoverView(View):
             for movie in suggested_movies[:25]
         ]
 
-        select = Select(
-            placeholder="Suggested Movies",
-            options=options,
-            custom_id="discover_select",
-        )
-
-        async def select_callback(interaction: discord.Interaction):
-            tmdb_id = interaction.data["values"][0]
-            query = next(
-                movie["Title"]
-                for movie in suggested_movies
-                if str(movie["TmdbId"]) == tmdb_id
-            )
-            await interaction.response.defer()
-
-            embed = discord.Embed(
-                color=discord.Color.light_gray(),
-                description=f"<a:discordloading:1199066225381228546> Fetching details for {query}...",
-            )
-            await msg.edit(embed=embed, view=None)
-
-            search = await self.cog.search_cinemeta_movie(query)
-            (
-                moviedb_id,
-                title,
-                year,
-                description,
-                poster,
-                genres,
-                runtime,
-                trailers,
-            ) = await self.cog.detailed_cinemeta_movie(search)
-            embed = discord.Embed(
-                title=f"{title} ({year})",
-                description=description,
-                color=await get_color(poster),
-            )
-            embed.set_thumbnail(url=poster)
-            if genres and runtime:
-                embed.set_footer(
-                    text=f"Runtime: {runtime} | Genres: {', '.join(genres)}"
-                )
-            elif genres:
-                embed.set_footer(text=f"Genres: {', '.join(genres)}")
-            elif runtime:
-                embed.set_footer(text=f"Runtime: {runtime}")
-
-            view = View(timeout=604800)
-            trailer_view = TrailerView(trailers) if trailers else None
-            if trailer_view:
-                for item in trailer_view.children:
-                    view.add_item(item)
-            view.add_item(select)
-
-            stremio_button = StremioButton(search)
-            view.add_item(stremio_button)
-
-            omni_button = OmniButton(search)
-            view.add_item(omni_button)
-
-            await msg.edit(embed=embed, view=view)
-
-        select.callback = select_callback
-
-        view = View(timeout=604800)
-        view.add_item(select)
+        view = StaticView()
+        view.add_item(DiscoverSelect(self.imdb_id, options))
 
         await msg.edit(embed=None, view=view)
 
@@ -202,6 +251,7 @@ class StremioButton(Button):
             emoji="<:stremio:1292976659829362813>",
         )
 
+
 class OmniButton(Button):
     def __init__(self, imdb_id: str, is_tv: bool = False):
         url = f"https://apps.apple.com/us/app/omni-content-hub/id6741470807"
@@ -223,10 +273,11 @@ class Media(commands.Cog, name="media"):
         self.imdb_pattern = re.compile(r"imdb\.com\/title\/(tt\d+)")
         self.tmdb_pattern = re.compile(r"themoviedb\.org\/(tv|movie)\/(\d+)(?:[-\w]*)")
         self.trakt_pattern = re.compile(r"trakt\.tv\/(movies|shows)\/([\w-]+)")
+        message_filter.watch_content("imdb.com/title", "themoviedb.org", "trakt.tv")
 
     @cached_decorator(ttl=604800)
     async def search_cinemeta_movie(self, query: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://v3-cinemeta.strem.io/catalog/movie/top/search={quote_plus(query)}.json"
             ) as response:
@@ -238,7 +289,7 @@ class Media(commands.Cog, name="media"):
 
     @cached_decorator(ttl=604800)
     async def search_cinemeta_tv(self, query: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://v3-cinemeta.strem.io/catalog/series/top/search={quote_plus(query)}.json"
             ) as response:
@@ -250,7 +301,7 @@ class Media(commands.Cog, name="media"):
 
     @cached_decorator(ttl=604800)
     async def detailed_cinemeta_movie(self, imdb_id: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://cinemeta-live.strem.io/meta/movie/{imdb_id}.json"
             ) as response:
@@ -280,7 +331,7 @@ class Media(commands.Cog, name="media"):
 
     @cached_decorator(ttl=604800)
     async def detailed_cinemeta_tv(self, imdb_id: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://cinemeta-live.strem.io/meta/series/{imdb_id}.json"
             ) as response:
@@ -300,7 +351,7 @@ class Media(commands.Cog, name="media"):
 
     @cached_decorator(ttl=604800)
     async def tmdb_to_imdb(self, tmdb_id: str, type: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://api.themoviedb.org/3/{type}/{tmdb_id}/external_ids?api_key={os.getenv('TMDB_TOKEN')}"
             ) as ext_response:
@@ -314,7 +365,7 @@ class Media(commands.Cog, name="media"):
 
     @cached_decorator(ttl=604800)
     async def trakt_to_imdb(self, trakt_url: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(f"https://{trakt_url}") as response:
                 chunk_size = 8192
                 content = b""
@@ -332,7 +383,7 @@ class Media(commands.Cog, name="media"):
 
     @cached_decorator(ttl=604800)
     async def get_suggested_movies(self, imdb_id: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://api.radarr.video/v1/movie/imdb/{imdb_id}"
             ) as response:
@@ -368,6 +419,16 @@ class Media(commands.Cog, name="media"):
             message.guild.id, "imdb", "enabled"
         ):
             return
+        content = message.content.strip("<>")
+        if not any(
+            pattern.search(content)
+            for pattern in (self.imdb_pattern, self.tmdb_pattern, self.trakt_pattern)
+        ):
+            return
+        async with governor.handling(), enrichment.slot(message.guild.id):
+            await self.lookup_media(message)
+
+    async def lookup_media(self, message: discord.Message):
         if imdb_id := self.imdb_pattern.search(message.content.strip("<>")):
             for _ in range(5):
                 if message.embeds:
@@ -402,25 +463,25 @@ class Media(commands.Cog, name="media"):
                     embed = discord.Embed(
                         title=f"{title} ({year})",
                         description=description,
-                        color=await get_color(poster),
+                        color=color_now(poster),
                     )
                     embed.set_thumbnail(url=poster)
                     if genres:
                         embed.set_footer(text=f"Genres: {', '.join(genres)}")
 
-                    trailer_view = TrailerView(trailers) if trailers else None
                     stremio_button = StremioButton(imdb_id, is_tv=True)
 
-                    combined_view = View(timeout=604800)
-                    if trailer_view:
-                        for item in trailer_view.children:
-                            combined_view.add_item(item)
+                    combined_view = StaticView()
+                    if trailers:
+                        combined_view.add_item(
+                            TrailerButton(imdb_id, is_tv=True, count=len(trailers))
+                        )
                     combined_view.add_item(stremio_button)
 
-                    await message.reply(embed=embed, view=combined_view)
+                    reply = await rest.reply(message, embed=embed, view=combined_view)
+                    recolor(reply, poster)
                     await self.config_cog.increment_link_fix_count("imdb")
-                    await asyncio.sleep(0.75)
-                    await message.edit(suppress=True)
+                    timers.call_later(0.75, partial(rest.edit, message, suppress=True))
                     return
             except:
                 pass
@@ -440,7 +501,7 @@ class Media(commands.Cog, name="media"):
                     embed = discord.Embed(
                         title=f"{title} ({year})",
                         description=description,
-                        color=await get_color(poster),
+                        color=color_now(poster),
                     )
                     embed.set_thumbnail(url=poster)
                     if genres and runtime:
@@ -452,22 +513,20 @@ class Media(commands.Cog, name="media"):
                     elif runtime:
                         embed.set_footer(text=f"Runtime: {runtime}")
 
-                    trailer_view = TrailerView(trailers) if trailers else None
                     stremio_button = StremioButton(imdb_id)
-                    discover_view = DiscoverView(imdb_id, self)
-
-                    combined_view = View(timeout=604800)
-                    if trailer_view:
-                        for item in trailer_view.children:
-                            combined_view.add_item(item)
-                    for item in discover_view.children:
-                        combined_view.add_item(item)
+
+                    combined_view = StaticView()
+                    if trailers:
+                        combined_view.add_item(
+                            TrailerButton(imdb_id, count=len(trailers))
+                        )
+                    combined_view.add_item(DiscoverButton(imdb_id))
                     combined_view.add_item(stremio_button)
 
-                    await message.reply(embed=embed, view=combined_view)
+                    reply = await rest.reply(message, embed=embed, view=combined_view)
+                    recolor(reply, poster)
                     await self.config_cog.increment_link_fix_count("imdb")
-                    await asyncio.sleep(0.75)
-                    await message.edit(suppress=True)
+                    timers.call_later(0.75, partial(rest.edit, message, suppress=True))
                     return
             except:
                 pass
@@ -506,34 +565,32 @@ class Media(commands.Cog, name="media"):
             embed = discord.Embed(
                 title=f"{title} ({year})",
                 description=description,
-                color=await get_color(poster),
+                color=color_now(poster),
             )
 
             embed.set_thumbnail(url=poster)
 
-            trailer_view = TrailerView(trailers) if trailers else None
             stremio_button = (
                 StremioButton(imdb_id, is_tv=True)
                 if tmdb_type == "tv"
                 else StremioButton(imdb_id)
             )
 
-            combined_view = View(timeout=604800)
-            if trailer_view:
-                for item in trailer_view.children:
-                    combined_view.add_item(item)
+            combined_view = StaticView()
+            if trailers:
+                combined_view.add_item(
+                    TrailerButton(imdb_id, is_tv=tmdb_type == "tv", count=len(trailers))
+                )
             if tmdb_type == "movie":
-                discover_view = DiscoverView(imdb_id, self)
-                for item in discover_view.children:
-                    combined_view.add_item(item)
+                combined_view.add_item(DiscoverButton(imdb_id))
             combined_view.add_item(stremio_button)
             omni_button = OmniButton(imdb_id)
             combined_view.add_item(omni_button)
 
-            await message.reply(embed=embed, view=combined_view)
+            reply = await rest.reply(message, embed=embed, view=combined_view)
+            recolor(reply, poster)
             await self.config_cog.increment_link_fix_count("imdb")
-            await asyncio.sleep(0.75)
-            await message.edit(suppress=True)
+            timers.call_later(0.75, partial(rest.edit, message, suppress=True))
             return
 
         if trakt_info := self.trakt_pattern.search(message.content.strip("<>")):
@@ -567,22 +624,23 @@ class Media(commands.Cog, name="media"):
             embed = discord.Embed(
                 title=f"{title} ({year})",
                 description=description,
-                color=await get_color(poster),
+                color=color_now(poster),
             )
 
             embed.set_thumbnail(url=poster)
 
-            trailer_view = TrailerView(trailers) if trailers else None
-
-            combined_view = View(timeout=604800)
-            if trailer_view:
-                for item in trailer_view.children:
-                    combined_view.add_item(item)
+            combined_view = StaticView()
+            if trailers:
+                combined_view.add_item(
+                    TrailerButton(
+                        imdb_id,
+                        is_tv="/shows/" in trakt_info.group(0),
+                        count=len(trailers),
+                    )
+                )
 
             if "/movies/" in trakt_info.group(0):
-                discover_view = DiscoverView(imdb_id, self)
-                for item in discover_view.children:
-                    combined_view.add_item(item)
+                combined_view.add_item(DiscoverButton(imdb_id))
 
             stremio_button = (
                 StremioButton(imdb_id, is_tv=True)
@@ -593,10 +651,10 @@ class Media(commands.Cog, name="media"):
             combined_view.add_item(stremio_button)
             combined_view.add_item(omni_button)
 
-            await message.reply(embed=embed, view=combined_view)
+            reply = await rest.reply(message, embed=embed, view=combined_view)
+            recolor(reply, poster)
             await self.config_cog.increment_link_fix_count("imdb")
-            await asyncio.sleep(0.75)
-            await message.edit(suppress=True)
+            timers.call_later(0.75, partial(rest.edit, message, suppress=True))
             return
 
     @commands.hybrid_group(
@@ -636,7 +694,7 @@ class Media(commands.Cog, name="media"):
         embed = discord.Embed(
             title=f"{title} ({year})",
             description=description,
-            color=await get_color(poster),
+            color=color_now(poster),
         )
         embed.set_thumbnail(url=poster)
         if genres and runtime:
@@ -646,26 +704,23 @@ class Media(commands.Cog, name="media"):
         elif runtime:
             embed.set_footer(text=f"Runtime: {runtime}")
 
-        trailer_view = TrailerView(trailers) if trailers else None
-        discover_view = DiscoverView(search, self)
         stremio_button = StremioButton(search)
         omni_button = OmniButton(search)
 
-        combined_view = View(timeout=604800)
+        combined_view = StaticView()
         imdb_link_button = discord.ui.Button(
             style=discord.ButtonStyle.link,
             emoji="<:imdb:1292962713542332479>",
             url=f"https://www.imdb.com/title/{search}",
         )
         combined_view.add_item(imdb_link_button)
-        if trailer_view:
-            for item in trailer_view.children:
-                combined_view.add_item(item)
-        for item in discover_view.children:
-            combined_view.add_item(item)
+        if trailers:
+            combined_view.add_item(TrailerButton(search, count=len(trailers)))
+        combined_view.add_item(DiscoverButton(search))
         combined_view.add_item(stremio_button)
         combined_view.add_item(omni_button)
-        await context.send(embed=embed, view=combined_view)
+        reply = await context.send(embed=embed, view=combined_view)
+        recolor(reply, poster)
 
     @search.command(name="tv", description="Search for a TV show.")
     @app_commands.describe(query="The TV show to search for.")
@@ -694,29 +749,33 @@ class Media(commands.Cog, name="media"):
         embed = discord.Embed(
             title=f"{title} ({year})",
             description=description,
-            color=await get_color(poster),
+            color=color_now(poster),
         )
         embed.set_thumbnail(url=poster)
         if genres:
             embed.set_footer(text=f"Genres: {', '.join(genres)}")
 
-        combined_view = View(timeout=604800)
+        combined_view = StaticView()
         imdb_link_button = discord.ui.Button(
             style=discord.ButtonStyle.link,
             emoji="<:imdb:1292962713542332479>",
             url=f"https://www.imdb.com/title/{search}",
         )
         combined_view.add_item(imdb_link_button)
-        trailer_view = TrailerView(trailers) if trailers else None
-        if trailer_view:
-            for item in trailer_view.children:
-                combined_view.add_item(item)
+        if trailers:
+            combined_view.add_item(
+                TrailerButton(search, is_tv=True, count=len(trailers))
+            )
         stremio_button = StremioButton(search, is_tv=True)
         omni_button = OmniButton(search)
         combined_view.add_item(stremio_button)
         combined_view.add_item(omni_button)
-        await context.send(embed=embed, view=combined_view)
+        reply = await context.send(embed=embed, view=combined_view)
+        recolor(reply, poster)
 
 
 async def setup(bot):
+    bot.add_dynamic_items(
+        TrailerButton, TrailerPageButton, DiscoverButton, DiscoverSelect
+    )
     await bot.add_cog(Media(bot))
@@ -14,7 +14,14 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
 
+from utils.deadline import watchdog
+from utils.fair import enrichment
 from utils.jsons import ConfigJSON, SocialsJSON, TrackingJSON
+from utils.lanes import http_gate
+from utils.load import governor
+from utils.prefilter import message_filter
+from utils.rest import rest
+from utils.snipes import snipes
 
 
 class Owner(commands.Cog, name="owner"):
@@ -340,6 +347,166 @@ class Owner(commands.Cog, name="owner"):
         except Exception as e:
             print(f"sudo command failed. Error: {e}")
 
+    @commands.command(
+        name="rest",
+        description="Show the outbound Discord API queue.",
+    )
+    @commands.is_owner()
+    async def rest_stats(self, context: Context) -> None:
+        stats = rest.stats()
+        embed = discord.Embed(title="Outbound Queue", color=0xBEBEFE)
+        embed.add_field(
+            name="Queued",
+            value=f"Interactions: {stats['interaction']:,}\nReplies: {stats['reply']:,}\nPassive: {stats['passive']:,}",
+        )
+        embed.add_field(
+            name="Sent",
+            value=f"Calls: {stats['sent']:,}\nIn flight: {stats['in_flight']}\nCoalesced edits: {stats['coalesced']:,}",
+        )
+        routes = "\n".join(
+            f"`{count:,}` {route}" for route, count in stats["rate_limited_routes"]
+        )
+        embed.add_field(
+            name=f"429s: {stats['rate_limited']:,}",
+            value=routes or "None so far.",
+            inline=False,
+        )
+        await context.send(embed=embed)
+
+    @commands.command(
+        name="loadtier",
+        description="Show the load shedding tier.",
+    )
+    @commands.is_owner()
+    async def load_stats(self, context: Context) -> None:
+        stats = governor.stats()
+        embed = discord.Embed(
+            title=f"Load: {stats['tier_name']}",
+            description=f"Loop lag: {stats['lag'] * 1000:.0f} ms\nHandlers in flight: {stats['handlers']}\nBacklog: {stats['backlog']}\nEscalations: {stats['escalations']:,}",
+            color=0xBEBEFE,
+        )
+        embed.add_field(
+            name="Time per tier",
+            value="\n".join(
+                f"{name}: {seconds / 60:,.1f} min"
+                for name, seconds in stats["tier_seconds"].items()
+            ),
+        )
+        await context.send(embed=embed)
+
+    @commands.command(
+        name="fair",
+        description="Show per-guild enrichment queues.",
+    )
+    @commands.is_owner()
+    async def fair_stats(self, context: Context) -> None:
+        stats = enrichment.stats()
+        embed = discord.Embed(
+            title="Enrichment Queues",
+            description=f"Running: {stats['running']}/{stats['concurrency']} ({stats['guild_concurrency']} per guild)\nQueued: {stats['queued']:,} across {stats['guilds']:,} guilds\nDispatched: {stats['dispatched']:,} • average wait {stats['average_wait'] * 1000:.0f} ms",
+            color=0xBEBEFE,
+        )
+        busiest = "\n".join(
+            f"`{queue['guild_id']}` {queue['queued']} queued • {queue['running']}/{queue['cap']} running • {queue['served']:,} served"
+            for queue in stats["busiest"]
+        )
+        embed.add_field(
+            name="Busiest", value=busiest or "Nothing queued.", inline=False
+        )
+        most_served = "\n".join(
+            f"`{guild_id}` {served:,}" for guild_id, served in stats["most_served"]
+        )
+        embed.add_field(
+            name="Most served", value=most_served or "Nothing yet.", inline=False
+        )
+        await context.send(embed=embed)
+
+    @commands.command(
+        name="lanes",
+        description="Show upstream request lanes.",
+    )
+    @commands.is_owner()
+    async def lane_stats(self, context: Context) -> None:
+        stats = http_gate.stats()
+        embed = discord.Embed(
+            title="Upstream Lanes",
+            description=f"In use: {stats['in_use']}/{stats['limit']}",
+            color=0xBEBEFE,
+        )
+        for name, lane in stats["lanes"].items():
+            embed.add_field(
+                name=name.title(),
+                value=f"Requests: {lane['acquired']:,}\nWaiting: {lane['waiting']}\np99 wait: {lane['p99_wait'] * 1000:.0f} ms",
+            )
+        await context.send(embed=embed)
+
+    @commands.command(
+        name="deferrals",
+        description="Show how often slow commands were deferred automatically.",
+    )
+    @commands.is_owner()
+    async def deferral_stats(self, context: Context) -> None:
+        stats = watchdog.stats()
+        lines = [
+            f"`/{name}` {fired:,} of {watched:,} ({fired / watched:.1%})"
+            for name, fired, watched in stats["commands"]
+        ]
+        embed = discord.Embed(
+            title="Deferral Watchdog",
+            description="\n".join(lines) or "Nothing deferred yet.",
+            color=0xBEBEFE,
+        )
+        embed.set_footer(
+            text=f"{stats['fired']:,} deferred out of {stats['watched']:,} commands"
+        )
+        await context.send(embed=embed)
+
+    @commands.command(
+        name="prefilter",
+        description="Show how many messages were skipped before being parsed.",
+    )
+    @commands.is_owner()
+    async def prefilter_stats(self, context: Context) -> None:
+        stats = message_filter.stats()
+        skipped = stats["skipped"] / stats["seen"] if stats["seen"] else 0
+        embed = discord.Embed(
+            title="Message Prefilter",
+            description=f"Skipped {stats['skipped']:,} of {stats['seen']:,} messages ({skipped:.1%})",
+            color=0xBEBEFE,
+        )
+        embed.set_footer(
+            text=f"{stats['snapshots']:,} snapshots kept for edits and deletes"
+        )
+        await context.send(embed=embed)
+
+    @commands.command(
+        name="snipes",
+        description="Show what the snipe store is holding.",
+    )
+    @commands.is_owner()
+    async def snipe_stats(self, context: Context) -> None:
+        stats = snipes.stats()
+        embed = discord.Embed(
+            title="Snipe Store",
+            description=f"{stats['snipes']:,} of {stats['limit']:,} snipes across {stats['channels']:,} channels",
+            color=0xBEBEFE,
+        )
+        embed.set_footer(
+            text=f"{stats['logged']:,} logged, {stats['evicted']:,} evicted before expiring"
+        )
+        await context.send(embed=embed)
+
+    @commands.command(
+        name="guildcap",
+        description="Override a guild's enrichment concurrency.",
+    )
+    @commands.is_owner()
+    async def guild_cap(self, context: Context, guild_id: int, cap: int = None) -> None:
+        enrichment.set_guild_cap(guild_id, cap)
+        await context.send(
+            f"Enrichment cap for `{guild_id}` is now {enrichment.guild_cap(guild_id)}."
+        )
+
 
 async def setup(bot) -> None:
     await bot.add_cog(Owner(bot))
@@ -1,199 +1,139 @@
 import asyncio
-import base64
-import hashlib
 import io
 import json
 import logging
-import math
 import os
 import re
 import urllib.parse
-from contextlib import suppress
+from contextlib import asynccontextmanager, suppress
+from functools import partial
 
 import aiohttp
 import discord
-import ffmpeg
 import numpy as np
-from async_whisper import AsyncWhisper
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ext.commands import Context
 from openai import AsyncOpenAI
-from PIL import Image
-from pydub import AudioSegment
-from yt_dlp import YoutubeDL
 
+from utils.blobstore import blobs
 from utils.cache import cached_decorator
-from utils.colorthief import get_color
+from utils.colorthief import color_now, recolor
+from utils.fair import enrichment
+from utils.imagegrid import build_grid, grid_shape
+from utils.jobs import PRIORITY_SPECULATIVE, summary_jobs
 from utils.jsons import SocialsJSON, TrackingJSON
+from utils.lanes import http_session
+from utils.links import canonical_id
+from utils.load import TIER_NO_EXTRAS, TIER_REWRITE_ONLY, governor
+from utils.mirrors import MirrorProber
+from utils.prefilter import message_filter
+from utils.recent import IN_FLIGHT, recent_fixes
+from utils.rest import PRIORITY_INTERACTION, rest
+from utils.sketch import heavy_hitters
+from utils.summaries import summarize
+from utils.timers import timers
+from utils.trending import trending
+from utils.views import StaticView
+from utils.ytdlp import ytdlp
+
+
+async def show_summary_progress(msg, status: str):
+    embed = discord.Embed(
+        color=discord.Color.light_gray(),
+        description=f"<a:discordloading:1199066225381228546> {status}",
+    )
+    await rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
+
+
+async def disable_button(button, interaction: discord.Interaction):
+    # The view is rebuilt from the message on every click, stop it so the
+    # edit doesn't register it for dispatch
+    button.item.disabled = True
+    button.view.stop()
+    await interaction.message.edit(view=button.view)
+
 
+def summarize_custom_id(platform: str, link: str):
+    # The path is all that's needed to rebuild the link, fall back to the
+    # bare content ID if an unusually long one won't fit in a custom_id
+    path = urllib.parse.urlparse(link).path.rstrip("/")
+    if len(path) > 80:
+        content_id = canonical_id(link).partition(":")[2]
+        path = f"/@/video/{content_id}" if platform == "tiktok" else f"/p/{content_id}"
+    return f"summarize:{platform}:{path}"
 
-class SummarizeTikTokButton(discord.ui.Button):
+
+class SummarizeTikTokButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"summarize:tiktok:(?P<path>/\S+)",
+):
     def __init__(self, link: str):
         super().__init__(
-            style=discord.ButtonStyle.secondary,
-            emoji="✨",
-            label="Summarize",
+            discord.ui.Button(
+                style=discord.ButtonStyle.secondary,
+                emoji="✨",
+                label="Summarize",
+                custom_id=summarize_custom_id("tiktok", link),
+            )
         )
         self.link = link
         self.summary = None
-        self.api_key = os.getenv("OPENAI_TOKEN")
-        self.is_generating = False
         self.logger = logging.getLogger("Keto")
 
-    async def generate_summary(self, link: str):
-        video_path = None
-        audio_path = None
-        frame_paths = []
-        try:
-            description = None
-            qv_token = os.getenv("QUICKVIDS_TOKEN")
-            if qv_token:
-                headers = {
-                    "content-type": "application/json",
-                    "user-agent": "Keto - stkc.win",
-                    "Authorization": f"Bearer {qv_token}",
-                }
-                async with aiohttp.ClientSession(headers=headers) as session:
-                    url = "https://api.quickvids.win/v2/quickvids/shorturl"
-                    data = {"input_text": link, "detailed": True}
-                    async with session.post(
-                        url, json=data, timeout=aiohttp.ClientTimeout(total=5)
-                    ) as response:
-                        if response.status == 200:
-                            text = await response.text()
-                            data = json.loads(text)
-                            description = data["details"]["post"]["description"]
-
-            ydl_opts = {
-                "format": "mp4",
-                "outtmpl": "/tmp/video_%(id)s.%(ext)s",
-                "quiet": True,
-                "no_warnings": True,
-            }
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(f"https://www.tiktok.com{match['path']}")
 
-            loop = asyncio.get_event_loop()
-            ydl = YoutubeDL(ydl_opts)
-            video_info = await loop.run_in_executor(None, ydl.extract_info, link, False)
-            video_path = ydl.prepare_filename(video_info)
-            await loop.run_in_executor(None, ydl.process_info, video_info)
+    async def fetch_description(self, link: str):
+        qv_token = os.getenv("QUICKVIDS_TOKEN")
+        if not qv_token:
+            return None
 
-            timestamps = [video_info["duration"] * i / 2 for i in range(3)]
-            frame_base64s = []
+        headers = {
+            "content-type": "application/json",
+            "user-agent": "Keto - stkc.win",
+            "Authorization": f"Bearer {qv_token}",
+        }
+        async with http_session(headers=headers) as session:
+            url = "https://api.quickvids.win/v2/quickvids/shorturl"
+            data = {"input_text": link, "detailed": True}
+            async with session.post(
+                url, json=data, timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                if response.status == 200:
+                    text = await response.text()
+                    data = json.loads(text)
+                    return data["details"]["post"]["description"]
+        return None
+
+    @asynccontextmanager
+    async def open_media(self, link: str):
+        video_path = None
+        try:
+            video_path, _ = await ytdlp.download(link)
+            yield video_path
 
-            for i, timestamp in enumerate(timestamps):
+        finally:
+            if video_path and os.path.exists(video_path):
                 try:
-                    frame_path = f"/tmp/frame_{video_info['id']}_{i}.jpg"
-                    frame_paths.append(frame_path)
-
-                    stream = ffmpeg.input(video_path, ss=timestamp)
-                    stream = ffmpeg.output(stream, frame_path, vframes=1)
-                    ffmpeg.run(
-                        stream,
-                        capture_stdout=True,
-                        capture_stderr=True,
-                        overwrite_output=True,
-                        quiet=True,
-                    )
-
-                    with Image.open(frame_path) as img:
-                        aspect_ratio = img.width / img.height
-                        new_height = 720
-                        new_width = int(aspect_ratio * new_height)
-
-                        resized_img = img.resize(
-                            (new_width, new_height), Image.Resampling.LANCZOS
-                        )
-
-                        buffer = io.BytesIO()
-                        resized_img.save(buffer, format="JPEG")
-                        buffer.seek(0)
-
-                        frame_base64s.append(
-                            base64.b64encode(buffer.getvalue()).decode("utf-8")
-                        )
-                        buffer.close()
+                    os.remove(video_path)
+                except Exception:
+                    pass
 
-                except Exception as e:
-                    continue
-
-            audio_path = f"/tmp/audio_{video_info['id']}.m4a"
-            ffmpeg_cmd = (
-                f"ffmpeg -i {video_path} -vn -acodec copy {audio_path} -loglevel panic"
-            )
-            await loop.run_in_executor(None, os.system, ffmpeg_cmd)
-
-            audio = AudioSegment.from_file(audio_path, format="m4a")
-            if len(audio) > 180000 or len(audio) < 1000:
-                return None
-
-            whisper_client = AsyncWhisper(os.getenv("OPENAI_TOKEN"))
-            try:
-                transcription = await asyncio.wait_for(
-                    whisper_client.transcribe_audio(audio), timeout=10
-                )
-            except (asyncio.TimeoutError, Exception) as e:
-                transcription = None
+    def build_prompt(self, description, transcription):
+        return f"I want you to provide a short summary of a TikTok video based off of the transcription, video description, and video frames [attached] from the beginning, middle, and end of the video. You are allowed to swear. The transcription may not be accurate (song lyrics, no spoken voices) so use all three together. If the video contains a movie or TV show, it is likely mentioned in the video's description. Do not introduce yourself, the summary, or anything else. Only respond with the video summary.\n\nTikTok video description:\n\n{description if description else 'No video description available.'}\n\nVideo transcription:\n\n{transcription if transcription else 'No transcription available.'}"
 
-            if description or transcription:
-                message = f"I want you to provide a short summary of a TikTok video based off of the transcription, video description, and video frames [attached] from the beginning, middle, and end of the video. You are allowed to swear. The transcription may not be accurate (song lyrics, no spoken voices) so use all three together. If the video contains a movie or TV show, it is likely mentioned in the video's description. Do not introduce yourself, the summary, or anything else. Only respond with the video summary.\n\nTikTok video description:\n\n{description if description else 'No video description available.'}\n\nVideo transcription:\n\n{transcription if transcription else 'No transcription available.'}"
-
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                }
-
-                payload = {
-                    "model": "gpt-4o-mini",
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [{"type": "text", "text": message}]
-                            + [
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{frame_base64}"
-                                    },
-                                }
-                                for frame_base64 in frame_base64s
-                            ],
-                        }
-                    ],
-                }
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        "https://api.openai.com/v1/chat/completions",
-                        headers=headers,
-                        json=payload,
-                    ) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            return data["choices"][0]["message"]["content"]
-
-            return None
-
-        finally:
-            for path in [video_path, audio_path] + frame_paths:
-                if path and os.path.exists(path):
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-
-    @cached_decorator(ttl=604800)
-    async def get_summary(self, link: str):
-        return await self.generate_summary(link)
+    async def generate_summary(self, link: str):
+        return await summarize(
+            "TikTok",
+            canonical_id(link),
+            partial(self.fetch_description, link),
+            partial(self.open_media, link),
+            self.build_prompt,
+        )
 
     async def callback(self, interaction: discord.Interaction):
-        if self.is_generating:
-            embed = discord.Embed(
-                color=discord.Color.light_gray(),
-                description="A summary is currently being generated. Try again soon.",
-            )
-            return await interaction.response.send_message(embed=embed, ephemeral=True)
-
         if interaction.guild:
             self.logger.info(
                 f"Executed TikTok summary in {interaction.guild.name} (ID: {interaction.guild.id}) by {interaction.user} (ID: {interaction.user.id})"
@@ -211,8 +151,19 @@ class SummarizeTikTokButton(discord.ui.Button):
         msg = await interaction.followup.send(embed=embed, ephemeral=True)
 
         try:
-            self.is_generating = True
-            response = await self.get_summary(self.link)
+            key = canonical_id(self.link)
+            trending.record_click(key)
+            job = summary_jobs.submit(
+                key,
+                "tiktok",
+                {"link": self.link},
+                on_progress=partial(show_summary_progress, msg),
+            )
+            if position := summary_jobs.position(key):
+                await show_summary_progress(
+                    msg, f"Waiting in queue (position {position + 1})..."
+                )
+            response = await job
 
             if response:
                 embed = discord.Embed(
@@ -221,225 +172,115 @@ class SummarizeTikTokButton(discord.ui.Button):
                 )
                 embed.set_author(name="Summarized TikTok Video")
                 embed.set_footer(text="Summaries may be inaccurate.")
-                await msg.edit(embed=embed)
+                await rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
             else:
                 embed = discord.Embed(
                     color=discord.Color.light_gray(),
                     description="An error occurred summarizing the video.",
                 )
-                await msg.edit(embed=embed)
-                self.disabled = True
-                await interaction.message.edit(view=self.view)
+                await rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
+                await disable_button(self, interaction)
 
         except Exception as e:
             embed = discord.Embed(
                 color=discord.Color.light_gray(),
                 description="An error occurred summarizing the video.",
             )
-            await msg.edit(embed=embed)
-            self.disabled = True
-            await interaction.message.edit(view=self.view)
+            await rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
+            await disable_button(self, interaction)
 
-        finally:
-            self.is_generating = False
 
-
-class SummarizeInstagramButton(discord.ui.Button):
+class SummarizeInstagramButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"summarize:instagram:(?P<path>/\S+)",
+):
     def __init__(self, link: str):
         super().__init__(
-            style=discord.ButtonStyle.secondary,
-            emoji="✨",
-            label="Summarize",
+            discord.ui.Button(
+                style=discord.ButtonStyle.secondary,
+                emoji="✨",
+                label="Summarize",
+                custom_id=summarize_custom_id("instagram", link),
+            )
         )
         self.link = link
         self.summary = None
-        self.api_key = os.getenv("OPENAI_TOKEN")
-        self.is_generating = False
         self.logger = logging.getLogger("Keto")
 
-    async def generate_summary(self, link: str, video_bytes=None):
-        video_path = None
-        audio_path = None
-        frame_paths = []
-        try:
-            description = None
-            auth = aiohttp.BasicAuth(
-                os.getenv("IG_API_USERNAME"), os.getenv("IG_API_PASSWORD")
-            )
-            async with aiohttp.ClientSession(
-                auth=auth, headers={"User-Agent": "Keto - stkc.win"}
-            ) as session:
-                encoded_url = urllib.parse.quote(
-                    link.replace("ddinstagram.com", "instagram.com")
-                )
-                pk_api_url = (
-                    f"https://ketoinstaapi.stkc.win/media/pk_from_url?url={encoded_url}"
-                )
-                async with session.get(pk_api_url) as response:
-                    if response.status == 200:
-                        insta_id = (await response.text()).strip('"')
-                        if insta_id:
-                            info_api_url = "https://ketoinstaapi.stkc.win/media/info"
-                            data = {
-                                "sessionid": os.getenv("INSTAGRAM_SESSION_ID"),
-                                "pk": str(insta_id),
-                                "use_cache": "true",
-                            }
-                            headers = {
-                                "Content-Type": "application/x-www-form-urlencoded",
-                                "accept": "application/json",
-                            }
-                            async with session.post(
-                                info_api_url, data=data, headers=headers
-                            ) as info_response:
-                                if info_response.status == 200:
-                                    info_dict = await info_response.json()
-                                    description = info_dict.get("caption", {}).get(
-                                        "text", None
-                                    )
-
-            if not video_bytes:
-                return None
-
-            url_hash = hashlib.md5(link.encode()).hexdigest()[:10]
-            video_path = f"/tmp/insta_video_{url_hash}.mp4"
-
-            with open(video_path, "wb") as f:
-                f.write(video_bytes.getvalue())
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(f"https://instagram.com{match['path']}")
 
-            timestamps = []
-            probe = await asyncio.create_subprocess_exec(
-                "ffmpeg",
-                "-i",
-                video_path,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            _, stderr = await probe.communicate()
-            duration_match = re.search(
-                r"Duration: (\d{2}):(\d{2}):(\d{2}\.\d{2})", stderr.decode()
+    async def fetch_description(self, link: str):
+        description = None
+        auth = aiohttp.BasicAuth(
+            os.getenv("IG_API_USERNAME"), os.getenv("IG_API_PASSWORD")
+        )
+        async with http_session(
+            auth=auth, headers={"User-Agent": "Keto - stkc.win"}
+        ) as session:
+            encoded_url = urllib.parse.quote(
+                link.replace("ddinstagram.com", "instagram.com")
             )
-            if duration_match:
-                hours, minutes, seconds = map(float, duration_match.groups())
-                duration = hours * 3600 + minutes * 60 + seconds
-                timestamps = [duration * i / 2 for i in range(3)]
-            else:
-                timestamps = [0, 1, 2]
-
-            frame_base64s = []
-            for i, timestamp in enumerate(timestamps):
-                try:
-                    frame_path = f"/tmp/frame_insta_{url_hash}_{i}.jpg"
-                    frame_paths.append(frame_path)
-
-                    stream = ffmpeg.input(video_path, ss=timestamp)
-                    stream = ffmpeg.output(stream, frame_path, vframes=1)
-                    ffmpeg.run(
-                        stream,
-                        capture_stdout=True,
-                        capture_stderr=True,
-                        overwrite_output=True,
-                        quiet=True,
-                    )
-
-                    with Image.open(frame_path) as img:
-                        aspect_ratio = img.width / img.height
-                        new_height = 720
-                        new_width = int(aspect_ratio * new_height)
-
-                        resized_img = img.resize(
-                            (new_width, new_height), Image.Resampling.LANCZOS
-                        )
-
-                        buffer = io.BytesIO()
-                        resized_img.save(buffer, format="JPEG")
-                        buffer.seek(0)
-
-                        frame_base64s.append(
-                            base64.b64encode(buffer.getvalue()).decode("utf-8")
-                        )
-                        buffer.close()
-
-                except Exception as e:
-                    continue
-
-            audio_path = f"/tmp/audio_insta_{url_hash}.m4a"
-            ffmpeg_cmd = (
-                f"ffmpeg -i {video_path} -vn -acodec copy {audio_path} -loglevel panic"
+            pk_api_url = (
+                f"https://ketoinstaapi.stkc.win/media/pk_from_url?url={encoded_url}"
             )
-            await asyncio.get_event_loop().run_in_executor(None, os.system, ffmpeg_cmd)
-
-            audio = AudioSegment.from_file(audio_path, format="m4a")
-            if len(audio) > 180000 or len(audio) < 1000:
-                return None
-
-            whisper_client = AsyncWhisper(os.getenv("OPENAI_TOKEN"))
-            try:
-                transcription = await asyncio.wait_for(
-                    whisper_client.transcribe_audio(audio), timeout=10
-                )
-            except (asyncio.TimeoutError, Exception) as e:
-                transcription = None
-
-            if description or transcription:
-                message = f"I want you to provide a short summary of an Instagram video based off of the transcription, video description, and video frames [attached] from the beginning, middle, and end of the video. You are allowed to swear. The transcription may not be accurate (song lyrics, no spoken voices) so use all three together. Do not introduce yourself, the summary, or anything else. Only respond with the video summary.\n\nVideo description:\n\n{description if description else 'No video description available.'}\n\nVideo transcription:\n\n{transcription if transcription else 'No transcription available.'}"
-
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                }
-
-                payload = {
-                    "model": "gpt-4o-mini",
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [{"type": "text", "text": message}]
-                            + [
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{frame_base64}"
-                                    },
-                                }
-                                for frame_base64 in frame_base64s
-                            ],
+            async with session.get(pk_api_url) as response:
+                if response.status == 200:
+                    insta_id = (await response.text()).strip('"')
+                    if insta_id:
+                        info_api_url = "https://ketoinstaapi.stkc.win/media/info"
+                        data = {
+                            "sessionid": os.getenv("INSTAGRAM_SESSION_ID"),
+                            "pk": str(insta_id),
+                            "use_cache": "true",
                         }
-                    ],
-                }
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        "https://api.openai.com/v1/chat/completions",
-                        headers=headers,
-                        json=payload,
-                    ) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            return data["choices"][0]["message"]["content"]
-
-            return None
+                        headers = {
+                            "Content-Type": "application/x-www-form-urlencoded",
+                            "accept": "application/json",
+                        }
+                        async with session.post(
+                            info_api_url, data=data, headers=headers
+                        ) as info_response:
+                            if info_response.status == 200:
+                                info_dict = await info_response.json()
+                                description = info_dict.get("caption", {}).get(
+                                    "text", None
+                                )
+        return description
+
+    @asynccontextmanager
+    async def open_media(self, link: str, video_url: str):
+        # fix_instagram keeps what it uploaded, only go back to the CDN on a miss
+        if cached := await blobs.aget(canonical_id(link)):
+            self.logger.debug(f"Summarizing {link} from locally stored media")
+            yield cached.data
+            return
 
-        finally:
-            for path in [video_path, audio_path] + frame_paths:
-                if path and os.path.exists(path):
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
+        if not video_url:
+            yield None
+            return
 
-    @cached_decorator(ttl=604800)
-    async def get_summary(self, link: str, video_bytes=None):
-        return await self.generate_summary(link, video_bytes)
+        async with http_session() as session:
+            async with session.get(video_url) as response:
+                if response.status != 200:
+                    yield None
+                    return
+                yield await response.read()
+
+    def build_prompt(self, description, transcription):
+        return f"I want you to provide a short summary of an Instagram video based off of the transcription, video description, and video frames [attached] from the beginning, middle, and end of the video. You are allowed to swear. The transcription may not be accurate (song lyrics, no spoken voices) so use all three together. Do not introduce yourself, the summary, or anything else. Only respond with the video summary.\n\nVideo description:\n\n{description if description else 'No video description available.'}\n\nVideo transcription:\n\n{transcription if transcription else 'No transcription available.'}"
+
+    async def generate_summary(self, link: str, video_url: str):
+        return await summarize(
+            "Instagram",
+            canonical_id(link),
+            partial(self.fetch_description, link),
+            partial(self.open_media, link, video_url),
+            self.build_prompt,
+        )
 
     async def callback(self, interaction: discord.Interaction):
-        if self.is_generating:
-            embed = discord.Embed(
-                color=discord.Color.light_gray(),
-                description="A summary is currently being generated. Try again soon.",
-            )
-            return await interaction.response.send_message(embed=embed, ephemeral=True)
-
         if interaction.guild:
             self.logger.info(
                 f"Executed Instagram summary in {interaction.guild.name} (ID: {interaction.guild.id}) by {interaction.user} (ID: {interaction.user.id})"
@@ -457,8 +298,6 @@ class SummarizeInstagramButton(discord.ui.Button):
         msg = await interaction.followup.send(embed=embed, ephemeral=True)
 
         try:
-            self.is_generating = True
-
             video_attachment = next(
                 (
                     a
@@ -469,9 +308,19 @@ class SummarizeInstagramButton(discord.ui.Button):
             )
 
             if video_attachment:
-                video_bytes = io.BytesIO()
-                await video_attachment.save(video_bytes)
-                response = await self.get_summary(self.link, video_bytes)
+                key = canonical_id(self.link)
+                trending.record_click(key)
+                job = summary_jobs.submit(
+                    key,
+                    "instagram",
+                    {"link": self.link, "video_url": video_attachment.url},
+                    on_progress=partial(show_summary_progress, msg),
+                )
+                if position := summary_jobs.position(key):
+                    await show_summary_progress(
+                        msg, f"Waiting in queue (position {position + 1})..."
+                    )
+                response = await job
             else:
                 response = None
 
@@ -482,27 +331,34 @@ class SummarizeInstagramButton(discord.ui.Button):
                 )
                 embed.set_author(name="Summarized Instagram Video")
                 embed.set_footer(text="Summaries may be inaccurate.")
-                await msg.edit(embed=embed)
+                await rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
             else:
                 embed = discord.Embed(
                     color=discord.Color.light_gray(),
                     description="An error occurred summarizing the video.",
                 )
-                await msg.edit(embed=embed)
-                self.disabled = True
-                await interaction.message.edit(view=self.view)
+                await rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
+                await disable_button(self, interaction)
 
         except Exception as e:
             embed = discord.Embed(
                 color=discord.Color.light_gray(),
                 description="An error occurred summarizing the video.",
             )
-            await msg.edit(embed=embed)
-            self.disabled = True
-            await interaction.message.edit(view=self.view)
+            await rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
+            await disable_button(self, interaction)
 
-        finally:
-            self.is_generating = False
+
+async def run_tiktok_summary(payload):
+    link = payload["link"]
+    return await SummarizeTikTokButton(link).generate_summary(link)
+
+
+async def run_instagram_summary(payload):
+    link = payload["link"]
+    return await SummarizeInstagramButton(link).generate_summary(
+        link, payload["video_url"]
+    )
 
 
 class OmniButton(discord.ui.Button):
@@ -537,6 +393,9 @@ class Socials(commands.Cog, name="socials"):
         self.reddit_pattern = re.compile(
             r"(https?://(?:www\.)?(?:old\.)?reddit\.com/r/[A-Za-z0-9_]+/(?:comments|s)/[A-Za-z0-9_]+(?:/[^/ ]+)?(?:/\w+)?)|(https?://(?:www\.)?redd\.it/[A-Za-z0-9]+)"
         )
+        self.reddit_post_pattern = re.compile(
+            r"/comments/([A-Za-z0-9]+)(?:/[^/?#]*/([A-Za-z0-9]+))?"
+        )
         self.twitter_pattern = re.compile(
             r"(https:\/\/(www.)?(twitter|x)\.com\/[a-zA-Z0-9_]+\/status\/[0-9]+)"
         )
@@ -547,7 +406,38 @@ class Socials(commands.Cog, name="socials"):
             r"https:\/\/bsky\.app\/profile\/[a-zA-Z0-9.-]+\/post\/[a-zA-Z0-9]+"
         )
 
+        message_filter.watch_content(
+            "tiktok.com",
+            "instagram.com",
+            "reddit.com",
+            "redd.it",
+            "twitter.com",
+            "x.com",
+            "youtube.com/shorts",
+            "bsky.app",
+        )
+
         self.instagram_api_working = True
+        self.reddit_fetches = 0
+        self.reddit_bytes = 0
+        self.mirrors = MirrorProber(self.config)
+        self.pinned_links = {}
+        self.promoted_links = set()
+        self.promotions = set()
+
+    async def cog_load(self):
+        self.probe_mirrors.start()
+        summary_jobs.register("tiktok", run_tiktok_summary)
+        summary_jobs.register("instagram", run_instagram_summary)
+        await summary_jobs.start()
+
+    async def cog_unload(self):
+        self.probe_mirrors.cancel()
+        await summary_jobs.stop()
+
+    @tasks.loop(minutes=5.0)
+    async def probe_mirrors(self):
+        await self.mirrors.probe_all()
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -558,25 +448,60 @@ class Socials(commands.Cog, name="socials"):
 
         message_content = message.content
         if tiktok_match := self.tiktok_pattern.search(message_content):
-            link = tiktok_match.group(0)
-            await self.fix_tiktok(message, link, guild_id=message.guild.id)
+            link, fixer = tiktok_match.group(0), self.fix_tiktok
         elif instagram_match := self.instagram_pattern.search(message_content):
-            link = instagram_match.group(0)
-            await self.fix_instagram(message, link, guild_id=message.guild.id)
+            link, fixer = instagram_match.group(0), self.fix_instagram
         elif reddit_match := self.reddit_pattern.search(message_content):
-            link = reddit_match.group(0)
-            await self.fix_reddit(message, link, guild_id=message.guild.id)
+            link, fixer = reddit_match.group(0), self.fix_reddit
         elif twitter_match := self.twitter_pattern.search(message_content):
-            link = twitter_match.group(0)
-            await self.fix_twitter(message, link, guild_id=message.guild.id)
+            link, fixer = twitter_match.group(0), self.fix_twitter
         elif bluesky_match := self.bluesky_pattern.search(message_content):
-            link = bluesky_match.group(0)
-            await self.fix_bluesky(message, link, guild_id=message.guild.id)
+            link, fixer = bluesky_match.group(0), self.fix_bluesky
         # elif youtube_shorts_match := self.youtube_shorts_pattern.search(
         #    message_content
         # ):
-        #    link = youtube_shorts_match.group(0)
-        #    await self.fix_youtube_shorts(message, link, guild_id=message.guild.id)
+        #    link, fixer = youtube_shorts_match.group(0), self.fix_youtube_shorts
+        else:
+            return
+
+        await self.fix_once(message, link, fixer)
+
+    async def fix_once(self, message: discord.Message, link: str, fixer):
+        # Reposts of a link fixed in the same channel a few minutes ago point
+        # at that fix instead of fetching and posting everything again
+        channel_id = message.channel.id
+        key = canonical_id(link)
+        if (earlier := recent_fixes.claim(channel_id, key)) is not None:
+            if earlier != IN_FLIGHT:
+                await self.reference_fix(message, earlier)
+            return
+
+        fixed = None
+        try:
+            async with governor.handling(), enrichment.slot(message.guild.id):
+                fixed = await fixer(message, link, guild_id=message.guild.id)
+        finally:
+            recent_fixes.settle(channel_id, key, fixed.id if fixed else None)
+
+    async def reference_fix(self, message: discord.Message, message_id: int):
+        if not message.channel.permissions_for(message.guild.me).send_messages:
+            return
+        earlier = message.channel.get_partial_message(message_id)
+        await rest.reply(
+            message, f"-# Already fixed here: {earlier.jump_url}", mention_author=False
+        )
+        timers.call_later(0.75, partial(rest.edit, message, suppress=True))
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        recent_fixes.forget(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(
+        self, payload: discord.RawBulkMessageDeleteEvent
+    ):
+        for message_id in payload.message_ids:
+            recent_fixes.forget(message_id)
 
     @cached_decorator(ttl=604800)
     async def quickvids(self, tiktok_url):
@@ -590,7 +515,7 @@ class Socials(commands.Cog, name="socials"):
                 "user-agent": "Keto - stkc.win",
                 "Authorization": f"Bearer {qv_token}",
             }
-            async with aiohttp.ClientSession(headers=headers) as session:
+            async with http_session(headers=headers) as session:
                 url = "https://api.quickvids.win/v2/quickvids/shorturl"
                 data = {"input_text": tiktok_url, "detailed": True}
                 async with session.post(
@@ -611,248 +536,228 @@ class Socials(commands.Cog, name="socials"):
         except (aiohttp.ClientError, asyncio.TimeoutError):
             return None, None, None, None, None, None
 
-    async def build_image_grid(self, image_urls):
-        images = []
-        try:
-            async with aiohttp.ClientSession() as session:
-
-                async def fetch_image(url):
-                    async with session.get(url) as response:
-                        if not response.status == 200:
-                            return None
-                        image_data = await response.read()
-                        return Image.open(io.BytesIO(image_data))
-
-                images = await asyncio.gather(
-                    *[fetch_image(url) for url in image_urls[:12]]
-                )
-                images = [img for img in images if img is not None]
-
-                if not images:
-                    return None
-
-                num_images = len(images)
-                ideal_sqrt = math.sqrt(num_images)
-                rows = round(ideal_sqrt)
-                cols = math.ceil(num_images / rows)
-
-                while rows * cols < num_images:
-                    rows += 1
+    def pick_rendition(self, renditions, target_width: int):
+        for width, _, url in renditions:
+            if width >= target_width:
+                return url
+        return renditions[-1][2]
 
-                cell_width = max(img.width for img in images)
-                cell_height = max(img.height for img in images)
+    async def build_image_grid(self, image_urls):
+        grid_key = "grid:" + "\n".join(image_urls[:12])
+        if cached := await blobs.aget(grid_key):
+            return io.BytesIO(cached.data), cached.meta["ext"]
 
-                resized_images = []
-                for img in images:
-                    width_ratio = cell_width / img.width
-                    height_ratio = cell_height / img.height
-                    scale = min(width_ratio, height_ratio)
+        async with http_session() as session:
 
-                    new_width = int(img.width * scale)
-                    new_height = int(img.height * scale)
+            async def fetch_image(url):
+                async with session.get(url) as response:
+                    if not response.status == 200:
+                        return None
+                    return await response.read()
 
-                    resized = img.resize(
-                        (new_width, new_height), Image.Resampling.LANCZOS
-                    )
+            images = await asyncio.gather(
+                *[fetch_image(url) for url in image_urls[:12]]
+            )
 
-                    centered = Image.new(
-                        "RGBA", (cell_width, cell_height), (0, 0, 0, 0)
-                    )
-                    x_offset = (cell_width - new_width) // 2
-                    y_offset = (cell_height - new_height) // 2
-                    centered.paste(resized, (x_offset, y_offset))
-
-                    resized_images.append(centered)
-
-                grid_width = cols * cell_width
-                grid_height = rows * cell_height
-                grid_image = Image.new("RGBA", (grid_width, grid_height), (0, 0, 0, 0))
-
-                x, y = 0, 0
-                for i, img in enumerate(resized_images):
-                    grid_image.paste(img, (x, y))
-                    x += cell_width
-                    if (i + 1) % cols == 0:
-                        y += cell_height
-                        x = 0
-
-                if grid_width > 1920:
-                    ratio = 1920 / grid_width
-                    grid_image = grid_image.resize(
-                        (1920, round(grid_height * ratio)), Image.Resampling.LANCZOS
-                    )
+        images = [image for image in images if image]
+        if not images:
+            return None, None
 
-                output_image = io.BytesIO()
-                grid_image.save(output_image, format="PNG")
-                output_image.seek(0)
-                return output_image
+        grid, ext = await build_grid(images)
+        if grid:
+            await blobs.aput(grid_key, grid.getvalue(), meta={"ext": ext})
+        return grid, ext
 
-        finally:
-            for img in images:
-                if img:
-                    img.close()
+    # Scores and comment counts go stale quickly, short links are resolved (and
+    # gallery grids stored) under their own week-long caches
+    @cached_decorator(ttl=300)
+    async def get_reddit_post(self, post_id: str, comment_id: str = None):
+        url = f"https://www.reddit.com/comments/{post_id}"
+        if comment_id:
+            url += f"/_/{comment_id}"
+        url += ".json?limit=1&depth=1&raw_json=1"
 
-    @cached_decorator(ttl=604800)
-    async def is_nsfw_reddit(self, link: str):
         try:
-            async with aiohttp.ClientSession() as session:
-                link = await self.get_url_redirect(link)
-                async with session.get(link + ".json", timeout=5) as response:
-                    if response.status == 200:
-                        json_data = await response.json()
-                        return json_data[0]["data"]["children"][0]["data"].get(
-                            "over_18", False
-                        )
-                    return False
+            async with http_session() as session:
+                async with session.get(url, timeout=5) as response:
+                    if response.status != 200:
+                        return None
+                    body = await response.read()
         except (aiohttp.ClientError, asyncio.TimeoutError):
-            return False
+            return None
 
-    async def build_reddit_embed(self, link: str):
-        if not self.config["reddit"]["build-embeds"]:
-            return None, None
+        self.reddit_fetches += 1
+        self.reddit_bytes += len(body)
+        self.bot.logger.debug(f"Fetched reddit post {post_id} ({len(body)} bytes)")
 
         try:
-            async with aiohttp.ClientSession() as session:
-                link = await self.get_url_redirect(link)
-                async with session.get(link + ".json", timeout=5) as response:
-                    if response.status != 200:
-                        return None, None
-
-                    json_data = await response.json()
-                    post = json_data[0]["data"]["children"][0]["data"]
-                    try:
-                        reply = json_data[1]["data"]["children"][0]["data"]
-                    except IndexError:
-                        reply = None
-
-                    post_id = post.get("id")
-                    post_title = post.get("title")
-                    post_author = post.get("author")
-                    subreddit = post.get("subreddit")
-                    selftext = (
-                        post.get("selftext")
-                        .replace("&gt;", ">")
-                        .replace("&lt;", "<")
-                        .replace("&amp;", "&")
-                        .replace("&#x200B;", "")
-                    )
-                    upvotes = post.get("ups")
-                    comments = post.get("num_comments")
-                    gallery = post.get("media_metadata") or None
-                    post_domain = post.get("domain") or None
-                    image = post.get("url_overridden_by_dest") or None
-                    thumbnail = post.get("thumbnail") or None
-                    images = []
-
-                    if reply:
-                        reply_body = (
-                            reply.get("body")
-                            .replace("&gt;", ">")
-                            .replace("&lt;", "<")
-                            .replace("&amp;", "&")
-                            .replace("&#x200B;", "")
-                        )
-                        reply_author = reply.get("author")
-
-                    if gallery:
-                        images = []
-                        for key in gallery:
-                            images.append(
-                                gallery[key]["s"]["u"]
-                                .replace("preview.redd.it/", "i.redd.it/")
-                                .split("?")[0]
-                            )
-                        grid = await self.build_image_grid(images)
-                    else:
-                        grid = None
-
-                    if image:
-                        image = image.lower()
-                        if "v.redd.it" in image or image.endswith((".mp4", ".webm")):
-                            return None, None
-                        if not image.endswith((".jpg", ".jpeg", ".png", ".gif")):
-                            image = None
-
-                    if thumbnail:
-                        thumbnail = thumbnail.lower()
-                        if not thumbnail.endswith((".jpg", ".jpeg", ".png", ".gif")):
-                            thumbnail = None
-
-                    color = await get_color(image) if image else 0xEC6333
-                    color = (
-                        await get_color(thumbnail) if thumbnail and not image else color
-                    )
+            json_data = json.loads(body)
+            post = json_data[0]["data"]["children"][0]["data"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            # An HTML error page, or a removed post with no children
+            return None
+        reply = None
+        if comment_id:
+            with suppress(IndexError, KeyError):
+                reply = json_data[1]["data"]["children"][0]["data"]
+
+        gallery = []
+        for item in (post.get("media_metadata") or {}).values():
+            source = item.get("s", {})
+            if not source.get("u"):
+                continue
+            renditions = [
+                (preview["x"], preview["y"], preview["u"])
+                for preview in item.get("p", [])
+                if preview.get("u")
+            ]
+            original = (
+                source["u"].replace("preview.redd.it/", "i.redd.it/").split("?")[0]
+            )
+            renditions.append((source.get("x", 0), source.get("y", 0), original))
+            gallery.append(sorted(renditions))
+
+        return {
+            "id": post.get("id"),
+            "title": post.get("title") or "",
+            "author": post.get("author"),
+            "subreddit": post.get("subreddit"),
+            "selftext": (post.get("selftext") or "").replace("\u200b", ""),
+            "ups": post.get("ups") or 0,
+            "num_comments": post.get("num_comments") or 0,
+            "over_18": post.get("over_18", False),
+            "domain": post.get("domain") or None,
+            "url": post.get("url_overridden_by_dest") or None,
+            "thumbnail": post.get("thumbnail") or None,
+            "gallery": gallery,
+            "reply": (
+                {
+                    "author": reply.get("author"),
+                    "body": (reply.get("body") or "").replace("\u200b", ""),
+                }
+                if reply
+                else None
+            ),
+        }
 
-                    post_title = (
-                        post_title[:253] + "..."
-                        if len(post_title) > 256
-                        else post_title
-                    )
-                    selftext = (
-                        selftext[:1997] + "..." if len(selftext) > 2000 else selftext
-                    )
+    async def fetch_reddit_post(self, link: str):
+        link = await self.get_url_redirect(link)
+        if match := self.reddit_post_pattern.search(link):
+            return await self.get_reddit_post(match.group(1), match.group(2))
+        return None
 
-                    embed = discord.Embed(url=f"https://redd.it/{post_id}")
-                    embed.title = (
-                        f"{post_title} ({post_domain})"
-                        if post_domain
-                        and not any(
-                            substring in post_domain
-                            for substring in (
-                                f"self.{subreddit}",
-                                "reddit.com",
-                                "redd.it",
-                            )
-                        )
-                        else post_title
+    async def build_reddit_embed(self, post: dict):
+        if not self.config["reddit"]["build-embeds"] or not post:
+            return None, None, None
+
+        try:
+            post_id = post["id"]
+            post_title = post["title"]
+            post_author = post["author"]
+            subreddit = post["subreddit"]
+            selftext = post["selftext"]
+            upvotes = post["ups"]
+            comments = post["num_comments"]
+            post_domain = post["domain"]
+            image = post["url"]
+            thumbnail = post["thumbnail"]
+            reply = post["reply"]
+
+            if post["gallery"] and governor.allows(TIER_NO_EXTRAS):
+                cols, _ = grid_shape(min(len(post["gallery"]), 12))
+                cell_width = 1920 // cols
+                grid, grid_ext = await self.build_image_grid(
+                    [
+                        self.pick_rendition(renditions, cell_width)
+                        for renditions in post["gallery"][:12]
+                    ]
+                )
+            else:
+                grid, grid_ext = None, None
+
+            if image:
+                image = image.lower()
+                if "v.redd.it" in image or image.endswith((".mp4", ".webm")):
+                    return None, None, None
+                if not image.endswith((".jpg", ".jpeg", ".png", ".gif")):
+                    image = None
+
+            if thumbnail:
+                thumbnail = thumbnail.lower()
+                if not thumbnail.endswith((".jpg", ".jpeg", ".png", ".gif")):
+                    thumbnail = None
+
+            # The post thumbnail is the same picture at 140px, far cheaper to fetch
+            color_source = thumbnail or image
+            color = color_now(color_source, 0xEC6333) if color_source else 0xEC6333
+
+            post_title = (
+                post_title[:253] + "..." if len(post_title) > 256 else post_title
+            )
+            selftext = selftext[:1997] + "..." if len(selftext) > 2000 else selftext
+
+            embed = discord.Embed(url=f"https://redd.it/{post_id}")
+            embed.title = (
+                f"{post_title} ({post_domain})"
+                if post_domain
+                and not any(
+                    substring in post_domain
+                    for substring in (
+                        f"self.{subreddit}",
+                        "reddit.com",
+                        "redd.it",
                     )
-                    embed.url = f"https://redd.it/{post_id}"
-                    embed.description = selftext
-                    embed.color = color
+                )
+                else post_title
+            )
+            embed.url = f"https://redd.it/{post_id}"
+            embed.description = selftext
+            embed.color = color
 
-                    embed.set_footer(
-                        text=f"u/{post_author} • r/{subreddit} • ⬆ {await self.format_number_str(upvotes)} • 💬 {await self.format_number_str(comments)}"
+            embed.set_footer(
+                text=f"u/{post_author} • r/{subreddit} • ⬆ {await self.format_number_str(upvotes)} • 💬 {await self.format_number_str(comments)}"
+            )
+
+            if grid:
+                image_file = discord.File(grid, filename=f"{post_id}.{grid_ext}")
+                embed.set_image(url=f"attachment://{post_id}.{grid_ext}")
+            elif image:
+                embed.set_image(url=image)
+            elif thumbnail:
+                embed.set_thumbnail(url=thumbnail)
+
+            if reply:
+                reply_body = reply["body"]
+                embed.description = None
+                embed.add_field(
+                    name=f"Reply by u/{reply['author']}",
+                    value=(
+                        ">>> " + reply_body[:1017] + "..."
+                        if len(reply_body) > 1020
+                        else ">>> " + reply_body
+                    ),
+                    inline=False,
+                )
+                if len(selftext) > 0:
+                    embed.add_field(
+                        name="Original Post",
+                        value=(
+                            ">>> " + selftext[:1017] + "..."
+                            if len(selftext) > 1020
+                            else ">>> " + selftext
+                        ),
                     )
+                else:
+                    embed.add_field(name="Original Post", value="[no text]")
 
-                    if grid:
-                        image_file = discord.File(grid, filename=f"{post_id}.jpg")
-                        embed.set_image(url=f"attachment://{post_id}.jpg")
-                    elif image:
-                        embed.set_image(url=image)
-                    elif thumbnail:
-                        embed.set_thumbnail(url=thumbnail)
-
-                    if re.search(r"/[a-z0-9]{6,7}$", link):
-                        embed.description = None
-                        embed.add_field(
-                            name=f"Reply by u/{reply_author}",
-                            value=(
-                                ">>> " + reply_body[:1017] + "..."
-                                if len(reply_body) > 1020
-                                else ">>> " + reply_body
-                            ),
-                            inline=False,
-                        )
-                        if len(selftext) > 0:
-                            embed.add_field(
-                                name="Original Post",
-                                value=(
-                                    ">>> " + selftext[:1017] + "..."
-                                    if len(selftext) > 1020
-                                    else ">>> " + selftext
-                                ),
-                            )
-                        else:
-                            embed.add_field(name="Original Post", value="[no text]")
-
-                    return embed, image_file if grid else None
+            return embed, image_file if grid else None, color_source
         except (aiohttp.ClientError, asyncio.TimeoutError):
-            return None, None
+            return None, None, None
 
     @cached_decorator(ttl=604800)
     async def is_carousel_tiktok(self, link: str):
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.get(link, timeout=5) as response:
                     if response.status == 200:
                         text = await response.text()
@@ -863,7 +768,7 @@ class Socials(commands.Cog, name="socials"):
     @cached_decorator(ttl=604800)
     async def tiktok_has_tracking(self, link: str):
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.get(
                     "https://who-shared.vercel.app/api/parse?url="
                     + urllib.parse.quote_plus(link),
@@ -881,7 +786,7 @@ class Socials(commands.Cog, name="socials"):
 
     @cached_decorator(ttl=604800)
     async def get_url_redirect(self, link: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(link, allow_redirects=False) as response:
                 if response.status != 301:
                     return link
@@ -971,6 +876,41 @@ class Socials(commands.Cog, name="socials"):
             return False
         return True
 
+    def record_hit(self, key: str, blob_key: str = None, prefetch_url: str = None):
+        heavy_hitters.add(key)
+        # Every hit on a hot link lands here, only the first one promotes it
+        if heavy_hitters.is_hot(key) and key not in self.promoted_links:
+            self.promoted_links.add(key)
+            task = asyncio.create_task(
+                self.promote_hot_link(key, blob_key, prefetch_url)
+            )
+            self.promotions.add(task)
+            task.add_done_callback(self.promotions.discard)
+
+    async def promote_hot_link(
+        self, key: str, blob_key: str = None, prefetch_url: str = None
+    ):
+        # Links that dropped out of the top can be promoted again later
+        self.promoted_links.intersection_update(heavy_hitters.top)
+        self.promoted_links.add(key)
+        for pinned_key in list(self.pinned_links):
+            if pinned_key not in heavy_hitters.top:
+                await blobs.aunpin(self.pinned_links.pop(pinned_key))
+
+        if blob_key and await blobs.atouch(blob_key, 604800):
+            if await blobs.apin(blob_key):
+                self.pinned_links[key] = blob_key
+        if prefetch_url and governor.allows(TIER_NO_EXTRAS):
+            # Warm the yt-dlp info cache so a Summarize click skips extraction
+            with suppress(Exception):
+                await ytdlp.extract_info(prefetch_url)
+
+    def track_summarizable(self, channel, kind: str, payload: dict):
+        key = canonical_id(payload["link"])
+        if trending.record_fix(key, channel.id) and summary_jobs.is_idle():
+            trending.record_precompute(key)
+            summary_jobs.submit(key, kind, payload, priority=PRIORITY_SPECULATIVE)
+
     async def fix_tiktok(
         self,
         message: discord.Message,
@@ -992,6 +932,10 @@ class Socials(commands.Cog, name="socials"):
             return
 
         original_url = redirected_url
+        self.record_hit(
+            canonical_id(original_url),
+            prefetch_url=None if "/photo/" in original_url else original_url,
+        )
 
         tracking = False
         tracking_warning = ""
@@ -1009,7 +953,7 @@ class Socials(commands.Cog, name="socials"):
             None,
             None,
         )
-        if not spoiler:
+        if not spoiler and governor.allows(TIER_NO_EXTRAS):
             (
                 quickvids_url,
                 likes,
@@ -1023,11 +967,11 @@ class Socials(commands.Cog, name="socials"):
         else:
             redirected_url = redirected_url.replace("www.", "")
             redirected_url = redirected_url.replace(
-                "tiktok.com", self.config["tiktok"]["url"]
+                "tiktok.com", self.mirrors.pick("tiktok")
             )
 
         org_msg = redirected_url if not spoiler else f"||{redirected_url}||"
-        view = discord.ui.View(timeout=604800)
+        view = StaticView()
         if likes is not None:
             view.add_item(
                 discord.ui.Button(
@@ -1054,7 +998,10 @@ class Socials(commands.Cog, name="socials"):
                 )
             )
             if not "/photo/" in original_url:
-                view.add_item(SummarizeTikTokButton(link))
+                view.add_item(SummarizeTikTokButton(original_url))
+                self.track_summarizable(
+                    message.channel, "tiktok", {"link": original_url}
+                )
             view.add_item(
                 discord.ui.Button(
                     label="@" + author,
@@ -1083,22 +1030,33 @@ class Socials(commands.Cog, name="socials"):
         else:
             msg = org_msg + tracking_warning
             if message.channel.permissions_for(message.guild.me).send_messages:
-                fixed = await message.reply(
+                fixed = await rest.reply(
+                    message,
                     msg,
                     mention_author=False,
                     view=view,
                 )
                 await self.config_cog.increment_link_fix_count("tiktok")
+                timers.call_later(0.75, partial(rest.edit, message, suppress=True))
                 if tracking:
-                    await asyncio.sleep(0.75)
-                    with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                        await message.edit(suppress=True)
-                    await asyncio.sleep(20)
-                    await fixed.edit(content=org_msg)
-                else:
-                    await asyncio.sleep(0.75)
-                    with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                        await message.edit(suppress=True)
+                    timers.call_later(20.75, partial(rest.edit, fixed, content=org_msg))
+                return fixed
+
+    async def fetch_instagram_media(self, session, media_key: str, media_url: str):
+        if cached := await blobs.aget(media_key):
+            return cached.data
+
+        async with session.get(media_url) as media_response:
+            if media_response.status != 200:
+                return None
+            content_length = int(media_response.headers.get("Content-Length", 0))
+            if content_length > 8 * 1024 * 1024:
+                raise ValueError("Instagram media too large")
+            media_data = await media_response.read()
+
+        # Kept for as long as the Summarize button on the fix stays usable
+        await blobs.aput(media_key, media_data, ttl=604800)
+        return media_data
 
     async def fix_instagram(
         self,
@@ -1115,6 +1073,8 @@ class Socials(commands.Cog, name="socials"):
         spoiler = spoiler or (
             f"||{link}" in message.content and message.content.count("||") >= 2
         )
+        media_key = canonical_id(link)
+        self.record_hit(media_key, blob_key=media_key)
         tracking = False
         tracking_warning = ""
 
@@ -1128,20 +1088,21 @@ class Socials(commands.Cog, name="socials"):
                 tracking_warning = "\n-# The link in your original message includes a tracking ID that may expose your Instagram account. [Learn more.](<https://keto.boats/stop-tracking>)"
 
         link = link.replace("www.", "")
-        link = link.replace("instagram.com", self.config["instagram"]["url"])
+        instagram_mirror = self.mirrors.pick("instagram")
+        link = link.replace("instagram.com", instagram_mirror)
 
         session_id = self.session_id
 
-        if self.instagram_api_working:
+        if self.instagram_api_working and governor.allows(TIER_NO_EXTRAS):
             try:
                 auth = aiohttp.BasicAuth(
                     os.getenv("IG_API_USERNAME"), os.getenv("IG_API_PASSWORD")
                 )
-                async with aiohttp.ClientSession(
+                async with http_session(
                     auth=auth, headers={"User-Agent": "Keto - stkc.win"}
                 ) as session:
                     encoded_url = urllib.parse.quote(
-                        link.replace(self.config["instagram"]["url"], "instagram.com")
+                        link.replace(instagram_mirror, "instagram.com")
                     )
                     pk_api_url = f"https://ketoinstaapi.stkc.win/media/pk_from_url?url={encoded_url}"
                     async with session.get(pk_api_url) as response:
@@ -1181,8 +1142,16 @@ class Socials(commands.Cog, name="socials"):
                                             .get("candidates", [{}])[0]
                                             .get("url")
                                         )
+                                        shortcode = info_dict.get("code")
+                                        canonical_link = (
+                                            f"https://instagram.com/reel/{shortcode}"
+                                            if shortcode
+                                            else link.replace(
+                                                instagram_mirror, "instagram.com"
+                                            )
+                                        )
 
-                                        view = discord.ui.View(timeout=604800)
+                                        view = StaticView()
                                         if likes is not None:
                                             view.add_item(
                                                 discord.ui.Button(
@@ -1217,7 +1186,9 @@ class Socials(commands.Cog, name="socials"):
                                                 )
                                             if not "/p/" in link:
                                                 view.add_item(
-                                                    SummarizeInstagramButton(link)
+                                                    SummarizeInstagramButton(
+                                                        canonical_link
+                                                    )
                                                 )
                                             if username != "Unknown":
                                                 view.add_item(
@@ -1236,86 +1207,77 @@ class Socials(commands.Cog, name="socials"):
                                             media_url = (
                                                 video_url if video_url else photo_url
                                             )
-                                            async with session.get(
-                                                media_url
-                                            ) as media_response:
-                                                if media_response.status == 200:
-                                                    content_length = int(
-                                                        media_response.headers.get(
-                                                            "Content-Length", 0
-                                                        )
+                                            media_data = (
+                                                await self.fetch_instagram_media(
+                                                    session,
+                                                    canonical_id(canonical_link),
+                                                    media_url,
+                                                )
+                                            )
+                                            if media_data:
+                                                if video_url and not "/p/" in link:
+                                                    self.track_summarizable(
+                                                        message.channel,
+                                                        "instagram",
+                                                        {
+                                                            "link": canonical_link,
+                                                            "video_url": None,
+                                                        },
                                                     )
-                                                    if content_length > 8 * 1024 * 1024:
-                                                        raise ValueError(
-                                                            "Instagram media too large"
-                                                        )
+                                                media_bytes = io.BytesIO(media_data)
 
-                                                    media_bytes = io.BytesIO(
-                                                        await media_response.read()
-                                                    )
-                                                    media_bytes.seek(0)
+                                                filename = (
+                                                    "instagram_video.mp4"
+                                                    if video_url
+                                                    else "instagram_photo.jpg"
+                                                )
+                                                media_file = discord.File(
+                                                    media_bytes, filename=filename
+                                                )
 
-                                                    filename = (
-                                                        "instagram_video.mp4"
-                                                        if video_url
-                                                        else "instagram_photo.jpg"
-                                                    )
-                                                    media_file = discord.File(
-                                                        media_bytes, filename=filename
-                                                    )
+                                                org_msg = ""
+                                                warn_msg = org_msg + tracking_warning
 
-                                                    org_msg = ""
-                                                    warn_msg = (
-                                                        org_msg + tracking_warning
+                                                if context:
+                                                    await context.send(
+                                                        file=media_file, view=view
                                                     )
-
-                                                    if context:
-                                                        await context.send(
-                                                            file=media_file, view=view
+                                                else:
+                                                    if message.channel.permissions_for(
+                                                        message.guild.me
+                                                    ).send_messages:
+                                                        fixed = await rest.reply(
+                                                            message,
+                                                            (
+                                                                warn_msg
+                                                                if tracking
+                                                                else org_msg
+                                                            ),
+                                                            mention_author=False,
+                                                            view=view,
+                                                            file=media_file,
                                                         )
-                                                    else:
-                                                        if message.channel.permissions_for(
-                                                            message.guild.me
-                                                        ).send_messages:
-                                                            fixed = await message.reply(
-                                                                (
-                                                                    warn_msg
-                                                                    if tracking
-                                                                    else org_msg
-                                                                ),
-                                                                mention_author=False,
-                                                                view=view,
-                                                                file=media_file,
-                                                            )
-                                                            if tracking:
-                                                                await asyncio.sleep(
-                                                                    0.75
-                                                                )
-                                                                with suppress(
-                                                                    discord.errors.Forbidden,
-                                                                    discord.errors.NotFound,
-                                                                ):
-                                                                    await message.edit(
-                                                                        suppress=True
-                                                                    )
-                                                                await asyncio.sleep(20)
-                                                                await fixed.edit(
+                                                        timers.call_later(
+                                                            0.75,
+                                                            partial(
+                                                                rest.edit,
+                                                                message,
+                                                                suppress=True,
+                                                            ),
+                                                        )
+                                                        if tracking:
+                                                            timers.call_later(
+                                                                20.75,
+                                                                partial(
+                                                                    rest.edit,
+                                                                    fixed,
                                                                     content=None,
                                                                     view=view,
-                                                                )
-                                                            else:
-                                                                await asyncio.sleep(
-                                                                    0.75
-                                                                )
-                                                                with suppress(
-                                                                    discord.errors.Forbidden,
-                                                                    discord.errors.NotFound,
-                                                                ):
-                                                                    await message.edit(
-                                                                        suppress=True
-                                                                    )
-
-                                                    return
+                                                                ),
+                                                            )
+                                                        return fixed
+
+                                                return
 
             except Exception as e:
                 print(f"Instagram API Error: {e}")
@@ -1333,20 +1295,14 @@ class Socials(commands.Cog, name="socials"):
             await self.config_cog.increment_link_fix_count("instagram")
         else:
             if message.channel.permissions_for(message.guild.me).send_messages:
-                fixed = await message.reply(
-                    warn_msg if tracking else org_msg, mention_author=False
+                fixed = await rest.reply(
+                    message, warn_msg if tracking else org_msg, mention_author=False
                 )
                 await self.config_cog.increment_link_fix_count("instagram")
+                timers.call_later(0.75, partial(rest.edit, message, suppress=True))
                 if tracking:
-                    await asyncio.sleep(0.75)
-                    with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                        await message.edit(suppress=True)
-                    await asyncio.sleep(20)
-                    await fixed.edit(content=org_msg)
-                else:
-                    await asyncio.sleep(0.75)
-                    with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                        await message.edit(suppress=True)
+                    timers.call_later(20.75, partial(rest.edit, fixed, content=org_msg))
+                return fixed
 
     async def fix_reddit(
         self,
@@ -1364,7 +1320,15 @@ class Socials(commands.Cog, name="socials"):
             f"||{link}" in message.content and message.content.count("||") >= 2
         )
 
-        is_nsfw = await self.is_nsfw_reddit(link)
+        post = (
+            await self.fetch_reddit_post(link)
+            if governor.allows(TIER_REWRITE_ONLY)
+            else None
+        )
+        # Without the post (rewrite-only tier or a failed fetch) there's no
+        # rich embed, only the mirror link, which does its own NSFW handling
+        is_nsfw = post["over_18"] if post else False
+        self.record_hit(f"reddit:{post['id']}" if post else canonical_id(link))
 
         if message.guild:
             if is_nsfw:
@@ -1379,58 +1343,68 @@ class Socials(commands.Cog, name="socials"):
                         )
                         return
                     else:
-                        await message.reply(
+                        await rest.reply(
+                            message,
                             embed=embed,
                             mention_author=False,
                             delete_after=30,
                         )
                         return
 
-        embed, file = await self.build_reddit_embed(link)
+        embed, file, color_source = await self.build_reddit_embed(post)
 
         if embed is None:
             link = link.replace("www.", "")
             link = link.replace("old.reddit.com", "reddit.com")
-            link = link.replace("reddit.com", self.config["reddit"]["url"])
-            
+            link = link.replace("reddit.com", self.mirrors.pick("reddit"))
+
             # Create view with OmniButton for reddit links (no embed)
-            view = discord.ui.View(timeout=604800)
+            view = StaticView()
             view.add_item(OmniButton())
-            
+
             if context:
                 await context.send(
-                    link if not spoiler else f"||{link}||", mention_author=False, view=view
+                    link if not spoiler else f"||{link}||",
+                    mention_author=False,
+                    view=view,
                 )
                 await self.config_cog.increment_link_fix_count("reddit")
             else:
                 if message.channel.permissions_for(message.guild.me).send_messages:
-                    await message.reply(
-                        link if not spoiler else f"||{link}||", mention_author=False, view=view
+                    fixed = await rest.reply(
+                        message,
+                        link if not spoiler else f"||{link}||",
+                        mention_author=False,
+                        view=view,
                     )
                     await self.config_cog.increment_link_fix_count("reddit")
-                    await asyncio.sleep(0.75)
-                    with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                        await message.edit(suppress=True)
+                    timers.call_later(0.75, partial(rest.edit, message, suppress=True))
+                    return fixed
             return
 
         if is_nsfw and embed:
             footer = embed.footer.text
             embed.set_footer(text=f"NSFW • {footer}")
-        
+
         # Create view with OmniButton for reddit embeds
-        view = discord.ui.View(timeout=604800)
+        view = StaticView()
         view.add_item(OmniButton())
 
         if context:
-            await context.send(embed=embed, file=file, mention_author=False, view=view)
+            reply = await context.send(
+                embed=embed, file=file, mention_author=False, view=view
+            )
+            recolor(reply, color_source)
             await self.config_cog.increment_link_fix_count("reddit")
         else:
             if message.channel.permissions_for(message.guild.me).send_messages:
-                await message.reply(embed=embed, file=file, mention_author=False, view=view)
+                reply = await rest.reply(
+                    message, embed=embed, file=file, mention_author=False, view=view
+                )
+                recolor(reply, color_source)
                 await self.config_cog.increment_link_fix_count("reddit")
-                await asyncio.sleep(0.75)
-                with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                    await message.edit(suppress=True)
+                timers.call_later(0.75, partial(rest.edit, message, suppress=True))
+                return reply
 
     async def fix_twitter(
         self,
@@ -1447,13 +1421,14 @@ class Socials(commands.Cog, name="socials"):
         spoiler = spoiler or (
             f"||{link}" in message.content and message.content.count("||") >= 2
         )
+        self.record_hit(canonical_id(link))
 
         link = link.replace("www.", "")
         link = link.replace("x.com", "twitter.com")
-        link = link.replace("twitter.com", self.config["twitter"]["url"])
-        
+        link = link.replace("twitter.com", self.mirrors.pick("twitter"))
+
         # Create view with OmniButton for twitter
-        view = discord.ui.View(timeout=604800)
+        view = StaticView()
         view.add_item(OmniButton())
 
         if context:
@@ -1463,13 +1438,15 @@ class Socials(commands.Cog, name="socials"):
             await self.config_cog.increment_link_fix_count("twitter")
         else:
             if message.channel.permissions_for(message.guild.me).send_messages:
-                await message.reply(
-                    link if not spoiler else f"||{link}||", mention_author=False, view=view
+                fixed = await rest.reply(
+                    message,
+                    link if not spoiler else f"||{link}||",
+                    mention_author=False,
+                    view=view,
                 )
                 await self.config_cog.increment_link_fix_count("twitter")
-                await asyncio.sleep(0.75)
-                with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                    await message.edit(suppress=True)
+                timers.call_later(0.75, partial(rest.edit, message, suppress=True))
+                return fixed
 
     async def fix_youtube_shorts(
         self,
@@ -1486,12 +1463,13 @@ class Socials(commands.Cog, name="socials"):
         spoiler = spoiler or (
             f"||{link}" in message.content and message.content.count("||") >= 2
         )
+        self.record_hit(canonical_id(link))
 
         link = link.replace("www.", "")
         link = link.replace("youtube.com/shorts/", self.config["youtubeshorts"]["url"])
-        
+
         # Create view with OmniButton for YouTube shorts
-        view = discord.ui.View(timeout=604800)
+        view = StaticView()
         view.add_item(OmniButton())
 
         if context:
@@ -1500,12 +1478,14 @@ class Socials(commands.Cog, name="socials"):
             )
         else:
             if message.channel.permissions_for(message.guild.me).send_messages:
-                await message.reply(
-                    link if not spoiler else f"||{link}||", mention_author=False, view=view
+                fixed = await rest.reply(
+                    message,
+                    link if not spoiler else f"||{link}||",
+                    mention_author=False,
+                    view=view,
                 )
-                await asyncio.sleep(0.75)
-                with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                    await message.edit(suppress=True)
+                timers.call_later(0.75, partial(rest.edit, message, suppress=True))
+                return fixed
 
     async def fix_bluesky(
         self,
@@ -1522,12 +1502,13 @@ class Socials(commands.Cog, name="socials"):
         spoiler = spoiler or (
             f"||{link}" in message.content and message.content.count("||") >= 2
         )
+        self.record_hit(canonical_id(link))
 
         link = link.replace("www.", "")
-        link = link.replace("bsky.app", self.config["bluesky"]["url"])
-        
+        link = link.replace("bsky.app", self.mirrors.pick("bluesky"))
+
         # Create view with OmniButton for Bluesky
-        view = discord.ui.View(timeout=604800)
+        view = StaticView()
         view.add_item(OmniButton())
 
         if context:
@@ -1537,13 +1518,82 @@ class Socials(commands.Cog, name="socials"):
             await self.config_cog.increment_link_fix_count("bluesky")
         else:
             if message.channel.permissions_for(message.guild.me).send_messages:
-                await message.reply(
-                    link if not spoiler else f"||{link}||", mention_author=False, view=view
+                fixed = await rest.reply(
+                    message,
+                    link if not spoiler else f"||{link}||",
+                    mention_author=False,
+                    view=view,
                 )
                 await self.config_cog.increment_link_fix_count("bluesky")
-                await asyncio.sleep(0.75)
-                with suppress(discord.errors.Forbidden, discord.errors.NotFound):
-                    await message.edit(suppress=True)
+                timers.call_later(0.75, partial(rest.edit, message, suppress=True))
+                return fixed
+
+    @commands.command(name="mirrors")
+    @commands.is_owner()
+    async def mirror_health(self, ctx):
+        """Show mirror health for fixed links (owner only)"""
+        embed = discord.Embed(title="Mirror Health", color=0xBEBEFE)
+        for platform, options in self.config.items():
+            if "url" not in options:
+                continue
+            selected = self.mirrors.pick(platform)
+            lines = []
+            for mirror in self.mirrors.mirrors(platform):
+                health = self.mirrors.get_health(platform, mirror)
+                status = "🟢" if health.healthy else "🔴"
+                latency = (
+                    f"{int(health.latency * 1000)} ms"
+                    if health.latency is not None
+                    else "unprobed"
+                )
+                error = f" • {health.last_error}" if health.last_error else ""
+                marker = " ⭐" if mirror == selected else ""
+                lines.append(
+                    f"{status} `{mirror}`{marker} {latency} • {health.successes}/{health.successes + health.failures} ok{error}"
+                )
+            embed.add_field(name=platform.title(), value="\n".join(lines), inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(name="hotlinks")
+    @commands.is_owner()
+    async def hot_links(self, ctx):
+        """Show the most fixed links right now (owner only)"""
+        lines = [
+            f"`{count:6.1f}` {'📌 ' if key in self.pinned_links else ''}{key}"
+            for key, count in heavy_hitters.most_common(15)
+        ]
+        embed = discord.Embed(
+            title="Hot Links",
+            description="\n".join(lines) or "Nothing tracked yet.",
+            color=0xBEBEFE,
+        )
+        recent = recent_fixes.stats()
+        reddit_average = self.reddit_bytes / max(1, self.reddit_fetches) / 1024
+        embed.set_footer(
+            text=f"{heavy_hitters.total:,} hits tracked • {blobs.pinned_bytes / 1024 ** 2:.1f} MB pinned • {recent['referenced']:,} reposts referenced, {recent['skipped']:,} skipped • {reddit_average:.1f} KB per Reddit fetch"
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="precompute")
+    @commands.is_owner()
+    async def precompute_stats(self, ctx):
+        """Show speculative summary precompute stats (owner only)"""
+        stats = trending.stats()
+        jobs = summary_jobs.stats()
+        embed = discord.Embed(title="Summary Precompute", color=0xBEBEFE)
+        embed.add_field(
+            name="Trending",
+            value=f"Tracked: {stats['tracked']:,}\nTrending: {stats['trending']:,}\nAwaiting click: {stats['pending']:,}",
+        )
+        embed.add_field(
+            name="Precomputed",
+            value=f"Total: {stats['precomputes']:,}\nHits: {stats['hits']:,} ({stats['hit_ratio']:.0%} of first clicks)\nWasted: {stats['wasted']:,} ({stats['wasted_ratio']:.0%})",
+        )
+        embed.add_field(
+            name="Queue",
+            value=f"Queued: {jobs['queued']}\nRunning: {jobs['running']}/{jobs['max_jobs']}\nBudget left: {stats['budget_left']}/h",
+        )
+        await ctx.send(embed=embed)
 
     @commands.command(name="setsessionid")
     @commands.is_owner()
@@ -1567,4 +1617,5 @@ class Socials(commands.Cog, name="socials"):
 
 
 async def setup(bot):
+    bot.add_dynamic_items(SummarizeTikTokButton, SummarizeInstagramButton)
     await bot.add_cog(Socials(bot))
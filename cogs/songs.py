@@ -5,14 +5,21 @@ import re
 from contextlib import suppress
 from urllib.parse import quote_plus
 
-import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from utils.cache import cached_decorator
-from utils.colorthief import get_color
+from utils.colorthief import color_now, recolor
+from utils.deadline import watchdog
+from utils.fair import enrichment
 from utils.jsons import SocialsJSON
+from utils.lanes import http_session
+from utils.load import TIER_REWRITE_ONLY, governor
+from utils.prefilter import message_filter
+from utils.rest import PRIORITY_INTERACTION, PRIORITY_REPLY, rest
+from utils.sketch import heavy_hitters
+from utils.views import StaticView
 
 platforms = {
     "spotify": {"name": "Spotify", "emote": "<:Music_Spotify:958786315883794532>"},
@@ -23,19 +30,47 @@ platforms = {
     "youtube": {"name": "YouTube", "emote": "<:Music_YouTube:958786388457840700>"},
 }
 
+# song.link names platforms differently from the provider prefix of its unique IDs
+provider_platforms = {
+    "SPOTIFY": "spotify",
+    "ITUNES": "itunes",
+    "YOUTUBE": "youtube",
+    "GOOGLE": "google",
+    "AMAZON": "amazonMusic",
+    "DEEZER": "deezer",
+    "TIDAL": "tidal",
+    "SOUNDCLOUD": "soundcloud",
+    "PANDORA": "pandora",
+    "NAPSTER": "napster",
+    "YANDEX": "yandex",
+    "SPINRILLA": "spinrilla",
+    "AUDIUS": "audius",
+    "AUDIOMACK": "audiomack",
+    "ANGHAMI": "anghami",
+    "BOOMPLAY": "boomplay",
+}
+
 
-class SuggestedSongsButton(discord.ui.Button):
-    def __init__(self, cog, artist, title, color):
+class SuggestedSongsButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"suggest:(?P<unique_id>[A-Z_]+::[\w-]+)",
+):
+    def __init__(self, unique_id: str):
         super().__init__(
-            style=discord.ButtonStyle.secondary,
-            emoji="🔥",
+            discord.ui.Button(
+                style=discord.ButtonStyle.secondary,
+                emoji="🔥",
+                custom_id=f"suggest:{unique_id}",
+            )
         )
-        self.cog = cog
-        self.artist = artist
-        self.title = title
-        self.color = color
+        self.unique_id = unique_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["unique_id"])
 
     async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("songs")
         await interaction.response.defer(ephemeral=True)
         embed = discord.Embed(
             color=discord.Color.light_gray(),
@@ -43,23 +78,29 @@ class SuggestedSongsButton(discord.ui.Button):
         )
         msg = await interaction.followup.send(embed=embed, ephemeral=True)
 
-        suggested_songs = await self.cog.fetch_suggested_songs(self.artist, self.title)
+        song = await cog.get_song_entity(self.unique_id) or {}
+        color = color_now(song.get("thumbnailUrl"), discord.Color.light_gray())
+        suggested_songs = None
+        if song.get("artistName") and song.get("title"):
+            suggested_songs = await cog.fetch_suggested_songs(
+                song["artistName"], song["title"]
+            )
 
         if suggested_songs:
-            suggested_songs_str = await self.cog.format_suggested_songs(
-                suggested_songs, msg
-            )
+            suggested_songs_str = await cog.format_suggested_songs(suggested_songs, msg)
             embed = discord.Embed(
                 title="Suggested Songs",
                 description=suggested_songs_str,
-                color=self.color,
+                color=color,
             )
-            await msg.edit(embed=embed)
+            await rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
         else:
-            await msg.edit(
+            await rest.edit(
+                msg,
+                priority=PRIORITY_INTERACTION,
                 embed=discord.Embed(
-                    description="No suggested songs found.", color=self.color
-                )
+                    description="No suggested songs found.", color=color
+                ),
             )
 
 
@@ -76,6 +117,14 @@ class Songs(commands.Cog, name="songs"):
             r"(?:www\.|m\.)?youtube\.com\/watch\?v=[A-Za-z0-9_-]{11}|"
             r"music\.youtube\.com\/watch\?v=[A-Za-z0-9_-]{11})"
         )
+        message_filter.watch_content(
+            "open.spotify.com",
+            "spotify.link",
+            "music.apple.com",
+            "youtu.be",
+            "youtube.com/watch",
+        )
+        message_filter.watch_authors(356268235697553409)
         self.suppress_embed_pattern = re.compile(
             r"https:\/\/(open\.spotify\.com\/track\/[A-Za-z0-9]+|"
             r"(http://|https://)?(?:geo\.)?music\.apple\.com\/[a-zA-Z]{2}\/(?:album|song)\/[^\/]+\/\d+(?:\?[^\s]*)?|"
@@ -94,7 +143,7 @@ class Songs(commands.Cog, name="songs"):
 
     @cached_decorator(ttl=604800)
     async def fetch_suggested_songs(self, artist: str, track: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://ws.audioscrobbler.com/2.0/?method=track.getsimilar&artist={quote_plus(artist)}&track={quote_plus(track)}&api_key={os.getenv('LASTFM_TOKEN')}&format=json"
             ) as resp:
@@ -110,7 +159,8 @@ class Songs(commands.Cog, name="songs"):
                 color=discord.Color.light_gray(),
                 description=f"<a:discordloading:1199066225381228546> Generating links for {track['artist']['name']} - {track['name']}...",
             )
-            await msg.edit(embed=embed)
+            # Progress only, a newer track's edit replaces it if it hasn't gone out
+            rest.edit(msg, priority=PRIORITY_INTERACTION, embed=embed)
 
             spotify_url = await self.lastfm_to_spotify(track["url"])
             if spotify_url:
@@ -141,6 +191,9 @@ class Songs(commands.Cog, name="songs"):
             return
         if not await self.check_enabled("songs", self.config, message.guild.id):
             return
+        # Song links are never broken, the lookup is all extra work
+        if not governor.allows(TIER_REWRITE_ONLY):
+            return
         if message.author.bot and message.author.id == 356268235697553409:
             if message.embeds:
                 lastfm_pattern = re.compile(
@@ -154,18 +207,22 @@ class Songs(commands.Cog, name="songs"):
                         lastfm_link = lastfm_link[:-1]
                     spotify_link = await self.lastfm_to_spotify(lastfm_link)
                     if spotify_link:
-                        await self.generate_view(message, spotify_link)
+                        async with governor.handling(), enrichment.slot(
+                            message.guild.id
+                        ):
+                            await self.generate_view(message, spotify_link)
                         await self.config_cog.increment_link_fix_count("songs")
                         return
         if match := self.pattern.search(message.content.strip("<>")):
             link = match.group(0)
-            await self.generate_view(message, link)
+            async with governor.handling(), enrichment.slot(message.guild.id):
+                await self.generate_view(message, link)
             await self.config_cog.increment_link_fix_count("songs")
             return
 
     @cached_decorator(ttl=604800)
     async def lastfm_to_spotify(self, link: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(link) as resp:
                 if resp.status != 200:
                     return None
@@ -180,9 +237,31 @@ class Songs(commands.Cog, name="songs"):
                 else:
                     return None
 
+    @cached_decorator(ttl=604800)
+    async def get_song_entity(self, unique_id: str):
+        # Unique IDs look like SPOTIFY_SONG::<id>, song.link can look them up directly
+        provider, _, entity_id = unique_id.partition("::")
+        platform = provider_platforms.get(provider.split("_")[0])
+        if platform is None:
+            return None
+        async with http_session() as session:
+            async with session.get(
+                "https://api.song.link/v1-alpha.1/links",
+                params={
+                    "platform": platform,
+                    "type": "song",
+                    "id": entity_id,
+                },
+            ) as resp:
+                if resp.status != 200:
+                    return None
+                res = await resp.json()
+
+        return res.get("entitiesByUniqueId", {}).get(unique_id)
+
     @cached_decorator(ttl=604800)
     async def get_song_links(self, url: str):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://api.song.link/v1-alpha.1/links?url={url}"
             ) as resp:
@@ -198,6 +277,7 @@ class Songs(commands.Cog, name="songs"):
         return links
 
     async def generate_view(self, message: discord.Message, link: str):
+        heavy_hitters.add(f"song:{link}")
         loading_msg = True
         if re.search(
             r"(?:www\.|m\.)?youtube\.com/watch\?v=[A-Za-z0-9_-]{11}|youtu\.be/[A-Za-z0-9_-]{11}",
@@ -206,10 +286,12 @@ class Songs(commands.Cog, name="songs"):
             loading_msg = False
         if loading_msg:
             loading_embed = discord.Embed(
-                color=await get_color(message.author.avatar.url),
+                color=color_now(message.author.avatar.url),
                 description="<a:discordloading:1199066225381228546> Fetching song info...",
             )
-            loading_msg = await message.reply(embed=loading_embed, mention_author=False)
+            loading_msg = await rest.reply(
+                message, embed=loading_embed, mention_author=False
+            )
 
         links = await self.get_song_links(link)
         if not links:
@@ -217,7 +299,7 @@ class Songs(commands.Cog, name="songs"):
                 await loading_msg.delete()
             return None
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://api.song.link/v1-alpha.1/links?url={link}"
             ) as resp:
@@ -242,13 +324,13 @@ class Songs(commands.Cog, name="songs"):
                 await loading_msg.delete()
             return
 
-        color = await get_color(thumbnail)
-        view = discord.ui.View(timeout=604800)
+        color = color_now(thumbnail)
+        view = StaticView()
         original_platform = None
         has_spotify_or_apple = False
         has_youtube = False
 
-        view.add_item(SuggestedSongsButton(self, artist, title, color))
+        view.add_item(SuggestedSongsButton(unique_id))
 
         for platform, body in platforms.items():
             if platform in links:
@@ -288,14 +370,19 @@ class Songs(commands.Cog, name="songs"):
                     and original_embed_suppressed
                 ):
                     if loading_msg:
-                        await loading_msg.edit(embed=embed, view=view)
+                        reply = await rest.edit(
+                            loading_msg, priority=PRIORITY_REPLY, embed=embed, view=view
+                        )
                     else:
-                        await message.reply(embed=embed, view=view)
+                        reply = await rest.reply(message, embed=embed, view=view)
+                    recolor(reply, thumbnail)
                 else:
                     if loading_msg:
-                        await loading_msg.edit(embed=None, view=view)
+                        await rest.edit(
+                            loading_msg, priority=PRIORITY_REPLY, embed=None, view=view
+                        )
                     else:
-                        await message.reply(embed=None, view=view)
+                        await rest.reply(message, embed=None, view=view)
         else:
             if loading_msg:
                 await loading_msg.delete()
@@ -305,12 +392,18 @@ class Songs(commands.Cog, name="songs"):
                 with suppress(discord.errors.Forbidden, discord.errors.NotFound):
                     await message.edit(suppress=True)
 
-    @app_commands.command(name="song", description="Generate a fixed embed for a song.")
+    @app_commands.command(
+        name="song",
+        description="Generate a fixed embed for a song.",
+        extras={"auto_defer": True},
+    )
     @app_commands.describe(url="The URL of the song.")
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     async def song_command(self, interaction: discord.Interaction, url: str):
-        await interaction.response.defer()
+        async with watchdog.responding(interaction):
+            if not interaction.response.is_done():
+                await interaction.response.defer()
 
         if not self.pattern.match(url):
             await interaction.followup.send(
@@ -326,7 +419,7 @@ class Songs(commands.Cog, name="songs"):
             )
             return
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                 f"https://api.song.link/v1-alpha.1/links?url={url}"
             ) as resp:
@@ -354,12 +447,12 @@ class Songs(commands.Cog, name="songs"):
             )
             return
 
-        color = await get_color(self.thumbnail)
+        color = color_now(self.thumbnail)
         embed = discord.Embed(color=color)
         embed.set_author(name=f"{artist} - {title}", icon_url=self.thumbnail)
 
-        view = discord.ui.View(timeout=604800)
-        view.add_item(SuggestedSongsButton(self, artist, title, color))
+        view = StaticView()
+        view.add_item(SuggestedSongsButton(unique_id))
 
         for platform, body in platforms.items():
             if platform in links:
@@ -376,8 +469,10 @@ class Songs(commands.Cog, name="songs"):
                     )
                 )
 
-        await interaction.followup.send(embed=embed, view=view)
+        reply = await interaction.followup.send(embed=embed, view=view, wait=True)
+        recolor(reply, self.thumbnail)
 
 
 async def setup(bot):
+    bot.add_dynamic_items(SuggestedSongsButton)
     await bot.add_cog(Songs(bot))
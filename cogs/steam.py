@@ -1,91 +1,115 @@
-import asyncio
 import json
 import os
 import re
-from contextlib import suppress
+from functools import partial
 from urllib.parse import quote_plus
 
-import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
-from discord.ui import Button, Select, View
+from discord.ui import Button, Select
 
 from utils.cache import cached_decorator
-from utils.colorthief import get_color
+from utils.fair import enrichment
 from utils.jsons import SocialsJSON
-
-
-class ScreenshotsPaginator(View):
-    def __init__(self, screenshots):
-        super().__init__(timeout=604800)
-        self.screenshots = screenshots
-        self.current_page = 0
-        self.update_buttons()
-
-    def update_buttons(self):
-        self.clear_items()
-        if len(self.screenshots) > 1:
-            self.add_item(
-                Button(
-                    style=discord.ButtonStyle.secondary,
-                    label="Previous",
-                    custom_id="prev",
-                )
-            )
-            self.add_item(
-                Button(
-                    style=discord.ButtonStyle.secondary, label="Next", custom_id="next"
-                )
+from utils.lanes import http_session
+from utils.load import governor
+from utils.prefilter import message_filter
+from utils.rest import rest
+from utils.timers import timers
+from utils.views import StaticView
+
+
+async def fetch_screenshots(interaction: discord.Interaction, appid: str):
+    game_info = await interaction.client.get_cog("Steam").steaminfo(appid)
+    if not game_info:
+        return []
+    *_, screenshots, _, _, _ = game_info
+    return [screenshot["path_full"] for screenshot in screenshots or []]
+
+
+def screenshot_page(screenshots, page: int):
+    content = screenshots[page]
+    if len(screenshots) > 1:
+        content = f"({page + 1}/{len(screenshots)}) [Screenshot]({content})"
+    return content
+
+
+def screenshots_paginator(appid: str, page: int, count: int):
+    view = StaticView()
+    if count > 1:
+        view.add_item(ScreenshotsPageButton(appid, page, "prev"))
+        view.add_item(ScreenshotsPageButton(appid, page, "next"))
+    return view
+
+
+class ScreenshotsPageButton(
+    discord.ui.DynamicItem[Button],
+    template=r"screenshots:(?P<appid>\d+):(?P<page>\d+):(?P<direction>prev|next)",
+):
+    def __init__(self, appid: str, page: int, direction: str):
+        super().__init__(
+            Button(
+                style=discord.ButtonStyle.secondary,
+                label="Previous" if direction == "prev" else "Next",
+                custom_id=f"screenshots:{appid}:{page}:{direction}",
             )
+        )
+        self.appid = appid
+        self.page = page
+        self.direction = direction
 
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.data["custom_id"] == "prev":
-            self.current_page = (self.current_page - 1) % len(self.screenshots)
-        elif interaction.data["custom_id"] == "next":
-            self.current_page = (self.current_page + 1) % len(self.screenshots)
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["appid"], int(match["page"]), match["direction"])
 
-        content = self.screenshots[self.current_page]
-        if len(self.screenshots) > 1:
-            content = f"({self.current_page + 1}/{len(self.screenshots)}) [Screenshot]({content})"
+    async def callback(self, interaction: discord.Interaction):
+        screenshots = await fetch_screenshots(interaction, self.appid)
+        if not screenshots:
+            await interaction.response.edit_message(
+                content="No screenshots found.", view=None
+            )
+            return
 
+        step = -1 if self.direction == "prev" else 1
+        page = (self.page + step) % len(screenshots)
         await interaction.response.edit_message(
-            content=content,
-            view=self,
+            content=screenshot_page(screenshots, page),
+            view=screenshots_paginator(self.appid, page, len(screenshots)),
         )
-        return True
 
 
-class Screenshots(View):
-    def __init__(self, screenshots):
-        super().__init__(timeout=604800)
-        self.screenshots = (
-            [screenshot["path_full"] for screenshot in screenshots]
-            if screenshots
-            else []
-        )
-        if self.screenshots:
-            self.add_screenshots_button()
-
-    def add_screenshots_button(self):
-        label = "Screenshot" if len(self.screenshots) == 1 else "Screenshots"
-        button = Button(
-            style=discord.ButtonStyle.secondary,
-            label=label,
-            emoji="🖼️",
+class ScreenshotsButton(
+    discord.ui.DynamicItem[Button],
+    template=r"screenshots:(?P<appid>\d+)",
+):
+    def __init__(self, appid: str, count: int = 1):
+        super().__init__(
+            Button(
+                style=discord.ButtonStyle.secondary,
+                label="Screenshot" if count == 1 else "Screenshots",
+                emoji="🖼️",
+                custom_id=f"screenshots:{appid}",
+            )
         )
-        button.callback = self.button_callback
-        self.add_item(button)
-
-    async def button_callback(self, interaction: discord.Interaction):
-        paginator = ScreenshotsPaginator(self.screenshots)
-        content = self.screenshots[0]
-        if len(self.screenshots) > 1:
-            content = f"(1/{len(self.screenshots)}) [Screenshot]({content})"
+        self.appid = appid
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["appid"])
+
+    async def callback(self, interaction: discord.Interaction):
+        screenshots = await fetch_screenshots(interaction, self.appid)
+        if not screenshots:
+            await interaction.response.send_message(
+                "No screenshots found.", ephemeral=True
+            )
+            return
+
         await interaction.response.send_message(
-            content,
-            view=paginator,
+            screenshot_page(screenshots, 0),
+            view=screenshots_paginator(self.appid, 0, len(screenshots)),
             ephemeral=True,
         )
 
@@ -97,12 +121,13 @@ class Steam(commands.Cog, name="Steam"):
         self.config_cog = self.bot.get_cog("Config")
         self.steam_pattern = re.compile(r"store\.steampowered\.com\/app\/(\d+)")
         self.steam_community_pattern = re.compile(r"steamcommunity\.com\/app\/(\d+)")
+        message_filter.watch_content("store.steampowered.com", "steamcommunity.com")
 
     @cached_decorator(ttl=604800)
     async def steamlist(self):
         url = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(url) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -141,7 +166,7 @@ class Steam(commands.Cog, name="Steam"):
     async def steaminfo(self, appid: int):
         url = f"http://store.steampowered.com/api/appdetails?appids={appid}&cc=US&l=english"
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(url) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -227,7 +252,8 @@ class Steam(commands.Cog, name="Steam"):
         if appid := self.steam_pattern.search(
             message.content.strip("<>")
         ) or self.steam_community_pattern.search(message.content.strip("<>")):
-            game_info = await self.steaminfo(appid.group(1))
+            async with governor.handling(), enrichment.slot(message.guild.id):
+                game_info = await self.steaminfo(appid.group(1))
             if game_info:
                 (
                     name,
@@ -273,7 +299,9 @@ class Steam(commands.Cog, name="Steam"):
                         text=f"Tags: {', '.join([category['description'] for category in categories if 'description' in category])}"
                     )
 
-                view = Screenshots(screenshots) if screenshots else None
+                view = StaticView()
+                if screenshots:
+                    view.add_item(ScreenshotsButton(appid.group(1), len(screenshots)))
                 if external_account:
                     view.add_item(
                         Button(
@@ -284,14 +312,13 @@ class Steam(commands.Cog, name="Steam"):
                         )
                     )
                 if not nsfw or (nsfw and message.channel.is_nsfw()):
-                    await message.reply(embed=embed, view=view)
+                    await rest.reply(message, embed=embed, view=view)
                 else:
-                    await message.reply(embed=embed)
+                    await rest.reply(message, embed=embed)
                 await self.config_cog.increment_link_fix_count("steam")
-                await asyncio.sleep(0.75)
-                await message.edit(suppress=True)
+                timers.call_later(0.75, partial(rest.edit, message, suppress=True))
 
-    async def create_game_embed(self, game_info, channel_is_nsfw):
+    async def create_game_embed(self, appid, game_info, channel_is_nsfw):
         (
             name,
             type,
@@ -337,12 +364,11 @@ class Steam(commands.Cog, name="Steam"):
                 text=f"Tags: {', '.join([category['description'] for category in categories if 'description' in category])}"
             )
 
-        view = discord.ui.View()
+        view = StaticView()
 
         if not nsfw or (nsfw and channel_is_nsfw):
-            screenshots_view = Screenshots(screenshots) if screenshots else None
-            if screenshots_view:
-                view.add_item(screenshots_view.children[0])
+            if screenshots:
+                view.add_item(ScreenshotsButton(appid, len(screenshots)))
 
         if external_account:
             view.add_item(
@@ -360,14 +386,12 @@ class Steam(commands.Cog, name="Steam"):
         game_info = await self.steaminfo(appid)
         if game_info:
             embed, game_view, nsfw = await self.create_game_embed(
-                game_info, interaction.channel.is_nsfw()
+                appid, game_info, interaction.channel.is_nsfw()
             )
 
-            search_view = SteamSearchView(self.last_search_options, self)
-
-            combined_view = discord.ui.View(timeout=180.0)
+            combined_view = StaticView()
 
-            combined_view.add_item(search_view.children[0])
+            combined_view.add_item(SteamSearchSelect(self.last_search_options))
 
             for item in game_view.children:
                 combined_view.add_item(item)
@@ -431,17 +455,15 @@ class Steam(commands.Cog, name="Steam"):
 
         self.last_search_options = options
 
-        search_view = SteamSearchView(options, self)
-
         first_game_info = await self.steaminfo(int(options[0].value))
         if first_game_info:
             embed, game_view, nsfw = await self.create_game_embed(
-                first_game_info, context.channel.is_nsfw()
+                options[0].value, first_game_info, context.channel.is_nsfw()
             )
 
-            combined_view = discord.ui.View(timeout=604800)
+            combined_view = StaticView()
 
-            combined_view.add_item(search_view.children[0])
+            combined_view.add_item(SteamSearchSelect(options))
 
             for item in game_view.children:
                 combined_view.add_item(item)
@@ -451,16 +473,30 @@ class Steam(commands.Cog, name="Steam"):
             await context.send("Failed to fetch game information.")
 
 
-class SteamSearchSelect(discord.ui.Select):
-    def __init__(self, options, steam_cog):
-        super().__init__(placeholder="Select a game", options=options, row=0)
-        self.steam_cog = steam_cog
+class SteamSearchSelect(
+    discord.ui.DynamicItem[Select],
+    template=r"steam_search",
+):
+    def __init__(self, options):
+        super().__init__(
+            Select(
+                placeholder="Select a game",
+                options=options,
+                row=0,
+                custom_id="steam_search",
+            )
+        )
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(item.options)
 
     async def callback(self, interaction: discord.Interaction):
+        steam_cog = interaction.client.get_cog("Steam")
         await interaction.response.defer(ephemeral=True)
-        appid = int(self.values[0])
+        appid = int(self.item.values[0])
         game_name = next(
-            option.label for option in self.options if option.value == str(appid)
+            option.label for option in self.item.options if option.value == str(appid)
         )
 
         loading_embed = discord.Embed(
@@ -472,10 +508,10 @@ class SteamSearchSelect(discord.ui.Select):
             embed=loading_embed, ephemeral=True
         )
 
-        game_info = await self.steam_cog.steaminfo(appid)
+        game_info = await steam_cog.steaminfo(appid)
         if game_info:
-            embed, game_view, nsfw = await self.steam_cog.create_game_embed(
-                game_info, interaction.channel.is_nsfw()
+            embed, game_view, nsfw = await steam_cog.create_game_embed(
+                str(appid), game_info, interaction.channel.is_nsfw()
             )
             await loading_message.edit(embed=embed, view=game_view)
         else:
@@ -486,11 +522,6 @@ class SteamSearchSelect(discord.ui.Select):
             await loading_message.edit(embed=error_embed, view=None)
 
 
-class SteamSearchView(discord.ui.View):
-    def __init__(self, options, steam_cog):
-        super().__init__()
-        self.add_item(SteamSearchSelect(options, steam_cog))
-
-
 async def setup(bot):
+    bot.add_dynamic_items(ScreenshotsButton, ScreenshotsPageButton, SteamSearchSelect)
     await bot.add_cog(Steam(bot))
@@ -1,8 +1,9 @@
 import os
 
-import aiohttp
 from discord.ext import commands, tasks
 
+from utils.lanes import LANE_BACKGROUND, http_session
+
 
 class Topgg(commands.Cog, name="topgg"):
     def __init__(self, bot):
@@ -24,7 +25,7 @@ class Topgg(commands.Cog, name="topgg"):
             if data["server_count"] == 0:
                 return
 
-            async with aiohttp.ClientSession() as session:
+            async with http_session(lane=LANE_BACKGROUND) as session:
                 async with session.post(url, json=data) as response:
                     data = await response.json()
                     return data
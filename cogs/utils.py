@@ -1,10 +1,8 @@
-import asyncio
 import io
 import os
 import platform
 
 import aiocache
-import aiohttp
 import discord
 import psutil
 import redis.asyncio as aioredis
@@ -12,14 +10,16 @@ from discord import app_commands
 from discord.ext import commands, tasks
 from discord.ext.commands import Context
 
-from utils.colorthief import get_color
+from utils.colorthief import color_now, recolor
+from utils.lanes import http_session
+from utils.snipes import Snipe, snipes
+from utils.views import StaticView
 
 
 class Utilities(commands.Cog, name="utilities"):
     def __init__(self, bot):
         self.bot = bot
         self.bot.allowed_mentions = discord.AllowedMentions.none()
-        self.last_logged_messages = {}
 
     async def format_number_str(self, num):
         if num >= 1000:
@@ -43,13 +43,7 @@ class Utilities(commands.Cog, name="utilities"):
             and message.embeds[0].author.name.endswith("deleted a message")
         ):
             return
-        if message.channel.id not in self.last_logged_messages:
-            self.last_logged_messages[message.channel.id] = []
-        self.last_logged_messages[message.channel.id].append(
-            ("delete", message, None, message.embeds if message.embeds else None)
-        )
-
-        asyncio.create_task(self.remove_logged_message(message.channel.id, message))
+        snipes.log(message.channel.id, Snipe("delete", message))
 
     @commands.Cog.listener()
     async def on_message_edit(self, before, after):
@@ -57,24 +51,7 @@ class Utilities(commands.Cog, name="utilities"):
             return
         if before.content == after.content:
             return
-        if before.channel.id not in self.last_logged_messages:
-            self.last_logged_messages[before.channel.id] = []
-        self.last_logged_messages[before.channel.id].append(
-            ("edit", before, after, None)
-        )
-
-        asyncio.create_task(self.remove_logged_message(before.channel.id, before))
-
-    async def remove_logged_message(self, channel_id, message):
-        await asyncio.sleep(120)
-        if channel_id in self.last_logged_messages:
-            self.last_logged_messages[channel_id] = [
-                m
-                for m in self.last_logged_messages[channel_id]
-                if m[1].id != message.id
-            ]
-            if not self.last_logged_messages[channel_id]:
-                del self.last_logged_messages[channel_id]
+        snipes.log(before.channel.id, Snipe("edit", before, after))
 
     @commands.hybrid_command(
         name="steal",
@@ -98,7 +75,7 @@ class Utilities(commands.Cog, name="utilities"):
                 "You must provide a name for the emoji.", ephemeral=True
             )
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(emoji if not get_emoji.id else url) as resp:
                 image = io.BytesIO(await resp.read())
                 e = await context.guild.create_custom_emoji(
@@ -122,17 +99,17 @@ class Utilities(commands.Cog, name="utilities"):
 
         url = f"https://cdn.discordapp.com/emojis/{get_emoji.id}.{('gif' if get_emoji.animated else 'png')}"
         embed = discord.Embed(
-            color=await get_color(url),
+            color=color_now(url),
         )
         embed.set_image(url=url)
-        await context.send(embed=embed)
+        recolor(await context.send(embed=embed), url)
 
     @commands.hybrid_command(
         name="info",
         description="View information about the bot.",
     )
     async def info(self, context: Context) -> None:
-        embed = discord.Embed(color=await get_color(self.bot.user.avatar.url))
+        embed = discord.Embed(color=color_now(self.bot.user.avatar.url))
 
         embed.add_field(name="Ping", value=f"{int(self.bot.latency * 1000)} ms")
         embed.add_field(
@@ -175,7 +152,7 @@ class Utilities(commands.Cog, name="utilities"):
                 inline=False,
             )
 
-        view = discord.ui.View()
+        view = StaticView()
         view.add_item(
             discord.ui.Button(
                 label="Website",
@@ -198,53 +175,51 @@ class Utilities(commands.Cog, name="utilities"):
             )
         )
 
-        await context.send(embed=embed, view=view)
+        reply = await context.send(embed=embed, view=view)
+        recolor(reply, self.bot.user.avatar.url)
 
-    async def snipe_edit(
-        self, before: discord.Message, after: discord.Message
-    ) -> discord.Embed:
+    async def snipe_edit(self, snipe: Snipe) -> discord.Embed:
         embed = discord.Embed(
-            color=await get_color(before.author.avatar.url),
+            color=color_now(snipe.avatar_url),
         )
 
         embed.set_author(
-            name=before.author.display_name + " edited a message",
-            icon_url=before.author.avatar.url,
+            name=snipe.author_name + " edited a message",
+            icon_url=snipe.avatar_url,
         )
-        embed.add_field(name="Before", value=before.content, inline=False)
-        embed.add_field(name="After", value=after.content, inline=False)
-        embed.timestamp = before.created_at
+        embed.add_field(name="Before", value=snipe.content, inline=False)
+        embed.add_field(name="After", value=snipe.after, inline=False)
+        embed.timestamp = snipe.created_at
 
         return embed
 
-    async def snipe_delete(
-        self, message: discord.Message, stored_embeds=None
-    ) -> discord.Embed:
+    async def snipe_delete(self, snipe: Snipe) -> discord.Embed:
         embed = discord.Embed(
-            description=message.content,
-            color=await get_color(message.author.avatar.url),
+            description=snipe.content,
+            color=color_now(snipe.avatar_url),
         )
 
         embed.set_author(
-            name=message.author.display_name + " deleted a message",
-            icon_url=message.author.avatar.url,
+            name=snipe.author_name + " deleted a message",
+            icon_url=snipe.avatar_url,
         )
-        embed.timestamp = message.created_at
+        embed.timestamp = snipe.created_at
 
-        if message.attachments:
+        if snipe.attachments:
             embed.description += "\n\n-# These attachments will be removed by Discord soon, download them quickly."
             attachment_list = []
-            for i, attachment in enumerate(message.attachments, 1):
-                attachment_list.append(f"[{attachment.filename}]({attachment.url})")
+            for i, (filename, url) in enumerate(snipe.attachments, 1):
+                attachment_list.append(f"[{filename}]({url})")
                 if i == 1:
-                    embed.set_image(url=attachment.url)
+                    embed.set_image(url=url)
 
             embed.add_field(
-                name="Attachments" if len(message.attachments) > 1 else "Attachment",
+                name="Attachments" if len(snipe.attachments) > 1 else "Attachment",
                 value="\n".join(attachment_list),
                 inline=False,
             )
 
+        stored_embeds = [discord.Embed.from_dict(data) for data in snipe.embeds or ()]
         return embed, stored_embeds
 
     @commands.hybrid_command(
@@ -254,8 +229,8 @@ class Utilities(commands.Cog, name="utilities"):
     @commands.has_permissions(manage_messages=True)
     @app_commands.guild_only()
     async def snipe(self, context: Context) -> None:
-        messages = self.last_logged_messages.get(context.channel.id, [])
-        if not messages:
+        snipe = snipes.pop(context.channel.id)
+        if snipe is None:
             embed = discord.Embed(
                 description="There are no recently edited or deleted messages in this channel.",
                 color=discord.Color.red(),
@@ -263,34 +238,20 @@ class Utilities(commands.Cog, name="utilities"):
             await context.send(embed=embed, ephemeral=True)
             return
 
-        last_message = messages[-1]
-        type, original, after, stored_embeds = last_message
-        embed = None
         additional_embeds = None
 
         try:
-            if type == "edit":
-                embed = await self.snipe_edit(original, after)
-            elif type == "delete":
-                embed, additional_embeds = await self.snipe_delete(
-                    message=original, stored_embeds=stored_embeds
-                )
-
-            if embed is None:
-                embed = discord.Embed(
-                    description="There are no recently edited or deleted messages in this channel.",
-                    color=discord.Color.red(),
-                )
-                await context.send(embed=embed, ephemeral=True)
-                return
-
-            messages.pop()
+            if snipe.kind == "edit":
+                embed = await self.snipe_edit(snipe)
+            else:
+                embed, additional_embeds = await self.snipe_delete(snipe)
 
             if additional_embeds:
-                all_embeds = [embed] + (additional_embeds if additional_embeds else [])
-                await context.send(embeds=all_embeds)
+                all_embeds = [embed] + additional_embeds
+                reply = await context.send(embeds=all_embeds)
             else:
-                await context.send(embed=embed)
+                reply = await context.send(embed=embed)
+            recolor(reply, snipe.avatar_url)
 
         except:
             embed = discord.Embed(
@@ -306,8 +267,8 @@ class Utilities(commands.Cog, name="utilities"):
     @commands.has_permissions(manage_messages=True)
     @app_commands.guild_only()
     async def snipe_group_edit(self, context: Context) -> None:
-        messages = self.last_logged_messages.get(context.channel.id, [])
-        if not messages:
+        snipe = snipes.pop(context.channel.id, "edit")
+        if snipe is None:
             embed = discord.Embed(
                 description="There are no recently edited messages in this channel.",
                 color=discord.Color.red(),
@@ -315,10 +276,10 @@ class Utilities(commands.Cog, name="utilities"):
             await context.send(embed=embed, ephemeral=True)
             return
 
-        _, original, after = messages.pop()
-        embed = await self.snipe_edit(original, after)
+        embed = await self.snipe_edit(snipe)
 
-        await context.send(embed=embed)
+        reply = await context.send(embed=embed)
+        recolor(reply, snipe.avatar_url)
 
     @commands.hybrid_command(
         name="deleted",
@@ -327,8 +288,8 @@ class Utilities(commands.Cog, name="utilities"):
     @commands.has_permissions(manage_messages=True)
     @app_commands.guild_only()
     async def snipe_group_delete(self, context: Context) -> None:
-        messages = self.last_logged_messages.get(context.channel.id, [])
-        if not messages:
+        snipe = snipes.pop(context.channel.id, "delete")
+        if snipe is None:
             embed = discord.Embed(
                 description="There are no recently deleted messages in this channel.",
                 color=discord.Color.red(),
@@ -336,14 +297,14 @@ class Utilities(commands.Cog, name="utilities"):
             await context.send(embed=embed, ephemeral=True)
             return
 
-        type, message, _, stored_embeds = messages.pop()
-        embed, additional_embeds = await self.snipe_delete(message, stored_embeds)
+        embed, additional_embeds = await self.snipe_delete(snipe)
 
         if additional_embeds:
-            all_embeds = [embed] + (additional_embeds if additional_embeds else [])
-            await context.send(embeds=all_embeds)
+            all_embeds = [embed] + additional_embeds
+            reply = await context.send(embeds=all_embeds)
         else:
-            await context.send(embed=embed)
+            reply = await context.send(embed=embed)
+        recolor(reply, snipe.avatar_url)
 
 
 async def setup(bot):
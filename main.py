@@ -19,6 +19,9 @@ from discord.ext.commands import Context
 from dotenv import load_dotenv
 
 from utils.context_commands import add_context_commands
+from utils.deadline import KetoContext, use_deferral_watchdog
+from utils.lanes import use_interaction_lanes
+from utils.prefilter import use_message_filter
 
 if not os.path.isfile(
     f"{os.path.realpath(os.path.dirname(__file__))}/config/config.json"
@@ -91,6 +94,9 @@ class DiscordBot(commands.AutoShardedBot):
         self.logger = logger
         self.config = config
 
+    async def get_context(self, origin, /, *, cls=KetoContext):
+        return await super().get_context(origin, cls=cls)
+
     async def load_cogs(self) -> None:
         # Get command line arguments
         parser = argparse.ArgumentParser()
@@ -153,6 +159,9 @@ class DiscordBot(commands.AutoShardedBot):
         self.logger.info("-------------------")
         await self.load_cogs()
         add_context_commands(self)
+        use_interaction_lanes(self)
+        use_deferral_watchdog(self)
+        use_message_filter(self)
         self.status_task.start()
 
     async def on_message(self, message: discord.Message) -> None:
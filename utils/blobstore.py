@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import suppress
+
+Blob = namedtuple("Blob", ["data", "meta"])
+
+
+class BlobStore:
+    def __init__(
+        self, path: str, max_bytes: int, max_age: int, max_pinned_bytes: int
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_pinned_bytes = max_pinned_bytes
+        self.objects_path = os.path.join(path, "objects")
+        self.refs_path = os.path.join(path, "refs")
+        self.lock = threading.Lock()
+        self.objects = {}
+        self.total_bytes = 0
+        # Which refs point at which object, so evicting an object takes its
+        # refs with it instead of leaving them for the next startup scan
+        self.refs = {}
+        self.referrers = {}
+        self.pinned = {}
+        self.pinned_bytes = 0
+        self.loaded = False
+
+    def load(self):
+        os.makedirs(self.objects_path, exist_ok=True)
+        os.makedirs(self.refs_path, exist_ok=True)
+        for entry in os.scandir(self.objects_path):
+            if entry.name.startswith("."):
+                with suppress(OSError):
+                    os.remove(entry.path)
+                continue
+            stat = entry.stat()
+            self.objects[entry.name] = (stat.st_size, stat.st_mtime)
+            self.total_bytes += stat.st_size
+
+        now = time.time()
+        for entry in os.scandir(self.refs_path):
+            try:
+                with open(entry.path, "rb") as f:
+                    ref = json.loads(f.read())
+                if ref["expires"] < now or ref["digest"] not in self.objects:
+                    os.remove(entry.path)
+                else:
+                    self.link(entry.name, ref["digest"])
+            except (OSError, ValueError, KeyError):
+                with suppress(OSError):
+                    os.remove(entry.path)
+        self.loaded = True
+
+    def object_path(self, digest: str):
+        return os.path.join(self.objects_path, digest)
+
+    def ref_name(self, key: str):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def ref_path(self, key: str):
+        return os.path.join(self.refs_path, self.ref_name(key))
+
+    def link(self, name: str, digest: str):
+        self.unlink(name)
+        self.refs[name] = digest
+        self.referrers.setdefault(digest, set()).add(name)
+
+    def unlink(self, name: str):
+        digest = self.refs.pop(name, None)
+        if digest is not None and (names := self.referrers.get(digest)):
+            names.discard(name)
+            if not names:
+                del self.referrers[digest]
+
+    def write_atomic(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    def put(self, key: str, data: bytes, ttl: int = None, meta: dict = None):
+        with self.lock:
+            if not self.loaded:
+                self.load()
+
+            digest = hashlib.sha256(data).hexdigest()
+            now = time.time()
+            if digest not in self.objects:
+                self.write_atomic(self.object_path(digest), data)
+                self.objects[digest] = (len(data), now)
+                self.total_bytes += len(data)
+
+            ref = {
+                "digest": digest,
+                "expires": now + (ttl or self.max_age),
+                "meta": meta or {},
+            }
+            self.write_atomic(self.ref_path(key), json.dumps(ref).encode())
+            self.link(self.ref_name(key), digest)
+            self.evict(now)
+            return digest
+
+    def get(self, key: str):
+        if pinned := self.pinned.get(key):
+            blob, expires = pinned
+            if expires >= time.time():
+                return blob
+            self.unpin(key)
+
+        with self.lock:
+            found = self.read(key)
+        return found[0] if found else None
+
+    def read(self, key: str):
+        # Called with the lock held, returns the blob and when its ref expires
+        if not self.loaded:
+            self.load()
+
+        ref_path = self.ref_path(key)
+        try:
+            with open(ref_path, "rb") as f:
+                ref = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+        digest = ref["digest"]
+        if ref["expires"] < time.time() or digest not in self.objects:
+            with suppress(OSError):
+                os.remove(ref_path)
+            self.unlink(self.ref_name(key))
+            return None
+
+        path = self.object_path(digest)
+        try:
+            with open(path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = mm[:]
+            os.utime(path)
+        except (OSError, ValueError):
+            self.drop(digest)
+            return None
+
+        self.objects[digest] = (len(data), time.time())
+        return Blob(data, ref.get("meta", {})), ref["expires"]
+
+    def touch(self, key: str, ttl: int):
+        with self.lock:
+            if not self.loaded:
+                self.load()
+
+            ref_path = self.ref_path(key)
+            try:
+                with open(ref_path, "rb") as f:
+                    ref = json.loads(f.read())
+            except (OSError, ValueError):
+                return False
+            ref["expires"] = max(ref["expires"], time.time() + ttl)
+            self.write_atomic(ref_path, json.dumps(ref).encode())
+            if pinned := self.pinned.get(key):
+                self.pinned[key] = (pinned[0], ref["expires"])
+            return True
+
+    def pin(self, key: str):
+        # Hot blobs are kept in memory so reads skip the filesystem entirely,
+        # until their ref would have expired
+        with self.lock:
+            if key in self.pinned:
+                return True
+            found = self.read(key)
+            if not found:
+                return False
+            blob, expires = found
+            if self.pinned_bytes + len(blob.data) > self.max_pinned_bytes:
+                return False
+            self.pinned[key] = (blob, expires)
+            self.pinned_bytes += len(blob.data)
+            return True
+
+    def unpin(self, key: str):
+        with self.lock:
+            if pinned := self.pinned.pop(key, None):
+                self.pinned_bytes -= len(pinned[0].data)
+
+    def drop(self, digest: str):
+        size, _ = self.objects.pop(digest, (0, 0))
+        self.total_bytes -= size
+        with suppress(OSError):
+            os.remove(self.object_path(digest))
+        for name in self.referrers.pop(digest, ()):
+            self.refs.pop(name, None)
+            with suppress(OSError):
+                os.remove(os.path.join(self.refs_path, name))
+
+    def evict(self, now: float):
+        for digest, (_, last_used) in list(self.objects.items()):
+            if now - last_used > self.max_age:
+                self.drop(digest)
+
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        for digest, _ in sorted(self.objects.items(), key=lambda item: item[1][1]):
+            self.drop(digest)
+            if self.total_bytes <= self.max_bytes:
+                break
+
+    async def aget(self, key: str):
+        return await asyncio.to_thread(self.get, key)
+
+    async def apin(self, key: str):
+        return await asyncio.to_thread(self.pin, key)
+
+    async def aunpin(self, key: str):
+        return await asyncio.to_thread(self.unpin, key)
+
+    async def atouch(self, key: str, ttl: int):
+        return await asyncio.to_thread(self.touch, key, ttl)
+
+    async def aput(self, key: str, data: bytes, ttl: int = None, meta: dict = None):
+        return await asyncio.to_thread(self.put, key, data, ttl, meta)
+
+
+blobs = BlobStore(
+    path=os.getenv("BLOB_CACHE_PATH", "cache/blobs"),
+    max_bytes=int(os.getenv("BLOB_CACHE_MB", 1024)) * 1024 * 1024,
+    max_age=604800,
+    max_pinned_bytes=int(os.getenv("BLOB_PIN_MB", 64)) * 1024 * 1024,
+)
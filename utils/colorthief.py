@@ -1,29 +1,254 @@
+import asyncio
 import io
+import os
 import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-import fast_colorthief
-from aiohttp import ClientSession
+import numpy as np
+from aiocache import Cache
+from aiocache.serializers import PickleSerializer
+from aiohttp import ClientSession, ClientTimeout
+from PIL import Image
 
-from utils.cache import cached_decorator
+from utils.lanes import LaneExecutor, http_session
+from utils.load import TIER_NO_COLORS, governor
+from utils.rest import rest
+
+DEFAULT_COLOR = 0x505050
+SAMPLE_SIZE = (32, 32)
+MAX_REMEMBERED = 4096
+BATCH_DELAY = 0.05
+MAX_BATCH = 32
+
+# Hosts that can serve a thumbnail-sized rendition of the same image,
+# the color of a 64px version is indistinguishable from the original
+RENDITIONS = [
+    (
+        re.compile(
+            r"(cdn\.discordapp\.com/(?:icons|avatars)/.*?)\?size=(?:32|64|128|256|512|1024|2048|4096)$"
+        ),
+        r"\1?size=16",
+    ),
+    (re.compile(r"(images\.metahub\.space/poster)/(?:medium|large)/"), r"\1/small/"),
+    (
+        re.compile(
+            r"(steamstatic\.com/steam/apps/\d+)/(?:header|capsule_\w+|library_\w+)\.jpg"
+        ),
+        r"\1/capsule_sm_120.jpg",
+    ),
+    (re.compile(r"(i\.scdn\.co/image/ab67616d0000)(?:b273|1e02)"), r"\g<1>4851"),
+    (re.compile(r"(i\.ytimg\.com/vi/[\w-]+)/\w+default\.jpg"), r"\1/default.jpg"),
+    (re.compile(r"(mzstatic\.com/.+)/\d+x\d+(\w*)\.(jpg|png|webp)$"), r"\1/64x64\2.\3"),
+]
+
+_executor = LaneExecutor(
+    "colors", ThreadPoolExecutor(max_workers=2, thread_name_prefix="colors"), 2
+)
+
+color_cache = Cache.REDIS(
+    namespace="global---get_color",
+    endpoint=os.getenv("REDIS_HOST", "keto_redis"),
+    port=int(os.getenv("REDIS_PORT", 6379)),
+    password=os.getenv("REDIS_PASSWORD"),
+    serializer=PickleSerializer(),
+)
+
+# Colors resolved by this process, readable without touching Redis
+remembered = OrderedDict()
+pending = {}
+patches = {}
+# Keys waiting for the next get_colors() call
+batch = []
+batch_timer = None
+resolving = set()
+
+
+def small_rendition(url: str):
+    for pattern, replacement in RENDITIONS:
+        small, count = pattern.subn(replacement, url)
+        if count:
+            return small
+    return url
+
+
+def decode_pixels(data: bytes):
+    with Image.open(io.BytesIO(data)) as img:
+        # JPEG decodes straight to 1/2, 1/4 or 1/8 scale in draft mode
+        img.draft("RGB", SAMPLE_SIZE)
+        img = img.convert("RGBA")
+        img.thumbnail(SAMPLE_SIZE, Image.Resampling.BOX)
+        return np.asarray(img).reshape(-1, 4)
+
+
+def dominant_color(pixels: np.ndarray):
+    # Same pixel filter as colorthief (skip transparent and near-white),
+    # then the densest cell of a 5-bit-per-channel histogram wins
+    rgb = pixels[:, :3]
+    mask = (pixels[:, 3] >= 125) & ~(rgb > 250).all(axis=1)
+    rgb = rgb[mask] if mask.any() else rgb
+    if not len(rgb):
+        return DEFAULT_COLOR
+
+    quantized = rgb.astype(np.uint32) >> 3
+    bins = (quantized[:, 0] << 10) | (quantized[:, 1] << 5) | quantized[:, 2]
+    counts = np.bincount(bins, minlength=32768)
+    r, g, b = rgb[bins == counts.argmax()].mean(axis=0).astype(np.uint32)
+    return int((r << 16) | (g << 8) | b)
+
+
+def colors_for_images(images):
+    colors = []
+    for data in images:
+        try:
+            colors.append(dominant_color(decode_pixels(data)) if data else None)
+        except Exception:
+            colors.append(None)
+    return colors
+
+
+async def fetch_image(session: ClientSession, url: str):
+    try:
+        async with session.get(url) as response:
+            if response.status != 200:
+                return None
+            return await response.read()
+    except Exception:
+        return None
+
+
+async def get_colors(queries):
+    keys = [str(query) for query in queries]
+    colors = [None if query else DEFAULT_COLOR for query in queries]
+    lookup = [i for i, query in enumerate(queries) if query]
+    if not lookup:
+        return colors
+
+    try:
+        cached = await color_cache.multi_get([keys[i] for i in lookup])
+    except Exception:
+        cached = [None] * len(lookup)
+    for i, color in zip(lookup, cached):
+        colors[i] = color
+
+    missing = [i for i, color in enumerate(colors) if color is None]
+    if not missing:
+        return colors
+
+    async with http_session(timeout=ClientTimeout(total=5)) as session:
+        images = await asyncio.gather(
+            *[fetch_image(session, small_rendition(keys[i])) for i in missing]
+        )
+
+    computed = await _executor.run(colors_for_images, images)
+
+    fresh = []
+    for i, color in zip(missing, computed):
+        if color is None:
+            colors[i] = DEFAULT_COLOR
+        else:
+            colors[i] = color
+            fresh.append((keys[i], color))
+    if fresh:
+        try:
+            await color_cache.multi_set(fresh, ttl=604800)
+        except Exception:
+            pass
+    return colors
 
 
-@cached_decorator(ttl=604800)
 async def get_color(query):
+    return (await get_colors([query]))[0]
+
+
+def remember(key: str, color: int):
+    remembered[key] = color
+    remembered.move_to_end(key)
+    while len(remembered) > MAX_REMEMBERED:
+        remembered.popitem(last=False)
+
+
+async def resolve(keys):
     try:
-        # Speed up color fetching for discord avatars
-        if any(
-            s in query
-            for s in {"cdn.discordapp.com/icons/", "cdn.discordapp.com/avatars/"}
-        ):
-            query = re.sub(
-                r"\?size=(32|64|128|256|512|1024|2048|4096)$", "?size=16", query
+        colors = await get_colors(keys)
+    except Exception:
+        colors = [None] * len(keys)
+    for key, color in zip(keys, colors):
+        if color is not None:
+            remember(key, color)
+        pending.pop(key).set_result(color)
+
+
+def flush_batch():
+    global batch_timer
+    if batch_timer is not None:
+        batch_timer.cancel()
+        batch_timer = None
+    keys = batch[:]
+    batch.clear()
+    task = asyncio.create_task(resolve(keys))
+    resolving.add(task)
+    task.add_done_callback(resolving.discard)
+
+
+def warm_color(query):
+    # Lookups arriving within BATCH_DELAY of each other share one Redis
+    # round trip and one trip to the color threads
+    global batch_timer
+    key = str(query)
+    if not query or key in remembered:
+        return None
+    if key not in pending:
+        pending[key] = asyncio.get_running_loop().create_future()
+        batch.append(key)
+        if len(batch) >= MAX_BATCH:
+            flush_batch()
+        elif batch_timer is None:
+            batch_timer = asyncio.get_running_loop().call_later(
+                BATCH_DELAY, flush_batch
             )
-        async with ClientSession() as session:
-            async with session.get(query, timeout=5) as response:
-                content = await response.read()
-
-        color = fast_colorthief.get_dominant_color(io.BytesIO(content), quality=100)
-        color = int(f"0x{color[0]:02x}{color[1]:02x}{color[2]:02x}", 16)
-        return color
-    except:
-        return 0x505050
+    return pending[key]
+
+
+def color_now(query, fallback: int = DEFAULT_COLOR):
+    # Never waits, whatever isn't known yet is computed in the background
+    # so the next embed for the same image gets the real color
+    key = str(query)
+    if query and key in remembered:
+        remembered.move_to_end(key)
+        return remembered[key]
+    if governor.allows(TIER_NO_COLORS):
+        warm_color(query)
+    return fallback
+
+
+async def patch_color(message, query, index: int = 0):
+    key = str(query)
+    try:
+        color = remembered.get(key)
+        if color is None:
+            if not (future := warm_color(query)):
+                return
+            color = await asyncio.shield(future)
+            if color is None:
+                return
+        embeds = message.embeds
+        if len(embeds) <= index or getattr(embeds[index].color, "value", None) == color:
+            return
+        embeds[index].color = color
+        await rest.edit(message, embeds=embeds)
+    except Exception:
+        pass
+    finally:
+        if patches.get(message.id) is asyncio.current_task():
+            del patches[message.id]
+
+
+def recolor(message, query, index: int = 0):
+    # Replies go out with color_now() and get the real color edited in later,
+    # only the newest patch per message may edit so a stale one can't revert it
+    if message is None or not query or not governor.allows(TIER_NO_COLORS):
+        return
+    if previous := patches.get(message.id):
+        previous.cancel()
+    patches[message.id] = asyncio.create_task(patch_color(message, query, index))
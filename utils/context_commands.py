@@ -3,12 +3,12 @@ import json
 import os
 import re
 
-import aiohttp
 import discord
 from discord import Interaction, app_commands
 from discord.ext import commands
 
 from utils.jsons import ConfigJSON
+from utils.lanes import http_session
 
 
 class PFPView(discord.ui.View):
@@ -103,7 +103,7 @@ async def handle_steal(interaction: Interaction, message: discord.Message):
         if get_emoji.id:
             url = f"https://cdn.discordapp.com/emojis/{get_emoji.id}.{('gif' if get_emoji.animated else 'png')}"
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(full_match if not get_emoji.id else url) as resp:
                 image = io.BytesIO(await resp.read())
                 e = await interaction.guild.create_custom_emoji(
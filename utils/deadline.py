@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+
+import discord
+from discord.ext import commands
+from discord.ext.commands.hybrid import HybridAppCommand
+
+from utils.timers import timers
+
+# Discord drops interactions that aren't acknowledged within 3 seconds,
+# what's left of that is kept for the defer itself to get there
+DEFER_AFTER = 2.5
+
+
+class KetoContext(commands.Context):
+    async def defer(self, *, ephemeral: bool = False) -> None:
+        if self.interaction is None:
+            return
+        async with watchdog.responding(self.interaction):
+            # The watchdog may have gotten there first
+            if self.interaction.response.is_done():
+                return
+            await super().defer(ephemeral=ephemeral)
+
+    async def send(self, *args, **kwargs):
+        if self.interaction is None or self.interaction.response.is_done():
+            return await super().send(*args, **kwargs)
+        async with watchdog.responding(self.interaction):
+            return await super().send(*args, **kwargs)
+
+
+class DeferralWatchdog:
+    def __init__(self) -> None:
+        self.watched = Counter()
+        self.fired = Counter()
+        self.responders = {}
+        self.logger = logging.getLogger("Keto")
+
+    def tolerates(self, command):
+        # Hybrid commands answer through Context.send, which switches to a
+        # followup on its own, app commands have to say they can handle it
+        return isinstance(command, HybridAppCommand) or command.extras.get(
+            "auto_defer", False
+        )
+
+    def extras(self, command):
+        return getattr(command, "wrapped", command).extras
+
+    @asynccontextmanager
+    async def responding(self, interaction: discord.Interaction):
+        """Hold while making an interaction's first response.
+
+        The watchdog defers under the same lock, so only one of them ever
+        answers the interaction and the other sees it's already done.
+        """
+        lock, users = self.responders.get(interaction.id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self.responders[interaction.id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self.responders[interaction.id]
+            if users == 1:
+                del self.responders[interaction.id]
+            else:
+                self.responders[interaction.id] = (lock, users - 1)
+
+    async def watch(self, interaction: discord.Interaction):
+        if interaction.type is not discord.InteractionType.application_command:
+            return
+        command = interaction.command
+        if command is None or not self.tolerates(command):
+            return
+
+        name = command.qualified_name
+        self.watched[name] += 1
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        timers.call_later(
+            min(DEFER_AFTER, max(0, DEFER_AFTER - elapsed)),
+            self.check,
+            interaction,
+            name,
+            # Commands that answer ephemerally say so, a public defer would
+            # make their reply public
+            self.extras(command).get("defer_ephemeral", False),
+        )
+
+    async def check(
+        self, interaction: discord.Interaction, name: str, ephemeral: bool = False
+    ):
+        if interaction.response.is_done():
+            return
+        async with self.responding(interaction):
+            if interaction.response.is_done():
+                return
+            try:
+                await interaction.response.defer(ephemeral=ephemeral)
+            except (discord.InteractionResponded, discord.HTTPException):
+                return
+        self.fired[name] += 1
+        self.logger.info(f"Deferred /{name} before it missed the interaction deadline")
+
+    def stats(self):
+        return {
+            "watched": sum(self.watched.values()),
+            "fired": sum(self.fired.values()),
+            "commands": [
+                (name, fired, self.watched[name])
+                for name, fired in self.fired.most_common(10)
+            ],
+        }
+
+
+watchdog = DeferralWatchdog()
+
+
+def use_deferral_watchdog(bot):
+    bot.add_listener(watchdog.watch, "on_interaction")
@@ -0,0 +1,264 @@
+import asyncio
+import os
+import struct
+import tempfile
+import time
+from contextlib import suppress
+
+from pydub import AudioSegment
+
+SAMPLE_RATE = 16000
+MAX_KEPT_FRAMES = 16
+FALLBACK_FPS = 2
+
+
+class ExtractedMedia:
+    def __init__(self, frames, audio, timings) -> None:
+        self.frames = frames
+        self.audio = audio
+        self.timings = timings
+
+    def format_timings(self):
+        return ", ".join(
+            f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items()
+        )
+
+
+class FrameSampler:
+    # Keeps an evenly spaced subset of an unknown-length frame stream by
+    # halving the kept frames (and doubling the stride) whenever it fills up.
+    def __init__(self, max_frames: int = MAX_KEPT_FRAMES) -> None:
+        self.max_frames = max_frames
+        self.kept = []
+        self.last = None
+        self.count = 0
+        self.stride = 1
+
+    def add(self, frame: bytes):
+        if self.count % self.stride == 0:
+            self.kept.append(frame)
+            if len(self.kept) > self.max_frames:
+                self.kept = self.kept[::2]
+                self.stride *= 2
+        self.last = frame
+        self.count += 1
+
+    def pick(self, count: int = 3):
+        if not self.kept:
+            return []
+        frames = self.kept[:]
+        if frames[-1] is not self.last:
+            frames.append(self.last)
+        if len(frames) <= count:
+            return frames
+        return [
+            frames[round(i * (len(frames) - 1) / (count - 1))] for i in range(count)
+        ]
+
+
+async def read_frames(
+    stream: asyncio.StreamReader, sampler: FrameSampler, timings, start
+):
+    buffer = b""
+    while chunk := await stream.read(65536):
+        buffer += chunk
+        # mjpeg output never contains a bare EOI marker inside the entropy coded data
+        while (end := buffer.find(b"\xff\xd9")) != -1:
+            frame, buffer = buffer[: end + 2], buffer[end + 2 :]
+            start_of_image = frame.find(b"\xff\xd8")
+            if start_of_image != -1:
+                if not sampler.count:
+                    timings["first frame"] = time.perf_counter() - start
+                sampler.add(frame[start_of_image:])
+    timings["frames"] = time.perf_counter() - start
+
+
+async def read_audio(
+    stream: asyncio.StreamReader, process, max_bytes: int, timings, start
+):
+    chunks = []
+    size = 0
+    while chunk := await stream.read(65536):
+        size += len(chunk)
+        if size > max_bytes:
+            # Too long to summarize, stop decoding instead of draining the rest
+            with suppress(ProcessLookupError):
+                process.kill()
+            return None
+        chunks.append(chunk)
+    timings["audio"] = time.perf_counter() - start
+    return b"".join(chunks)
+
+
+def is_streamable(data: bytes):
+    # MP4s with the moov atom after mdat can't be demuxed from a pipe
+    offset = 0
+    while offset + 8 <= len(data):
+        size, kind = struct.unpack(">I4s", data[offset : offset + 8])
+        if kind == b"moov":
+            return True
+        if kind == b"mdat":
+            return False
+        if size == 1 and offset + 16 <= len(data):
+            size = struct.unpack(">Q", data[offset + 8 : offset + 16])[0]
+        if size < 8:
+            break
+        offset += size
+    return True
+
+
+def spool(data: bytes):
+    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as f:
+        f.write(data)
+    return f.name
+
+
+async def feed_stdin(process, data: bytes):
+    with suppress(BrokenPipeError, ConnectionResetError):
+        process.stdin.write(data)
+        await process.stdin.drain()
+    process.stdin.close()
+
+
+async def extract_media(
+    source, frame_height: int = 720, frame_count: int = 3, max_seconds: int = 180
+):
+    """Decode a video's keyframes, returning scaled frames and 16 kHz mono audio.
+
+    ``source`` is either a file path or the raw video bytes, which are
+    streamed over stdin unless the container needs seeking.
+    """
+    spooled = None
+    if isinstance(source, (bytes, bytearray, memoryview)) and not is_streamable(source):
+        spooled = source = await asyncio.to_thread(spool, source)
+    try:
+        return await extract(source, frame_height, frame_count, max_seconds)
+    finally:
+        if spooled:
+            with suppress(OSError):
+                os.remove(spooled)
+
+
+async def extract(source, frame_height, frame_count, max_seconds):
+    timings = {}
+    start = time.perf_counter()
+
+    sampler, pcm, returncode = await run_extraction(
+        source, frame_height, max_seconds, timings, start
+    )
+    silent = bool(returncode) and not sampler.count and pcm == b""
+    if silent:
+        # The audio map is optional but ffmpeg still refuses to start when it
+        # matches nothing, so silent videos need a run without the audio output
+        timings.clear()
+        sampler, pcm, _ = await run_extraction(
+            source, frame_height, max_seconds, timings, start, audio=False
+        )
+
+    # No PCM after an audio run means the video was too long to summarize
+    if sampler.count < frame_count and (pcm or silent):
+        # Long GOPs leave short clips with only a keyframe or two, decode every
+        # frame instead but only encode a few per second
+        duration = len(pcm) / (2 * SAMPLE_RATE) if pcm else None
+        rate = (
+            min(FALLBACK_FPS, MAX_KEPT_FRAMES / duration) if duration else FALLBACK_FPS
+        )
+        fallback, _, _ = await run_extraction(
+            source,
+            frame_height,
+            max_seconds,
+            {},
+            start,
+            audio=False,
+            keyframes_only=False,
+            fps=rate,
+        )
+        timings["all frames"] = time.perf_counter() - start
+        if fallback.count > sampler.count:
+            sampler = fallback
+
+    audio = (
+        AudioSegment(data=pcm, sample_width=2, frame_rate=SAMPLE_RATE, channels=1)
+        if pcm
+        else None
+    )
+    timings["total"] = time.perf_counter() - start
+    return ExtractedMedia(sampler.pick(frame_count), audio, timings)
+
+
+async def run_extraction(
+    source,
+    frame_height,
+    max_seconds,
+    timings,
+    start,
+    audio: bool = True,
+    keyframes_only: bool = True,
+    fps: float = None,
+):
+    loop = asyncio.get_running_loop()
+    from_bytes = isinstance(source, (bytes, bytearray, memoryview))
+    scale = f"scale=-2:{frame_height}"
+    # fmt: off
+    args = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        *(["-skip_frame", "nokey"] if keyframes_only else ["-t", str(max_seconds)]),
+        "-i", "pipe:0" if from_bytes else source,
+        "-map", "0:v:0", "-vf", f"fps={fps},{scale}" if fps else scale,
+        "-fps_mode", "passthrough",
+        "-c:v", "mjpeg", "-q:v", "3", "-f", "image2pipe", "pipe:1",
+    ]
+    # fmt: on
+
+    pass_fds = ()
+    if audio:
+        audio_read_fd, audio_write_fd = os.pipe()
+        pass_fds = (audio_write_fd,)
+        # fmt: off
+        args += [
+            "-map", "0:a:0?", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le",
+            f"pipe:{audio_write_fd}",
+        ]
+        # fmt: on
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE if from_bytes else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            pass_fds=pass_fds,
+        )
+    finally:
+        if audio:
+            os.close(audio_write_fd)
+    timings["spawn"] = time.perf_counter() - start
+
+    sampler = FrameSampler()
+    tasks = [read_frames(process.stdout, sampler, timings, start)]
+    transport = None
+    if audio:
+        audio_stream = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(audio_stream),
+            os.fdopen(audio_read_fd, "rb", 0),
+        )
+        tasks.append(
+            read_audio(
+                audio_stream, process, max_seconds * SAMPLE_RATE * 2, timings, start
+            )
+        )
+    if from_bytes:
+        tasks.append(feed_stdin(process, bytes(source)))
+
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        if transport:
+            transport.close()
+        if process.returncode is None:
+            with suppress(ProcessLookupError):
+                process.kill()
+        await process.wait()
+
+    return sampler, results[1] if audio else None, process.returncode
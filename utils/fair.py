@@ -0,0 +1,170 @@
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+
+# Every turn a guild gets this much credit, the most expensive job costs
+# no more than one turn's worth so a guild always gets something per turn
+QUANTUM = 4
+COST_LOOKUP = 1
+COST_TRANSCRIPTION = 4
+
+
+class GuildQueue:
+    __slots__ = ("guild_id", "waiting", "running", "deficit")
+
+    def __init__(self, guild_id: int) -> None:
+        self.guild_id = guild_id
+        self.waiting = deque()
+        self.running = 0
+        self.deficit = 0
+
+
+class FairScheduler:
+    def __init__(self, concurrency: int, guild_concurrency: int) -> None:
+        # Deficit round robin over the guilds with queued work, one busy guild
+        # waits on its own queue instead of pushing everyone else back
+        self.concurrency = concurrency
+        self.guild_concurrency = guild_concurrency
+        self.guild_caps = {}
+        self.queues = {}
+        self.active = deque()
+        self.turn = None
+        self.running = 0
+        self.dispatched = 0
+        self.waited = 0.0
+        self.served = Counter()
+
+    def guild_cap(self, guild_id: int):
+        return self.guild_caps.get(guild_id, self.guild_concurrency)
+
+    def set_guild_cap(self, guild_id: int, cap: int = None):
+        if cap is None:
+            self.guild_caps.pop(guild_id, None)
+        else:
+            self.guild_caps[guild_id] = cap
+        self.dispatch()
+
+    def grant(self, queue: GuildQueue, cost: int, future, queued_at: float):
+        queue.deficit -= cost
+        queue.running += 1
+        self.running += 1
+        self.dispatched += 1
+        self.waited += time.monotonic() - queued_at
+        self.served[queue.guild_id] += 1
+        future.set_result(None)
+
+    def dispatch(self):
+        idle_visits = 0
+        while (
+            self.active
+            and self.running < self.concurrency
+            and idle_visits < len(self.active)
+        ):
+            queue = self.queues[self.active[0]]
+            cap = self.guild_cap(queue.guild_id)
+            if queue.running >= cap:
+                # At its cap it sits this turn out without earning credit
+                self.active.rotate(-1)
+                self.turn = None
+                idle_visits += 1
+                continue
+            if self.turn != queue.guild_id:
+                self.turn = queue.guild_id
+                queue.deficit += QUANTUM
+
+            granted = False
+            while (
+                queue.waiting
+                and queue.running < cap
+                and self.running < self.concurrency
+            ):
+                cost, future, queued_at = queue.waiting[0]
+                if future.done():
+                    queue.waiting.popleft()
+                    continue
+                if cost > queue.deficit:
+                    break
+                queue.waiting.popleft()
+                self.grant(queue, cost, future, queued_at)
+                granted = True
+
+            if not queue.waiting:
+                queue.deficit = 0
+                self.active.popleft()
+                self.turn = None
+                if not queue.running:
+                    del self.queues[queue.guild_id]
+            elif self.running >= self.concurrency:
+                # Out of slots mid-turn, the turn picks up where it left off
+                break
+            else:
+                self.active.rotate(-1)
+                self.turn = None
+            idle_visits = 0 if granted else idle_visits + 1
+
+    def release(self, guild_id: int):
+        queue = self.queues[guild_id]
+        queue.running -= 1
+        self.running -= 1
+        if not queue.running and not queue.waiting:
+            del self.queues[guild_id]
+        self.dispatch()
+
+    @asynccontextmanager
+    async def slot(self, guild_id: int, cost: int = COST_LOOKUP):
+        """Wait for the guild's turn and hold one of its slots while the block runs."""
+        guild_id = guild_id or 0
+        queue = self.queues.get(guild_id)
+        if queue is None:
+            queue = self.queues[guild_id] = GuildQueue(guild_id)
+        if not queue.waiting:
+            self.active.append(guild_id)
+        future = asyncio.get_running_loop().create_future()
+        queue.waiting.append((cost, future, time.monotonic()))
+        self.dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(guild_id)
+            raise
+        try:
+            yield
+        finally:
+            self.release(guild_id)
+
+    def stats(self, count: int = 10):
+        busiest = sorted(
+            self.queues.values(),
+            key=lambda queue: (len(queue.waiting), queue.running),
+            reverse=True,
+        )[:count]
+        return {
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "guild_concurrency": self.guild_concurrency,
+            "queued": sum(len(queue.waiting) for queue in self.queues.values()),
+            "guilds": len(self.queues),
+            "dispatched": self.dispatched,
+            "average_wait": self.waited / self.dispatched if self.dispatched else 0,
+            "busiest": [
+                {
+                    "guild_id": queue.guild_id,
+                    "queued": len(queue.waiting),
+                    "running": queue.running,
+                    "cap": self.guild_cap(queue.guild_id),
+                    "served": self.served[queue.guild_id],
+                }
+                for queue in busiest
+            ],
+            "most_served": self.served.most_common(count),
+        }
+
+
+enrichment = FairScheduler(
+    concurrency=int(os.getenv("ENRICH_CONCURRENCY", 32)),
+    guild_concurrency=int(os.getenv("ENRICH_GUILD_CONCURRENCY", 4)),
+)
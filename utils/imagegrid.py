@@ -0,0 +1,111 @@
+import io
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+from utils.lanes import LaneExecutor
+
+MAX_GRID_WIDTH = 1920
+BYTE_BUDGET = 4 * 1024 * 1024
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = LaneExecutor("grids", ProcessPoolExecutor(max_workers=2), 2)
+    return _executor
+
+
+def grid_shape(num_images: int):
+    rows = round(math.sqrt(num_images))
+    cols = math.ceil(num_images / rows)
+    while rows * cols < num_images:
+        rows += 1
+    return cols, rows
+
+
+def encode_grid(grid: Image.Image, byte_budget: int):
+    # Flat graphics (screenshots, memes with text) stay lossless when they fit,
+    # photos go straight to lossy WebP which keeps the transparent padding.
+    sample = grid.copy()
+    sample.thumbnail((256, 256))
+    if sample.getcolors(maxcolors=1024) is not None:
+        output = io.BytesIO()
+        grid.save(output, format="PNG", optimize=True)
+        if output.tell() <= byte_budget:
+            return output.getvalue(), "png"
+
+    for quality in (85, 75, 60):
+        output = io.BytesIO()
+        grid.save(output, format="WEBP", quality=quality, method=4)
+        if output.tell() <= byte_budget:
+            break
+    return output.getvalue(), "webp"
+
+
+def render_grid(blobs, max_width: int = MAX_GRID_WIDTH, byte_budget: int = BYTE_BUDGET):
+    images = []
+    try:
+        for blob in blobs:
+            try:
+                images.append(Image.open(io.BytesIO(blob)))
+            except Exception:
+                continue
+
+        if not images:
+            return None
+
+        cols, rows = grid_shape(len(images))
+        cell_width = max(img.width for img in images)
+        cell_height = max(img.height for img in images)
+
+        if cols * cell_width > max_width:
+            ratio = max_width / (cols * cell_width)
+            cell_width = max(1, int(cell_width * ratio))
+            cell_height = max(1, int(cell_height * ratio))
+
+        grid = Image.new("RGBA", (cols * cell_width, rows * cell_height), (0, 0, 0, 0))
+
+        for i, img in enumerate(images):
+            scale = min(cell_width / img.width, cell_height / img.height)
+            size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+
+            # JPEG can decode straight to a reduced scale, skipping most of the IDCT work
+            img.draft("RGB", size)
+            cell = img.convert("RGBA").resize(size, Image.Resampling.LANCZOS)
+
+            x = (i % cols) * cell_width + (cell_width - size[0]) // 2
+            y = (i // cols) * cell_height + (cell_height - size[1]) // 2
+            grid.paste(cell, (x, y))
+            cell.close()
+
+        data, ext = encode_grid(grid, byte_budget)
+        grid.close()
+
+        shm = shared_memory.SharedMemory(create=True, size=len(data), track=False)
+        shm.buf[: len(data)] = data
+        name = shm.name
+        shm.close()
+        return name, len(data), ext
+    finally:
+        for img in images:
+            img.close()
+
+
+async def build_grid(blobs):
+    result = await get_executor().run(render_grid, blobs)
+    if result is None:
+        return None, None
+
+    name, size, ext = result
+    shm = shared_memory.SharedMemory(name=name, track=False)
+    try:
+        output = io.BytesIO(bytes(shm.buf[:size]))
+    finally:
+        shm.close()
+        shm.unlink()
+    return output, ext
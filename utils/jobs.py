@@ -0,0 +1,283 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import os
+import time
+from contextlib import suppress
+
+import psutil
+import redis.asyncio as aioredis
+
+from utils.lanes import LANE_BACKGROUND, LANE_PASSIVE, current_lane
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_RESTORED = 5
+PRIORITY_SPECULATIVE = 10
+
+JOB_MEMORY_ESTIMATE = 400 * 1024 * 1024
+
+current_job = contextvars.ContextVar("current_job", default=None)
+
+
+async def report_progress(status: str):
+    job = current_job.get()
+    if job is not None:
+        job.notify(status)
+
+
+class Job:
+    def __init__(self, key: str, kind: str, payload: dict, priority: int) -> None:
+        self.key = key
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.future = asyncio.get_running_loop().create_future()
+        self.listeners = []
+        self.status = "Queued"
+        self.pending_status = None
+        self.reporter = None
+        self.queued_at = time.time()
+        self.started_at = None
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def notify(self, status: str):
+        """Report a status without waiting on the listeners.
+
+        Updates arriving while one is being sent are coalesced, only the
+        latest is sent after it, so they can't land out of order.
+        """
+        self.pending_status = status
+        if self.reporter is None or self.reporter.done():
+            self.reporter = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        while self.pending_status is not None:
+            status, self.pending_status = self.pending_status, None
+            await self.report(status)
+
+    async def report(self, status: str):
+        if status == self.status:
+            return
+        self.status = status
+        for listener in list(self.listeners):
+            try:
+                await listener(status)
+            except Exception:
+                self.listeners.remove(listener)
+
+
+class JobQueue:
+    def __init__(self, name: str, max_jobs: int, memory_budget: int) -> None:
+        self.name = name
+        self.max_jobs = max_jobs
+        self.memory_budget = memory_budget
+        self.handlers = {}
+        self.jobs = {}
+        self.running = {}
+        self.queue = asyncio.PriorityQueue()
+        self.sequence = itertools.count()
+        self.capacity = asyncio.Event()
+        self.dispatcher = None
+        self.redis = None
+        self.tasks = set()
+        self.logger = logging.getLogger("Keto")
+
+    def register(self, kind: str, handler):
+        self.handlers[kind] = handler
+
+    async def start(self):
+        if self.dispatcher:
+            return
+        self.redis = aioredis.Redis(
+            host=os.getenv("REDIS_HOST", "keto_redis"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            db=int(os.getenv("REDIS_DB", 0)),
+            password=os.getenv("REDIS_PASSWORD"),
+        )
+        self.dispatcher = asyncio.create_task(self.dispatch())
+        await self.restore()
+
+    async def stop(self):
+        if self.dispatcher:
+            self.dispatcher.cancel()
+            self.dispatcher = None
+        for task in self.running.values():
+            task.cancel()
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+
+    async def restore(self):
+        try:
+            saved = await self.redis.hgetall(self.name)
+        except Exception as e:
+            return self.logger.warning(f"Could not restore {self.name}: {e}")
+
+        for key, value in saved.items():
+            entry = json.loads(value)
+            if entry["kind"] in self.handlers:
+                self.submit(
+                    key.decode(),
+                    entry["kind"],
+                    entry["payload"],
+                    priority=max(entry["priority"], PRIORITY_RESTORED),
+                )
+        if saved:
+            self.logger.info(f"Restored {len(saved)} queued jobs from {self.name}")
+
+    async def persist(self, job: Job):
+        try:
+            await self.redis.hset(
+                self.name,
+                job.key,
+                json.dumps(
+                    {"kind": job.kind, "payload": job.payload, "priority": job.priority}
+                ),
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not persist job {job.key}: {e}")
+
+    async def forget(self, job: Job):
+        try:
+            await self.redis.hdel(self.name, job.key)
+        except Exception as e:
+            self.logger.warning(f"Could not remove job {job.key}: {e}")
+
+    def submit(
+        self,
+        key: str,
+        kind: str,
+        payload: dict,
+        priority: int = PRIORITY_INTERACTIVE,
+        on_progress=None,
+    ):
+        # Identical requests share one job, so the caller gets the same future
+        # (shielded, a cancelled waiter must not cancel the job for everyone)
+        job = self.jobs.get(key)
+        if job is None:
+            job = Job(key, kind, payload, priority)
+            self.jobs[key] = job
+            self.queue.put_nowait((priority, next(self.sequence), key))
+            if self.redis:
+                task = asyncio.create_task(self.persist(job))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+        elif priority < job.priority and job.started_at is None:
+            # Someone is actively waiting on a background job, bump it
+            job.priority = priority
+            self.queue.put_nowait((priority, next(self.sequence), key))
+
+        if on_progress:
+            job.add_listener(on_progress)
+        return asyncio.shield(job.future)
+
+    def position(self, key: str):
+        job = self.jobs.get(key)
+        if job is None or job.started_at is not None:
+            return 0
+        return sum(
+            1
+            for other in self.jobs.values()
+            if other.started_at is None
+            and (other.priority, other.queued_at) < (job.priority, job.queued_at)
+        )
+
+    def memory_in_use(self):
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return rss
+
+    def has_capacity(self):
+        if len(self.running) >= self.max_jobs:
+            return False
+        # Jobs that just started haven't grown yet, so budget for each of them
+        projected = self.memory_in_use() + JOB_MEMORY_ESTIMATE * (len(self.running) + 1)
+        return (
+            projected <= self.memory_budget
+            and psutil.virtual_memory().available >= JOB_MEMORY_ESTIMATE
+        )
+
+    def is_idle(self):
+        return (
+            len(self.jobs) == len(self.running)
+            and self.has_capacity()
+            and psutil.cpu_percent() < 50
+        )
+
+    async def dispatch(self):
+        while True:
+            _, _, key = await self.queue.get()
+            job = self.jobs.get(key)
+            if job is None or job.started_at is not None:
+                continue
+
+            # The memory budget only limits concurrency, with nothing running
+            # a job always starts, or a bot sitting above the budget on its own
+            # would never run one again
+            while self.running and not self.has_capacity():
+                self.capacity.clear()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.capacity.wait(), timeout=1)
+
+            job.started_at = time.time()
+            self.running[key] = asyncio.create_task(self.run(job))
+            waiting = sorted(
+                (other for other in self.jobs.values() if other.started_at is None),
+                key=lambda other: (other.priority, other.queued_at),
+            )
+            for position, other in enumerate(waiting, start=1):
+                other.notify(f"Waiting in queue (position {position})...")
+
+    async def run(self, job: Job):
+        current_job.set(job)
+        # Someone clicked for this one, it still goes behind interactions
+        current_lane.set(
+            LANE_PASSIVE if job.priority == PRIORITY_INTERACTIVE else LANE_BACKGROUND
+        )
+        job.notify("Starting...")
+        try:
+            result = await self.handlers[job.kind](job.payload)
+        except asyncio.CancelledError:
+            # Shutting down, leave it persisted so it resumes after a restart
+            job.future.cancel()
+            raise
+        except Exception as e:
+            self.logger.error(f"Job {job.key} failed: {e}")
+            job.future.set_result(None)
+        else:
+            job.future.set_result(result)
+        finally:
+            self.jobs.pop(job.key, None)
+            self.running.pop(job.key, None)
+            self.capacity.set()
+
+        self.logger.info(
+            f"Finished job {job.key} in {time.time() - job.started_at:.2f}s (waited {job.started_at - job.queued_at:.2f}s)"
+        )
+        if self.redis:
+            await self.forget(job)
+
+    def stats(self):
+        return {
+            "queued": len(self.jobs) - len(self.running),
+            "running": len(self.running),
+            "max_jobs": self.max_jobs,
+            "memory": self.memory_in_use(),
+            "memory_budget": self.memory_budget,
+        }
+
+
+summary_jobs = JobQueue(
+    name="keto:summary_jobs",
+    max_jobs=int(os.getenv("SUMMARY_MAX_JOBS", max(1, (os.cpu_count() or 2) // 2))),
+    memory_budget=int(os.getenv("SUMMARY_MEMORY_MB", 3072)) * 1024 * 1024,
+)
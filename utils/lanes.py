@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import aiohttp
+
+LANE_INTERACTIVE = 0
+LANE_PASSIVE = 1
+LANE_BACKGROUND = 2
+LANE_NAMES = ["interactive", "passive", "background"]
+
+# Whatever an interaction starts inherits its lane through the context,
+# everything else (on_message fixes, loops) is passive unless it says otherwise
+current_lane = contextvars.ContextVar("current_lane", default=LANE_PASSIVE)
+
+
+class LaneGate:
+    def __init__(self, name: str, limit: int, reserved: int) -> None:
+        # Passive work can't take the last `reserved` slots and background
+        # work can't take more than half, so an interaction arriving behind
+        # a burst only ever waits for the next slot to free up
+        self.name = name
+        self.limit = limit
+        self.limits = [limit, max(1, limit - reserved), max(1, limit // 2)]
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.in_use = 0
+        self.acquired = [0] * len(LANE_NAMES)
+        self.waits = [deque(maxlen=512) for _ in LANE_NAMES]
+
+    def admits(self, lane: int):
+        return self.in_use < self.limits[lane]
+
+    def wake(self):
+        while self.waiters:
+            lane, _, future, queued_at = self.waiters[0]
+            if future.done():
+                heapq.heappop(self.waiters)
+                continue
+            if not self.admits(lane):
+                break
+            heapq.heappop(self.waiters)
+            self.take(lane, queued_at)
+            future.set_result(None)
+
+    def take(self, lane: int, queued_at: float):
+        self.in_use += 1
+        self.acquired[lane] += 1
+        self.waits[lane].append(time.monotonic() - queued_at)
+
+    async def acquire(self, lane: int = None):
+        lane = current_lane.get() if lane is None else lane
+        queued_at = time.monotonic()
+        if self.admits(lane) and (not self.waiters or self.waiters[0][0] > lane):
+            self.take(lane, queued_at)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (lane, next(self.sequence), future, queued_at))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        self.wake()
+
+    def stats(self):
+        waiting = [0] * len(LANE_NAMES)
+        for lane, _, future, _ in self.waiters:
+            if not future.done():
+                waiting[lane] += 1
+        lanes = {}
+        for lane, name in enumerate(LANE_NAMES):
+            waits = sorted(self.waits[lane])
+            lanes[name] = {
+                "acquired": self.acquired[lane],
+                "waiting": waiting[lane],
+                "p99_wait": waits[int(len(waits) * 0.99)] if waits else 0,
+            }
+        return {"in_use": self.in_use, "limit": self.limit, "lanes": lanes}
+
+
+class LaneExecutor:
+    def __init__(self, name: str, executor, workers: int) -> None:
+        self.executor = executor
+        self.gate = LaneGate(name, workers, reserved=1 if workers > 1 else 0)
+
+    async def run(self, func, *args):
+        """run_in_executor, with queued calls handed a worker in lane order."""
+        await self.gate.acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.gate.release()
+
+
+http_gate = LaneGate(
+    "http",
+    int(os.getenv("UPSTREAM_CONCURRENCY", 64)),
+    reserved=int(os.getenv("UPSTREAM_RESERVED", 16)),
+)
+
+
+async def on_request_done(session, context: SimpleNamespace, params):
+    # Only the wait for a response is gated, reading the body isn't
+    if getattr(context, "holding", False):
+        context.holding = False
+        http_gate.release()
+
+
+def lane_trace(lane: int = None):
+    async def on_request_start(session, context: SimpleNamespace, params):
+        await http_gate.acquire(lane)
+        context.holding = True
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_done)
+    trace.on_request_exception.append(on_request_done)
+    return trace
+
+
+lane_traces = {lane: lane_trace(lane) for lane in (None, *range(len(LANE_NAMES)))}
+
+
+def http_session(lane: int = None, **kwargs):
+    """aiohttp.ClientSession whose requests queue for an upstream slot by lane.
+
+    Without a lane, each request takes the lane of the task making it.
+    """
+    return aiohttp.ClientSession(trace_configs=[lane_traces[lane]], **kwargs)
+
+
+def use_interaction_lanes(bot):
+    # Tasks created while an interaction is parsed (app commands, component
+    # callbacks, listeners) copy the context, and with it the lane
+    parser = bot._connection.parsers["INTERACTION_CREATE"]
+
+    def parse_interaction_create(data):
+        token = current_lane.set(LANE_INTERACTIVE)
+        try:
+            return parser(data)
+        finally:
+            current_lane.reset(token)
+
+    bot._connection.parsers["INTERACTION_CREATE"] = parse_interaction_create
@@ -0,0 +1,24 @@
+import re
+import urllib.parse
+
+TIKTOK_ID_PATTERN = re.compile(r"/(?:video|photo|v)/(\d+)")
+INSTAGRAM_ID_PATTERN = re.compile(r"/(?:p|reels?|tv)/([A-Za-z0-9_-]+)")
+TWITTER_ID_PATTERN = re.compile(r"/status/(\d+)")
+REDDIT_ID_PATTERN = re.compile(r"/comments/([A-Za-z0-9]+)")
+
+
+def canonical_id(link: str):
+    parsed = urllib.parse.urlparse(link)
+    host = parsed.netloc.lower().removeprefix("www.")
+
+    if "tiktok" in host and (match := TIKTOK_ID_PATTERN.search(parsed.path)):
+        return f"tiktok:{match[1]}"
+    if "instagram" in host and (match := INSTAGRAM_ID_PATTERN.search(parsed.path)):
+        return f"instagram:{match[1]}"
+    if host in ("twitter.com", "x.com") and (
+        match := TWITTER_ID_PATTERN.search(parsed.path)
+    ):
+        return f"twitter:{match[1]}"
+    if "reddit" in host and (match := REDDIT_ID_PATTERN.search(parsed.path)):
+        return f"reddit:{match[1]}"
+    return f"{host}{parsed.path.rstrip('/')}"
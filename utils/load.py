@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from utils.rest import rest
+
+TIER_FULL = 0
+TIER_NO_COLORS = 1
+TIER_NO_EXTRAS = 2
+TIER_REWRITE_ONLY = 3
+TIER_NAMES = ["Full", "No colors", "No stats or grids", "Rewrite only"]
+
+SAMPLE_INTERVAL = 0.5
+# Pressure needed to enter tier 1, 2 and 3
+LAG_LIMITS = (0.1, 0.25, 0.5)
+BACKLOG_LIMITS = (40, 80, 160)
+RECOVERY_SECONDS = 15
+
+
+class LoadGovernor:
+    def __init__(self) -> None:
+        self.tier = TIER_FULL
+        self.lag = 0.0
+        self.handlers = 0
+        self.sampler = None
+        self.changed_at = time.monotonic()
+        self.pressured_at = self.changed_at
+        self.tier_seconds = [0.0] * len(TIER_NAMES)
+        self.escalations = 0
+        self.logger = logging.getLogger("Keto")
+
+    def backlog(self):
+        return self.handlers + rest.stats()["queued"]
+
+    def pressure(self):
+        backlog = self.backlog()
+        tier = TIER_FULL
+        for level, (lag_limit, backlog_limit) in enumerate(
+            zip(LAG_LIMITS, BACKLOG_LIMITS), start=1
+        ):
+            if self.lag >= lag_limit or backlog >= backlog_limit:
+                tier = level
+        return tier
+
+    def move_to(self, tier: int, now: float):
+        self.tier_seconds[self.tier] += now - self.changed_at
+        self.changed_at = now
+        if tier > self.tier:
+            self.escalations += 1
+        self.logger.info(
+            f"Load tier {TIER_NAMES[self.tier]} -> {TIER_NAMES[tier]} (lag {self.lag * 1000:.0f} ms, backlog {self.backlog()})"
+        )
+        self.tier = tier
+
+    def evaluate(self):
+        now = time.monotonic()
+        target = self.pressure()
+        if target >= self.tier:
+            self.pressured_at = now
+            if target > self.tier:
+                self.move_to(target, now)
+        elif now - self.pressured_at >= RECOVERY_SECONDS:
+            # Step down one tier at a time so a burst that is still draining
+            # doesn't flip everything back on at once
+            self.pressured_at = now
+            self.move_to(self.tier - 1, now)
+
+    async def sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            lag = max(0.0, loop.time() - started - SAMPLE_INTERVAL)
+            # Rises at once, decays over a few samples
+            self.lag = lag if lag > self.lag else self.lag * 0.7 + lag * 0.3
+            self.evaluate()
+
+    def ensure_sampling(self):
+        if self.sampler is None or self.sampler.done():
+            self.sampler = asyncio.create_task(self.sample())
+
+    @asynccontextmanager
+    async def handling(self):
+        """Count a message handler as in flight for as long as the block runs."""
+        self.ensure_sampling()
+        self.handlers += 1
+        if self.pressure() > self.tier:
+            self.evaluate()
+        try:
+            yield self.tier
+        finally:
+            self.handlers -= 1
+
+    def allows(self, tier: int):
+        """Whether work that is dropped from the given tier on may still run."""
+        return self.tier < tier
+
+    def stats(self):
+        seconds = list(self.tier_seconds)
+        seconds[self.tier] += time.monotonic() - self.changed_at
+        return {
+            "tier": self.tier,
+            "tier_name": TIER_NAMES[self.tier],
+            "lag": self.lag,
+            "handlers": self.handlers,
+            "backlog": self.backlog(),
+            "escalations": self.escalations,
+            "tier_seconds": dict(zip(TIER_NAMES, seconds)),
+        }
+
+
+governor = LoadGovernor()
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import aiohttp
+
+from utils.lanes import LANE_BACKGROUND, http_session
+
+DISCORDBOT_USER_AGENT = (
+    "Mozilla/5.0 (compatible; Discordbot/2.0; +https://discordapp.com)"
+)
+
+
+class MirrorHealth:
+    def __init__(self) -> None:
+        self.latency = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_checked = None
+        self.last_error = None
+
+    @property
+    def healthy(self):
+        return self.latency is not None and self.consecutive_failures < 2
+
+    def record_success(self, latency: float):
+        self.latency = (
+            latency if self.latency is None else self.latency * 0.7 + latency * 0.3
+        )
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.last_checked = time.time()
+        self.last_error = None
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_checked = time.time()
+        self.last_error = error
+
+
+class MirrorProber:
+    def __init__(self, config: dict) -> None:
+        self.config = config
+        self.health = {}
+
+    def mirrors(self, platform: str):
+        urls = self.config[platform]["url"]
+        return [urls] if isinstance(urls, str) else list(urls)
+
+    def get_health(self, platform: str, mirror: str):
+        return self.health.setdefault(platform, {}).setdefault(mirror, MirrorHealth())
+
+    def pick(self, platform: str):
+        mirrors = self.mirrors(platform)
+        healthy = [
+            mirror for mirror in mirrors if self.get_health(platform, mirror).healthy
+        ]
+        if not healthy:
+            # Nothing probed yet (or everything is down), trust the configured ranking
+            return mirrors[0]
+        return min(
+            healthy, key=lambda mirror: self.get_health(platform, mirror).latency
+        )
+
+    async def probe(self, session, platform: str, mirror: str):
+        health = self.get_health(platform, mirror)
+        url = f"https://{mirror}{self.config[platform].get('probe', '/')}"
+        start = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                body = await response.content.read(65536)
+                if response.status != 200:
+                    return health.record_failure(f"HTTP {response.status}")
+                if b"og:" not in body and b"twitter:" not in body:
+                    return health.record_failure("No embed metadata")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return health.record_failure(type(e).__name__)
+        health.record_success(time.perf_counter() - start)
+
+    async def probe_all(self):
+        async with http_session(
+            lane=LANE_BACKGROUND,
+            headers={"User-Agent": DISCORDBOT_USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=10),
+        ) as session:
+            await asyncio.gather(
+                *[
+                    self.probe(session, platform, mirror)
+                    for platform, options in self.config.items()
+                    if "url" in options
+                    for mirror in self.mirrors(platform)
+                ]
+            )
@@ -0,0 +1,228 @@
+import os
+from collections import OrderedDict
+
+import discord
+
+SNAPSHOT_LIMIT = int(os.getenv("SNAPSHOT_LIMIT", 5000))
+SKIPPABLE_CHANNELS = (
+    discord.TextChannel,
+    discord.VoiceChannel,
+    discord.Thread,
+    discord.StageChannel,
+)
+
+
+class Snapshot:
+    # What's left of a skipped message, enough to rebuild a Message for the
+    # edit and delete events without keeping the whole gateway payload
+    __slots__ = (
+        "channel_id",
+        "guild_id",
+        "author",
+        "nick",
+        "content",
+        "timestamp",
+        "attachments",
+        "embeds",
+    )
+
+    def __init__(self, data: dict) -> None:
+        author = data["author"]
+        self.channel_id = data["channel_id"]
+        self.guild_id = data.get("guild_id")
+        self.author = (
+            author["id"],
+            author["username"],
+            author.get("global_name"),
+            author.get("avatar"),
+            author.get("discriminator", "0"),
+            author.get("bot", False),
+        )
+        self.nick = (data.get("member") or {}).get("nick")
+        self.content = data.get("content", "")
+        self.timestamp = data["timestamp"]
+        self.attachments = self.pack_attachments(data.get("attachments"))
+        self.embeds = data.get("embeds") or None
+
+    @staticmethod
+    def pack_attachments(attachments):
+        return tuple(
+            (
+                attachment["id"],
+                attachment["filename"],
+                attachment["url"],
+                attachment["size"],
+            )
+            for attachment in attachments or ()
+        )
+
+    def update(self, data: dict):
+        if "content" in data:
+            self.content = data["content"]
+        if "embeds" in data:
+            self.embeds = data["embeds"] or None
+        if "attachments" in data:
+            self.attachments = self.pack_attachments(data["attachments"])
+
+    def payload(self, message_id: int):
+        user_id, username, global_name, avatar, discriminator, bot = self.author
+        payload = {
+            "id": str(message_id),
+            "channel_id": self.channel_id,
+            "author": {
+                "id": user_id,
+                "username": username,
+                "global_name": global_name,
+                "avatar": avatar,
+                "discriminator": discriminator,
+                "bot": bot,
+            },
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "edited_timestamp": None,
+            "attachments": [
+                {
+                    "id": attachment_id,
+                    "filename": filename,
+                    "url": url,
+                    "proxy_url": url,
+                    "size": size,
+                }
+                for attachment_id, filename, url, size in self.attachments
+            ],
+            "embeds": self.embeds or [],
+            "pinned": False,
+            "type": 0,
+            "tts": False,
+            "mention_everyone": False,
+            "flags": 0,
+        }
+        if self.guild_id is not None:
+            payload["guild_id"] = self.guild_id
+            payload["member"] = {"roles": [], "nick": self.nick}
+        return payload
+
+
+class MessageFilter:
+    def __init__(self) -> None:
+        # Cogs say what they react to, a message matching none of it is never
+        # turned into a Message object or dispatched
+        self.substrings = set()
+        self.filenames = set()
+        self.author_ids = set()
+        self.prefix = None
+        self.mentions = ()
+        self.snapshots = OrderedDict()
+        self.seen = 0
+        self.skipped = 0
+
+    def watch_content(self, *substrings: str):
+        self.substrings.update(substring.lower() for substring in substrings)
+
+    def watch_attachments(self, *filenames: str):
+        self.filenames.update(filenames)
+
+    def watch_authors(self, *author_ids: int):
+        self.author_ids.update(str(author_id) for author_id in author_ids)
+
+    def wanted(self, data: dict):
+        if "guild_id" not in data:
+            return True
+        author = data.get("author") or {}
+        if author.get("id") in self.author_ids:
+            return True
+        if author.get("bot"):
+            return False
+
+        content = data.get("content", "")
+        if content.startswith(self.prefix) or any(
+            mention in content for mention in self.mentions
+        ):
+            return True
+        lowered = content.lower()
+        if any(substring in lowered for substring in self.substrings):
+            return True
+        return any(
+            attachment.get("filename") in self.filenames
+            for attachment in data.get("attachments", ())
+        )
+
+    def remember(self, data: dict):
+        self.snapshots[int(data["id"])] = Snapshot(data)
+        while len(self.snapshots) > SNAPSHOT_LIMIT:
+            self.snapshots.popitem(last=False)
+
+    def rebuild(self, state, message_id: int, snapshot: Snapshot):
+        payload = snapshot.payload(message_id)
+        channel, _ = state._get_guild_channel(payload)
+        return discord.Message(state=state, channel=channel, data=payload)
+
+    def install(self, bot):
+        state = bot._connection
+        parsers = state.parsers
+        self.prefix = bot.command_prefix
+        create = parsers["MESSAGE_CREATE"]
+        update = parsers["MESSAGE_UPDATE"]
+        delete = parsers["MESSAGE_DELETE"]
+        delete_bulk = parsers["MESSAGE_DELETE_BULK"]
+
+        def parse_message_create(data):
+            self.seen += 1
+            if self.wanted(data):
+                return create(data)
+            self.skipped += 1
+            self.remember(data)
+            channel, _ = state._get_guild_channel(data)
+            if channel.__class__ in SKIPPABLE_CHANNELS:
+                channel.last_message_id = int(data["id"])
+
+        def parse_message_update(data):
+            message_id = int(data["id"])
+            snapshot = self.snapshots.get(message_id)
+            update(data)
+            if snapshot is None or "content" not in data:
+                return
+            before = self.rebuild(state, message_id, snapshot)
+            after = self.rebuild(state, message_id, snapshot)
+            after._update(data)
+            snapshot.update(data)
+            state.dispatch("message_edit", before, after)
+
+        def parse_message_delete(data):
+            snapshot = self.snapshots.pop(int(data["id"]), None)
+            delete(data)
+            if snapshot is not None:
+                state.dispatch(
+                    "message_delete", self.rebuild(state, int(data["id"]), snapshot)
+                )
+
+        def parse_message_delete_bulk(data):
+            delete_bulk(data)
+            rebuilt = []
+            for message_id in map(int, data["ids"]):
+                if (snapshot := self.snapshots.pop(message_id, None)) is not None:
+                    rebuilt.append(self.rebuild(state, message_id, snapshot))
+            if rebuilt:
+                state.dispatch("bulk_message_delete", rebuilt)
+
+        parsers["MESSAGE_CREATE"] = parse_message_create
+        parsers["MESSAGE_UPDATE"] = parse_message_update
+        parsers["MESSAGE_DELETE"] = parse_message_delete
+        parsers["MESSAGE_DELETE_BULK"] = parse_message_delete_bulk
+
+    def stats(self):
+        return {
+            "seen": self.seen,
+            "skipped": self.skipped,
+            "snapshots": len(self.snapshots),
+        }
+
+
+message_filter = MessageFilter()
+
+
+def use_message_filter(bot):
+    message_filter.install(bot)
+    # The bot's user only exists once it's logged in
+    if bot.user is not None:
+        message_filter.mentions = (f"<@{bot.user.id}>", f"<@!{bot.user.id}>")
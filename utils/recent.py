@@ -0,0 +1,104 @@
+import time
+from collections import OrderedDict
+
+RECENT_TTL = 600
+RECENT_PER_CHANNEL = 32
+RECENT_MAX_ENTRIES = 20000
+IN_FLIGHT = 0
+
+
+class RecentFixes:
+    def __init__(
+        self,
+        ttl: int = RECENT_TTL,
+        per_channel: int = RECENT_PER_CHANNEL,
+        max_entries: int = RECENT_MAX_ENTRIES,
+    ) -> None:
+        # channel id -> {canonical id: (bot message id, expires at)}, both
+        # levels in write order so the oldest entry is always at the front
+        self.ttl = ttl
+        self.per_channel = per_channel
+        self.max_entries = max_entries
+        self.channels = OrderedDict()
+        self.messages = {}
+        self.size = 0
+        self.referenced = 0
+        self.skipped = 0
+
+    def drop(self, channel_id: int, key: str):
+        fixes = self.channels[channel_id]
+        message_id, _ = fixes.pop(key)
+        self.size -= 1
+        if message_id != IN_FLIGHT:
+            self.messages.pop(message_id, None)
+        if not fixes:
+            del self.channels[channel_id]
+
+    def expire(self, channel_id: int, now: float):
+        fixes = self.channels.get(channel_id)
+        while fixes:
+            key, (_, expires) = next(iter(fixes.items()))
+            if expires > now:
+                break
+            self.drop(channel_id, key)
+            fixes = self.channels.get(channel_id)
+
+    def store(self, channel_id: int, key: str, message_id: int):
+        fixes = self.channels.get(channel_id)
+        if fixes is not None and key in fixes:
+            self.drop(channel_id, key)
+        fixes = self.channels.setdefault(channel_id, OrderedDict())
+        self.channels.move_to_end(channel_id)
+        fixes[key] = (message_id, time.monotonic() + self.ttl)
+        self.size += 1
+        if message_id != IN_FLIGHT:
+            self.messages[message_id] = (channel_id, key)
+
+        if len(fixes) > self.per_channel:
+            self.drop(channel_id, next(iter(fixes)))
+        while self.size > self.max_entries:
+            # The channel written to longest ago gives up its oldest fix
+            oldest = next(iter(self.channels))
+            self.drop(oldest, next(iter(self.channels[oldest])))
+
+    def claim(self, channel_id: int, key: str):
+        """Return the message that already fixed key in this channel, or None after claiming it.
+
+        IN_FLIGHT means an earlier fix of the same link hasn't been sent yet.
+        """
+        self.expire(channel_id, time.monotonic())
+        fixes = self.channels.get(channel_id)
+        if fixes is not None and key in fixes:
+            message_id = fixes[key][0]
+            if message_id == IN_FLIGHT:
+                self.skipped += 1
+            else:
+                self.referenced += 1
+            return message_id
+        self.store(channel_id, key, IN_FLIGHT)
+        return None
+
+    def settle(self, channel_id: int, key: str, message_id: int = None):
+        fixes = self.channels.get(channel_id)
+        if fixes is None or fixes.get(key, (None,))[0] != IN_FLIGHT:
+            return
+        if message_id is None:
+            # Nothing was sent, the next paste should get a real fix
+            self.drop(channel_id, key)
+        else:
+            self.store(channel_id, key, message_id)
+
+    def forget(self, message_id: int):
+        if (entry := self.messages.get(message_id)) is not None:
+            self.drop(*entry)
+
+    def stats(self):
+        return {
+            "entries": self.size,
+            "channels": len(self.channels),
+            "referenced": self.referenced,
+            "skipped": self.skipped,
+        }
+
+
+recent_fixes = RecentFixes()
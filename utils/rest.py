@@ -0,0 +1,173 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import re
+from collections import Counter
+
+PRIORITY_INTERACTION = 0
+PRIORITY_REPLY = 5
+PRIORITY_PASSIVE = 10
+
+# Keyword pairs Message.edit refuses to take together, the newest one wins
+EXCLUSIVE_FIELDS = {"embed": "embeds", "embeds": "embed"}
+SNOWFLAKE_PATTERN = re.compile(r"/\d{15,20}")
+
+
+def retrieved(future: asyncio.Future):
+    # Fire-and-forget callers never look at the result, mark failures as seen
+    if not future.cancelled():
+        future.exception()
+
+
+class Action:
+    __slots__ = ("priority", "route", "call", "fields", "future", "started", "key")
+
+    def __init__(self, priority: int, route, call, fields: dict, key=None) -> None:
+        self.priority = priority
+        self.route = route
+        self.call = call
+        self.fields = fields
+        self.future = asyncio.get_running_loop().create_future()
+        self.future.add_done_callback(retrieved)
+        self.started = False
+        self.key = key
+
+
+class RateLimitCounter(logging.Handler):
+    # discord.py retries 429s on its own and only says so in its log
+    def __init__(self) -> None:
+        super().__init__(logging.WARNING)
+        self.total = 0
+        self.routes = Counter()
+
+    def emit(self, record: logging.LogRecord):
+        message = str(record.msg)
+        if "responded with 429" in message:
+            method, url = record.args[:2]
+            route = SNOWFLAKE_PATTERN.sub("/:id", str(url))
+            self.total += 1
+            self.routes[f"{method} {route}"] += 1
+        elif message.startswith("Global rate limit has been hit"):
+            self.total += 1
+            self.routes["global"] += 1
+
+
+class RestScheduler:
+    def __init__(self, concurrency: int) -> None:
+        # Messages routes are bucketed per channel, so the channel is the
+        # route here, one call in flight per route keeps a channel's calls
+        # ordered and the rest of the slots free for other channels
+        self.concurrency = concurrency
+        self.queue = []
+        self.parked = {}
+        self.busy = set()
+        self.edits = {}
+        self.sequence = itertools.count()
+        self.in_flight = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.rate_limits = RateLimitCounter()
+        logging.getLogger("discord.http").addHandler(self.rate_limits)
+
+    def push(self, action: Action):
+        heapq.heappush(self.queue, (action.priority, next(self.sequence), action))
+
+    def pump(self):
+        while self.queue and self.in_flight < self.concurrency:
+            priority, _, action = heapq.heappop(self.queue)
+            # A coalesced edit that got bumped up leaves its old entry behind
+            if action.started or priority != action.priority:
+                continue
+            if action.route in self.busy:
+                parked = self.parked.setdefault(action.route, [])
+                if action not in parked:
+                    parked.append(action)
+                continue
+            action.started = True
+            self.busy.add(action.route)
+            self.in_flight += 1
+            asyncio.create_task(self.run(action))
+
+    async def run(self, action: Action):
+        # Edits queued from here on can't be folded into this one anymore
+        if action.key is not None and self.edits.get(action.key) is action:
+            del self.edits[action.key]
+        try:
+            result = await action.call(**action.fields)
+        except Exception as e:
+            if not action.future.done():
+                action.future.set_exception(e)
+        else:
+            if not action.future.done():
+                action.future.set_result(result)
+        finally:
+            self.sent += 1
+            self.in_flight -= 1
+            self.busy.discard(action.route)
+            for parked in self.parked.pop(action.route, []):
+                self.push(parked)
+            self.pump()
+
+    def submit(self, route, call, *, priority: int = PRIORITY_PASSIVE, **fields):
+        """Queue call(**fields) on the channel's route and return a future for its result."""
+        action = Action(priority, route, call, fields)
+        self.push(action)
+        self.pump()
+        return action.future
+
+    def reply(self, message, content=None, *, priority: int = PRIORITY_REPLY, **fields):
+        return self.submit(
+            message.channel.id,
+            message.reply,
+            priority=priority,
+            content=content,
+            **fields,
+        )
+
+    def edit(self, message, *, priority: int = PRIORITY_PASSIVE, **fields):
+        """Queue an edit, folding it into one for the same message that hasn't gone out yet."""
+        if (pending := self.edits.get(message.id)) is not None:
+            for field in fields:
+                pending.fields.pop(EXCLUSIVE_FIELDS.get(field), None)
+            pending.fields.update(fields)
+            self.coalesced += 1
+            if priority < pending.priority:
+                pending.priority = priority
+                self.push(pending)
+            self.pump()
+            return pending.future
+
+        action = Action(priority, message.channel.id, message.edit, fields, message.id)
+        self.edits[message.id] = action
+        self.push(action)
+        self.pump()
+        return action.future
+
+    def depth(self):
+        waiting = {
+            action
+            for priority, _, action in self.queue
+            if not action.started and priority == action.priority
+        }
+        for actions in self.parked.values():
+            waiting.update(actions)
+        return Counter(action.priority for action in waiting)
+
+    def stats(self):
+        depth = self.depth()
+        return {
+            "queued": sum(depth.values()),
+            "interaction": depth[PRIORITY_INTERACTION],
+            "reply": depth[PRIORITY_REPLY],
+            "passive": depth[PRIORITY_PASSIVE],
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limits.total,
+            "rate_limited_routes": self.rate_limits.routes.most_common(5),
+        }
+
+
+rest = RestScheduler(concurrency=int(os.getenv("REST_CONCURRENCY", 8)))
@@ -0,0 +1,99 @@
+import hashlib
+import heapq
+import time
+
+import numpy as np
+
+HOT_THRESHOLD = 5
+
+
+class CountMinSketch:
+    def __init__(self, width: int, depth: int) -> None:
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float32)
+        self.rows = np.arange(depth)
+
+    def indexes(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint64) % self.width
+
+    def add(self, key: str, amount: float = 1.0):
+        # Conservative update, only the cells at the current minimum grow,
+        # which keeps collisions from inflating every other row
+        indexes = self.indexes(key)
+        cells = self.table[self.rows, indexes]
+        estimate = cells.min() + amount
+        self.table[self.rows, indexes] = np.maximum(cells, estimate)
+        return float(estimate)
+
+    def estimate(self, key: str):
+        return float(self.table[self.rows, self.indexes(key)].min())
+
+    def decay(self, factor: float):
+        self.table *= factor
+
+
+class HeavyHitters:
+    def __init__(self, k: int, width: int, depth: int, half_life: float) -> None:
+        self.k = k
+        self.half_life = half_life
+        self.sketch = CountMinSketch(width, depth)
+        self.top = {}
+        self.heap = []
+        self.last_decay = time.monotonic()
+        self.total = 0
+
+    def maybe_decay(self):
+        now = time.monotonic()
+        elapsed = now - self.last_decay
+        if elapsed < 60:
+            return
+        factor = 0.5 ** (elapsed / self.half_life)
+        self.sketch.decay(factor)
+        self.top = {key: count * factor for key, count in self.top.items()}
+        self.rebuild_heap()
+        self.last_decay = now
+
+    def rebuild_heap(self):
+        self.heap = [(count, key) for key, count in self.top.items()]
+        heapq.heapify(self.heap)
+
+    def smallest(self):
+        # Entries go stale whenever a tracked key's count changes, skip those
+        while self.heap:
+            count, key = self.heap[0]
+            if self.top.get(key) == count:
+                return count, key
+            heapq.heappop(self.heap)
+        return None
+
+    def add(self, key: str):
+        self.maybe_decay()
+        self.total += 1
+        estimate = self.sketch.add(key)
+
+        if key in self.top or len(self.top) < self.k:
+            self.top[key] = estimate
+            heapq.heappush(self.heap, (estimate, key))
+        elif (smallest := self.smallest()) and estimate > smallest[0]:
+            heapq.heappop(self.heap)
+            del self.top[smallest[1]]
+            self.top[key] = estimate
+            heapq.heappush(self.heap, (estimate, key))
+
+        if len(self.heap) > self.k * 4:
+            self.rebuild_heap()
+        return estimate
+
+    def estimate(self, key: str):
+        return self.sketch.estimate(key)
+
+    def is_hot(self, key: str):
+        return key in self.top and self.top[key] >= HOT_THRESHOLD
+
+    def most_common(self, count: int = None):
+        return sorted(self.top.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+heavy_hitters = HeavyHitters(k=50, width=4096, depth=4, half_life=3600)
@@ -0,0 +1,152 @@
+import os
+import time
+from collections import OrderedDict
+
+import discord
+
+SNIPE_TTL = 120
+CHANNEL_SLOTS = 16
+SNIPE_LIMIT = int(os.getenv("SNIPE_LIMIT", 20000))
+
+
+class Snipe:
+    # Only what the snipe embeds show, the message itself (and its author,
+    # guild and channel references) is left for the cache to drop
+    __slots__ = (
+        "kind",
+        "message_id",
+        "author_name",
+        "avatar_url",
+        "content",
+        "after",
+        "attachments",
+        "embeds",
+        "logged_at",
+    )
+
+    def __init__(
+        self, kind: str, message: discord.Message, after: discord.Message = None
+    ) -> None:
+        self.kind = kind
+        self.message_id = message.id
+        self.author_name = message.author.display_name
+        self.avatar_url = message.author.display_avatar.url
+        self.content = message.content
+        self.after = after.content if after is not None else None
+        self.attachments = tuple(
+            (attachment.filename, attachment.url) for attachment in message.attachments
+        )
+        self.embeds = tuple(embed.to_dict() for embed in message.embeds) or None
+        self.logged_at = time.monotonic()
+
+    @property
+    def created_at(self):
+        return discord.utils.snowflake_time(self.message_id)
+
+    def expired(self, now: float):
+        return now - self.logged_at >= SNIPE_TTL
+
+
+class SnipeRing:
+    __slots__ = ("slots", "start", "size")
+
+    def __init__(self) -> None:
+        self.slots = [None] * CHANNEL_SLOTS
+        self.start = 0
+        self.size = 0
+
+    def index(self, position: int):
+        return (self.start + position) % CHANNEL_SLOTS
+
+    def push(self, snipe: Snipe):
+        """Append a snipe, returning whether the oldest one was overwritten."""
+        full = self.size == CHANNEL_SLOTS
+        self.slots[self.index(self.size)] = snipe
+        if full:
+            self.start = self.index(1)
+        else:
+            self.size += 1
+        return full
+
+    def drop_oldest(self):
+        self.slots[self.start] = None
+        self.start = self.index(1)
+        self.size -= 1
+
+    def expire(self, now: float):
+        # Snipes are pushed in order, so the expired ones are all at the front
+        expired = 0
+        while self.size and self.slots[self.start].expired(now):
+            self.drop_oldest()
+            expired += 1
+        return expired
+
+    def pop(self, kind: str = None):
+        for position in range(self.size - 1, -1, -1):
+            snipe = self.slots[self.index(position)]
+            if kind is None or snipe.kind == kind:
+                break
+        else:
+            return None
+        # Close the gap, at most CHANNEL_SLOTS moves
+        for later in range(position, self.size - 1):
+            self.slots[self.index(later)] = self.slots[self.index(later + 1)]
+        self.size -= 1
+        self.slots[self.index(self.size)] = None
+        return snipe
+
+
+class SnipeStore:
+    def __init__(self, limit: int = SNIPE_LIMIT) -> None:
+        # Channels ordered by their last snipe, past the limit the quietest
+        # channel gives up its oldest snipe first
+        self.limit = limit
+        self.channels = OrderedDict()
+        self.size = 0
+        self.logged = 0
+        self.evicted = 0
+
+    def log(self, channel_id: int, snipe: Snipe):
+        ring = self.channels.get(channel_id)
+        if ring is None:
+            ring = self.channels[channel_id] = SnipeRing()
+        else:
+            self.channels.move_to_end(channel_id)
+        self.logged += 1
+        if ring.push(snipe):
+            self.evicted += 1
+        else:
+            self.size += 1
+
+        while self.size > self.limit:
+            oldest_id, oldest = next(iter(self.channels.items()))
+            oldest.drop_oldest()
+            self.size -= 1
+            self.evicted += 1
+            if not oldest.size:
+                del self.channels[oldest_id]
+
+    def pop(self, channel_id: int, kind: str = None):
+        """Take the newest unexpired snipe in a channel, optionally of one kind."""
+        ring = self.channels.get(channel_id)
+        if ring is None:
+            return None
+        self.size -= ring.expire(time.monotonic())
+        snipe = ring.pop(kind)
+        if snipe is not None:
+            self.size -= 1
+        if not ring.size:
+            del self.channels[channel_id]
+        return snipe
+
+    def stats(self):
+        return {
+            "snipes": self.size,
+            "channels": len(self.channels),
+            "limit": self.limit,
+            "logged": self.logged,
+            "evicted": self.evicted,
+        }
+
+
+snipes = SnipeStore()
@@ -0,0 +1,304 @@
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+import os
+import time
+from collections import namedtuple
+from functools import partial
+
+import aiohttp
+from aiocache import Cache
+from aiocache.serializers import PickleSerializer
+from async_whisper import AsyncWhisper
+from pydub import AudioSegment
+
+from utils.blobstore import blobs
+from utils.extract import SAMPLE_RATE, extract_media
+from utils.jobs import report_progress
+from utils.lanes import http_session
+
+SUMMARY_DEADLINE = 60
+COMPLETION_RESERVE = 15
+TRANSCRIPTION_TIMEOUT = 10
+SUMMARY_TTL = 604800
+
+FINGERPRINT_CHUNK = 64 * 1024
+FINGERPRINT_SAMPLES = 8
+
+STAGE_STATUS = {
+    "media": "Processing video...",
+    "transcription": "Transcribing audio...",
+    "completion": "Writing summary...",
+}
+
+logger = logging.getLogger("Keto")
+
+SummaryMedia = namedtuple("SummaryMedia", ["fingerprint", "frames", "audio"])
+
+
+def summary_cache(name: str):
+    return Cache.REDIS(
+        namespace=f"Summaries---{name}",
+        endpoint=os.getenv("REDIS_HOST", "keto_redis"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        password=os.getenv("REDIS_PASSWORD"),
+        serializer=PickleSerializer(),
+    )
+
+
+# content id (tiktok:<id>, instagram:<shortcode>) -> media fingerprint
+content_cache = summary_cache("content")
+# media fingerprint -> {"summary": ..., "transcription": ...}
+media_cache = summary_cache("media")
+
+
+class StageGraph:
+    def __init__(self, deadline: float) -> None:
+        self.start = time.perf_counter()
+        self.deadline = self.start + deadline
+        self.tasks = {}
+        self.timings = {}
+
+    def add(self, name: str, func, *deps: str, reserve: float = 0):
+        # Each stage starts as soon as its dependencies settle, a dependency
+        # that failed or ran out of time is handed over as None.
+        self.tasks[name] = asyncio.create_task(self.run(name, func, deps, reserve))
+
+    async def run(self, name: str, func, deps, reserve: float):
+        args = [await self.result(dep, reserve) for dep in deps]
+        if name in STAGE_STATUS:
+            await report_progress(STAGE_STATUS[name])
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await func(*args)
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status = type(e).__name__
+            raise
+        finally:
+            self.timings[name] = (
+                started - self.start,
+                time.perf_counter() - self.start,
+                status,
+            )
+
+    async def result(self, name: str, reserve: float = 0):
+        timeout = max(self.deadline - reserve - time.perf_counter(), 0)
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.tasks[name]), timeout)
+        except Exception:
+            return None
+
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
+
+    def format_timings(self):
+        stages = []
+        for name in self.tasks:
+            if name not in self.timings:
+                stages.append(f"{name} unfinished")
+                continue
+            started, finished, status = self.timings[name]
+            stage = f"{name} {started:.2f}-{finished:.2f}s"
+            stages.append(stage if status == "ok" else f"{stage} ({status})")
+        stages.append(f"total {time.perf_counter() - self.start:.2f}s")
+        return ", ".join(stages)
+
+
+async def load_summary_inputs(key: str):
+    audio = await blobs.aget(f"summary:{key}:pcm")
+    if not audio:
+        return None
+
+    frames = []
+    for i in range(audio.meta.get("frames", 0)):
+        frame = await blobs.aget(f"summary:{key}:frame:{i}")
+        if not frame:
+            return None
+        frames.append(base64.b64encode(frame.data).decode("utf-8"))
+    if not audio.data:
+        return frames, None
+    return frames, AudioSegment(
+        data=audio.data, sample_width=2, frame_rate=SAMPLE_RATE, channels=1
+    )
+
+
+async def save_summary_inputs(key: str, frames, audio: AudioSegment = None):
+    for i, frame in enumerate(frames):
+        await blobs.aput(f"summary:{key}:frame:{i}", frame)
+    await blobs.aput(
+        f"summary:{key}:pcm",
+        audio.raw_data if audio else b"",
+        meta={"frames": len(frames)},
+    )
+
+
+async def extract_summary_inputs(key: str, source):
+    media = await extract_media(source)
+    logger.debug(f"Extracted {key} ({media.format_timings()})")
+    if not media.frames:
+        return None
+    await save_summary_inputs(key, media.frames, media.audio)
+    return [
+        base64.b64encode(frame).decode("utf-8") for frame in media.frames
+    ], media.audio
+
+
+def media_fingerprint(source):
+    # Size plus a handful of sampled chunks, cheap enough to run on every
+    # download while still telling re-encodes apart
+    if isinstance(source, str):
+        size = os.path.getsize(source)
+        f = open(source, "rb")
+    else:
+        size = len(source)
+        f = io.BytesIO(source)
+
+    digest = hashlib.blake2b(digest_size=16)
+    with f:
+        step = max(size // FINGERPRINT_SAMPLES, 1)
+        offsets = {*range(0, size, step), max(size - FINGERPRINT_CHUNK, 0)}
+        for offset in sorted(offsets):
+            f.seek(offset)
+            digest.update(f.read(FINGERPRINT_CHUNK))
+    return f"{size:x}-{digest.hexdigest()}"
+
+
+async def load_media(content_id: str, open_media):
+    if fingerprint := await content_cache.get(content_id):
+        if inputs := await load_summary_inputs(fingerprint):
+            return SummaryMedia(fingerprint, *inputs)
+
+    async with open_media() as source:
+        if not source:
+            return None
+        fingerprint = await asyncio.to_thread(media_fingerprint, source)
+        await content_cache.set(content_id, fingerprint, ttl=SUMMARY_TTL)
+        inputs = await load_summary_inputs(fingerprint)
+        if not inputs:
+            inputs = await extract_summary_inputs(fingerprint, source)
+    if not inputs:
+        return None
+    return SummaryMedia(fingerprint, *inputs)
+
+
+async def transcribe(media):
+    if not media:
+        return None
+    record = await media_cache.get(media.fingerprint) or {}
+    if record.get("transcription"):
+        return record["transcription"]
+    if not media.audio or len(media.audio) < 1000:
+        return None
+
+    whisper_client = AsyncWhisper(os.getenv("OPENAI_TOKEN"))
+    transcription = await asyncio.wait_for(
+        whisper_client.transcribe_audio(media.audio), timeout=TRANSCRIPTION_TIMEOUT
+    )
+    if transcription:
+        await media_cache.set(
+            media.fingerprint,
+            {**record, "transcription": transcription},
+            ttl=SUMMARY_TTL,
+        )
+    return transcription
+
+
+async def complete_summary(message: str, frame_base64s, timeout: float):
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {os.getenv('OPENAI_TOKEN')}",
+    }
+
+    payload = {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {
+                "role": "user",
+                "content": [{"type": "text", "text": message}]
+                + [
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": f"data:image/jpeg;base64,{frame_base64}"},
+                    }
+                    for frame_base64 in frame_base64s
+                ],
+            }
+        ],
+    }
+
+    async with http_session() as session:
+        async with session.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            if response.status == 200:
+                data = await response.json()
+                return data["choices"][0]["message"]["content"]
+    return None
+
+
+async def summarize(
+    name: str,
+    content_id: str,
+    fetch_description,
+    open_media,
+    build_prompt,
+    deadline=None,
+):
+    if fingerprint := await content_cache.get(content_id):
+        record = await media_cache.get(fingerprint)
+        if record and record.get("summary"):
+            return record["summary"]
+
+    graph = StageGraph(deadline or SUMMARY_DEADLINE)
+
+    async def completion(description, media, transcription):
+        record = {}
+        if media:
+            record = await media_cache.get(media.fingerprint) or {}
+            if record.get("summary"):
+                # Same video reached through a different link
+                return record["summary"]
+        if not description and not transcription:
+            return None
+
+        timeout = max(graph.deadline - time.perf_counter(), 1)
+        summary = await complete_summary(
+            build_prompt(description, transcription),
+            media.frames if media else [],
+            timeout,
+        )
+        if summary and media:
+            await media_cache.set(
+                media.fingerprint,
+                {**record, "summary": summary, "transcription": transcription},
+                ttl=SUMMARY_TTL,
+            )
+        return summary
+
+    graph.add("description", fetch_description)
+    graph.add("media", partial(load_media, content_id, open_media))
+    graph.add("transcription", transcribe, "media", reserve=COMPLETION_RESERVE)
+    graph.add(
+        "completion",
+        completion,
+        "description",
+        "media",
+        "transcription",
+        reserve=COMPLETION_RESERVE,
+    )
+
+    try:
+        return await graph.result("completion")
+    finally:
+        graph.cancel()
+        logger.info(f"{name} summary stages: {graph.format_timings()}")
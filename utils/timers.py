@@ -0,0 +1,144 @@
+import asyncio
+import inspect
+import logging
+import math
+
+TICK = 0.05
+WHEEL_SLOTS = 64
+WHEEL_LEVELS = 3
+
+
+class TimerHandle:
+    __slots__ = ("expires", "callback", "args")
+
+    def __init__(self, expires: int, callback, args) -> None:
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+
+    def cancel(self):
+        # Left in its slot and skipped when the slot comes up, dropping the
+        # references now is enough to let go of the message it held
+        self.callback = None
+        self.args = None
+
+    def cancelled(self):
+        return self.callback is None
+
+
+class TimerWheel:
+    def __init__(
+        self, tick: float = TICK, slots: int = WHEEL_SLOTS, levels: int = WHEEL_LEVELS
+    ) -> None:
+        # Level 0 holds the next slots * tick seconds at tick resolution,
+        # every level above covers slots times the span of the one below
+        # and gets cascaded down as the wheel turns
+        self.tick = tick
+        self.slots = slots
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.spans = [slots**level for level in range(levels + 1)]
+        self.current = None
+        self.pending = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.driver = None
+        self.wakeup = asyncio.Event()
+        self.logger = logging.getLogger("Keto")
+
+    def now_tick(self):
+        return math.floor(asyncio.get_running_loop().time() / self.tick)
+
+    def place(self, handle: TimerHandle):
+        distance = handle.expires - self.current
+        for level, wheel in enumerate(self.wheels):
+            if distance < self.spans[level + 1] or level == len(self.wheels) - 1:
+                slot = (handle.expires // self.spans[level]) % self.slots
+                wheel[slot].append(handle)
+                return
+
+    def call_later(self, delay: float, callback, *args):
+        """Run callback(*args) after delay seconds, awaiting it if it returns a coroutine."""
+        now = asyncio.get_running_loop().time()
+        if not self.pending:
+            # The wheel is empty, so it can jump straight to the present
+            self.current = math.floor(now / self.tick)
+        handle = TimerHandle(
+            max(self.current + 1, math.ceil((now + delay) / self.tick)),
+            callback,
+            args,
+        )
+        self.place(handle)
+        self.pending += 1
+        if self.driver is None or self.driver.done():
+            self.driver = asyncio.create_task(self.drive())
+        self.wakeup.set()
+        return handle
+
+    def advance(self):
+        self.current += 1
+        for level in range(len(self.wheels) - 1, 0, -1):
+            if self.current % self.spans[level] == 0:
+                slot = (self.current // self.spans[level]) % self.slots
+                bucket = self.wheels[level][slot]
+                self.wheels[level][slot] = []
+                for handle in bucket:
+                    if handle.cancelled():
+                        self.pending -= 1
+                        self.cancelled += 1
+                    else:
+                        self.place(handle)
+
+        slot = self.current % self.slots
+        due = self.wheels[0][slot]
+        self.wheels[0][slot] = []
+        return due
+
+    def fire(self, due):
+        waiting = []
+        for handle in due:
+            self.pending -= 1
+            if handle.cancelled():
+                self.cancelled += 1
+                continue
+            callback, args = handle.callback, handle.args
+            handle.cancel()
+            self.fired += 1
+            try:
+                result = callback(*args)
+            except Exception as e:
+                self.logger.debug(f"Timer callback {callback!r} failed: {e!r}")
+                continue
+            if inspect.isawaitable(result):
+                waiting.append(result)
+        # Due actions become tasks only now, all of a tick's batch under one waiter
+        if waiting:
+            asyncio.create_task(self.finish(waiting))
+
+    async def finish(self, waiting):
+        results = await asyncio.gather(*waiting, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.debug(f"Timer action failed: {result!r}")
+
+    async def drive(self):
+        while True:
+            if not self.pending:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+
+            target = self.now_tick()
+            while self.current < target:
+                self.fire(self.advance())
+
+            loop = asyncio.get_running_loop()
+            await asyncio.sleep(max(0, (self.current + 1) * self.tick - loop.time()))
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "fired": self.fired,
+            "cancelled": self.cancelled,
+        }
+
+
+timers = TimerWheel()
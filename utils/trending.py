@@ -0,0 +1,111 @@
+import time
+from collections import deque
+
+TRENDING_WINDOW = 3600
+TRENDING_THRESHOLD = 3
+PRECOMPUTE_TTL = 86400
+PRECOMPUTE_PER_HOUR = 30
+PRUNE_INTERVAL = 60
+
+
+class TrendingTracker:
+    def __init__(
+        self,
+        window: int = TRENDING_WINDOW,
+        threshold: int = TRENDING_THRESHOLD,
+        budget_per_hour: int = PRECOMPUTE_PER_HOUR,
+    ) -> None:
+        self.window = window
+        self.threshold = threshold
+        self.budget_per_hour = budget_per_hour
+        self.sightings = {}
+        self.precomputed = {}
+        self.clicked = {}
+        self.spent = deque()
+        self.pruned_at = 0.0
+        self.precomputes = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+
+    def prune(self, now: float):
+        self.pruned_at = now
+        for key, channels in list(self.sightings.items()):
+            for channel_id, seen_at in list(channels.items()):
+                if now - seen_at > self.window:
+                    del channels[channel_id]
+            if not channels:
+                del self.sightings[key]
+
+        for key, precomputed_at in list(self.precomputed.items()):
+            if now - precomputed_at > PRECOMPUTE_TTL:
+                # Nobody asked for it while it was still relevant
+                del self.precomputed[key]
+                self.wasted += 1
+
+        for key, clicked_at in list(self.clicked.items()):
+            if now - clicked_at > PRECOMPUTE_TTL:
+                del self.clicked[key]
+
+        while self.spent and now - self.spent[0] > 3600:
+            self.spent.popleft()
+
+    def record_fix(self, key: str, channel_id: int):
+        now = time.time()
+        # A full prune walks everything, so it runs once a minute at most,
+        # in between only this key's sightings and the budget need to be current
+        if now - self.pruned_at >= PRUNE_INTERVAL:
+            self.prune(now)
+        else:
+            while self.spent and now - self.spent[0] > 3600:
+                self.spent.popleft()
+        channels = self.sightings.setdefault(key, {})
+        for seen_in, seen_at in list(channels.items()):
+            if now - seen_at > self.window:
+                del channels[seen_in]
+        channels[channel_id] = now
+        return (
+            len(channels) >= self.threshold
+            and key not in self.precomputed
+            and key not in self.clicked
+            and len(self.spent) < self.budget_per_hour
+        )
+
+    def record_precompute(self, key: str):
+        now = time.time()
+        self.precomputed[key] = now
+        self.spent.append(now)
+        self.precomputes += 1
+
+    def record_click(self, key: str):
+        # Only the first click on a video decides whether precomputing paid off
+        if key in self.clicked:
+            return
+        self.clicked[key] = time.time()
+        if self.precomputed.pop(key, None) is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self):
+        self.prune(time.time())
+        clicks = self.hits + self.misses
+        settled = self.hits + self.wasted
+        return {
+            "tracked": len(self.sightings),
+            "trending": sum(
+                1
+                for channels in self.sightings.values()
+                if len(channels) >= self.threshold
+            ),
+            "pending": len(self.precomputed),
+            "precomputes": self.precomputes,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "hit_ratio": self.hits / clicks if clicks else 0,
+            "wasted_ratio": self.wasted / settled if settled else 0,
+            "budget_left": self.budget_per_hour - len(self.spent),
+        }
+
+
+trending = TrendingTracker()
@@ -0,0 +1,12 @@
+import discord
+
+
+class StaticView(discord.ui.View):
+    # Only describes the components of a message. Anything clickable on it is
+    # a DynamicItem registered on the bot that keeps its state in the
+    # custom_id, so nothing is held in memory per sent message and the
+    # buttons keep working after a restart.
+    def __init__(self):
+        super().__init__(timeout=None)
+        # A finished view is never handed to the ViewStore when sent
+        self.stop()
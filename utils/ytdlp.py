@@ -0,0 +1,132 @@
+import copy
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+
+from yt_dlp import YoutubeDL
+
+from utils.lanes import LaneExecutor
+
+INFO_TTL = 600
+MAX_CACHED_INFO = 256
+
+FRAME_HEIGHT = 720
+
+
+def format_size(fmt: dict):
+    return fmt.get("filesize") or fmt.get("filesize_approx") or fmt.get("tbr") or 0
+
+
+def pick_format(ctx):
+    # Frames are scaled to 720p and audio is resampled to 16 kHz mono, so the
+    # smallest rendition that is still 720p tall is all that's needed, or the
+    # tallest one when none reach 720p
+    formats = [
+        fmt
+        for fmt in ctx["formats"]
+        if fmt.get("height")
+        and fmt.get("vcodec") != "none"
+        and fmt.get("acodec") != "none"
+    ]
+    if not formats:
+        # Nothing muxed with a known height, take what yt-dlp ranks best
+        if ctx["formats"]:
+            yield ctx["formats"][-1]
+        return
+
+    tall = [fmt for fmt in formats if fmt["height"] >= FRAME_HEIGHT]
+    if tall:
+        yield min(tall, key=lambda fmt: (fmt["height"], format_size(fmt)))
+    else:
+        yield max(formats, key=lambda fmt: (fmt["height"], -format_size(fmt)))
+
+
+YTDLP_OPTIONS = {
+    "format": pick_format,
+    "outtmpl": "/tmp/video_%(id)s.%(ext)s",
+    "quiet": True,
+    "no_warnings": True,
+    "noprogress": True,
+}
+
+
+class YtdlpPool:
+    def __init__(self, workers: int) -> None:
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="ytdlp"
+        )
+        self.lanes = LaneExecutor("ytdlp", self.executor, workers)
+        self.local = threading.local()
+        self.info_cache = {}
+        self.logger = logging.getLogger("Keto")
+
+    def get_ydl(self):
+        # YoutubeDL isn't thread safe, but building one (and its extractors)
+        # per call is wasted work, so every worker thread keeps its own
+        if not hasattr(self.local, "ydl"):
+            self.local.ydl = YoutubeDL(YTDLP_OPTIONS)
+        return self.local.ydl
+
+    def extract_sync(self, url: str):
+        return self.get_ydl().extract_info(url, download=False)
+
+    def download_sync(self, info: dict):
+        ydl = self.get_ydl()
+        info = copy.deepcopy(info)
+        path = ydl.prepare_filename(info)
+        try:
+            ydl.process_info(info)
+        except Exception:
+            for leftover in (path, f"{path}.part"):
+                with suppress(OSError):
+                    os.remove(leftover)
+            raise
+        # Merged formats can end up with a different extension
+        downloads = info.get("requested_downloads") or [{}]
+        return downloads[0].get("filepath", path)
+
+    def get_cached_info(self, url: str):
+        cached = self.info_cache.get(url)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        self.info_cache.pop(url, None)
+        return None
+
+    def cache_info(self, url: str, info: dict):
+        if len(self.info_cache) >= MAX_CACHED_INFO:
+            now = time.monotonic()
+            for key, (expires, _) in list(self.info_cache.items()):
+                if expires <= now:
+                    del self.info_cache[key]
+            if len(self.info_cache) >= MAX_CACHED_INFO:
+                del self.info_cache[next(iter(self.info_cache))]
+        self.info_cache[url] = (time.monotonic() + INFO_TTL, info)
+
+    async def extract_info(self, url: str):
+        if info := self.get_cached_info(url):
+            return info
+
+        start = time.perf_counter()
+        info = await self.lanes.run(self.extract_sync, url)
+        self.logger.debug(
+            f"Extracted info for {info.get('id')} in {time.perf_counter() - start:.2f}s"
+        )
+        self.cache_info(url, info)
+        return info
+
+    async def download(self, url: str):
+        info = await self.extract_info(url)
+
+        start = time.perf_counter()
+        path = await self.lanes.run(self.download_sync, info)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self.logger.info(
+            f"Downloaded {info.get('id')} ({info.get('format_id')}, {size / 1024:.0f} KB) in {time.perf_counter() - start:.2f}s"
+        )
+        return path, info
+
+
+ytdlp = YtdlpPool(workers=int(os.getenv("YTDLP_WORKERS", 2)))